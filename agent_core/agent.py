@@ -1,23 +1,29 @@
 import google.generativeai as genai
+from google.generativeai.types import StopCandidateException
 import google.ai.generativelanguage as glm
 from dotenv import load_dotenv
-import time
 import os
+import time
 import json
+import functools
 from google.protobuf import struct_pb2
-from google.protobuf.json_format import MessageToDict, ParseDict
+from google.protobuf.json_format import ParseDict
 
 from config import (
     GEMINI_MODEL_NAME,
-    TOOL_CALL_PAUSE_SECONDS,
-    PROMPT_DIRECTORY,
+    STREAM_RESPONSES,
     SHOW_AGENT_THOUGHTS,
     DIREKTORI_BATASAN_AI,
     MEMORY_FILE_NAME,
+    HISTORY_COMPACTION_USE_SUMMARIES,
+    HISTORY_TOKEN_BUDGET,
+    WORKSPACE_CHANGE_FEED,
 )
 from logging_handler import (
     log_agent_thought,
     log_agent_response,
+    log_agent_response_chunk,
+    log_agent_response_end,
     log_tool_call,
     log_tool_output,
     log_error,
@@ -25,19 +31,40 @@ from logging_handler import (
     log_debug,
 )
 from utils.colors import Colors
+from agent_core.tool_dispatcher import ToolDispatcher, EXCLUSIVE, get_call_resources
+from agent_core.tool_cache import ToolResultCache
+from agent_core.change_feed import WorkspaceChangeFeed
+from agent_core.rate_limiter import RateLimiter
+from agent_core.context_manager import ContextManager
+from agent_core.history_journal import HistoryJournal, RECORD_CHECKPOINT, content_from_dict
 from tools.file_system_tools import file_system_tool_definitions, file_system_functions
 from tools.execution_tools import execution_tool_definitions, execution_functions
 from tools.control_tools import control_tool_definitions, control_functions
 from tools.internet_tools import internet_tool_definitions, internet_functions
 from tools.advanced_tools import advanced_tool_definitions, advanced_functions
 from tools.todo_manager_tools import todo_manager_tool_definitions, todo_manager_functions
+from tools.memory_tools import memory_tool_definitions, memory_functions
+from tools.knowledge_tools import knowledge_tool_definitions, knowledge_functions
+from tools.search_tools import search_tool_definitions, search_functions
+from utils.prompt_index import get_prompt_index
 
 load_dotenv()
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+# Alasan selesai yang menghasilkan jawaban utuh (sama dengan pemeriksaan SDK tanpa streaming)
+ACCEPTED_FINISH_REASONS = (
+    glm.Candidate.FinishReason.FINISH_REASON_UNSPECIFIED,
+    glm.Candidate.FinishReason.STOP,
+    glm.Candidate.FinishReason.MAX_TOKENS,
+)
+
+
 class Agent:
-    def __init__(self):
+    def __init__(self, memory_file=MEMORY_FILE_NAME):
+        # Setiap sesi dapat memakai file memori sendiri (mis. beberapa AsyncAgent dalam satu proses)
+        self.memory_file = memory_file
+
         # Menggabungkan semua definisi tool yang tersedia
         self.all_tool_definitions = glm.Tool(
             function_declarations=(
@@ -47,6 +74,9 @@ class Agent:
                 + list(internet_tool_definitions.function_declarations)
                 + list(advanced_tool_definitions.function_declarations)
                 + list(todo_manager_tool_definitions.function_declarations)
+                + list(memory_tool_definitions.function_declarations)
+                + list(knowledge_tool_definitions.function_declarations)
+                + list(search_tool_definitions.function_declarations)
             )
         )
         # Menggabungkan semua fungsi tool yang tersedia
@@ -57,22 +87,37 @@ class Agent:
             **internet_functions,
             **advanced_functions,
             **todo_manager_functions,
+            **memory_functions,
+            **knowledge_functions,
+            **search_functions,
         }
+        # recall_memory selalu membaca journal milik sesi ini
+        self.available_functions["recall_memory"] = functools.partial(
+            memory_functions["recall_memory"], journal_path=self.memory_file
+        )
+        # Cache hasil tool idempoten (read_file, web_search, dll.) per sesi
+        self.tool_cache = ToolResultCache()
+        # Ringkasan perubahan workspace setelah tool berefek luas (mis. execute_command)
+        self.change_feed = WorkspaceChangeFeed() if WORKSPACE_CHANGE_FEED else None
+        # Dispatcher untuk menjalankan beberapa tool call secara konkuren
+        self.tool_dispatcher = ToolDispatcher(self._execute_tool_call)
 
-        # Memuat instruksi sistem dasar untuk agen percakapan
-        system_instruction_files = [
-            "_planner_instructions.txt",
-            "_validator_instructions.txt",
-            "kernelsu_webui_backend_guide.txt",
-        ]
-        system_instruction = self._load_specific_instructions(system_instruction_files)
-        system_instruction += f"\n\n[PENTING] Direktori kerja absolut Anda saat ini adalah: {os.path.abspath(DIREKTORI_BATASAN_AI)}. Semua path relatif harus dari direktori ini."
+        # Modul prompt inti selalu dimuat; modul lain dipilih sesuai relevansi input
+        self.prompt_index = get_prompt_index()
+        self.active_prompt_modules = []
 
         # Inisialisasi model generatif utama
-        self.model = genai.GenerativeModel(
-            GEMINI_MODEL_NAME,
-            tools=[self.all_tool_definitions],
-            system_instruction=system_instruction,
+        self.model = self._create_model()
+
+        # Metrik waktu (mis. time-to-first-token) untuk setiap permintaan ke model
+        self.turn_metrics = []
+
+        # Pembatas laju permintaan ke model, dikonfigurasi per model
+        self.rate_limiter = RateLimiter.for_model(GEMINI_MODEL_NAME)
+
+        # Pengelola konteks yang memadatkan payload tool lama di riwayat chat
+        self.context_manager = ContextManager(
+            summarizer=self._summarize_tool_payload if HISTORY_COMPACTION_USE_SUMMARIES else None
         )
 
         # Memuat riwayat percakapan untuk memulai sesi chat yang stateful
@@ -80,113 +125,201 @@ class Agent:
         self.chat = self.model.start_chat(history=loaded_history)
         log_system_message("Agen percakapan stateful telah dimulai.")
 
-    def _to_dict_recursive(self, obj):
-        if isinstance(obj, dict):
-            return {k: self._to_dict_recursive(v) for k, v in obj.items()}
-        elif hasattr(obj, 'items') and callable(getattr(obj, 'items')):
-            # This handles MapComposite and similar
-            return {k: self._to_dict_recursive(v) for k, v in obj.items()}
-        elif hasattr(obj, 'DESCRIPTOR') and hasattr(obj, 'ListFields'):
-            # This handles protobuf messages
-            return MessageToDict(obj)
-        elif isinstance(obj, list) or (hasattr(obj, '__iter__') and not isinstance(obj, str)):
-            # This handles lists and RepeatedComposite
-            return [self._to_dict_recursive(elem) for elem in obj]
-        else:
-            return obj
-
-    def _save_history(self):
-        history_data = []
-        for message in self.chat.history:
-            # Melewatkan pesan sistem atau pesan tanpa konten untuk menjaga kebersihan riwayat
-            if not message.parts:
-                continue
-            parts_data = []
-            for part in message.parts:
-                part_dict = {}
-                if hasattr(part, 'text') and part.text:
-                    part_dict["text"] = part.text
-                if hasattr(part, 'function_call') and part.function_call:
-                    part_dict["function_call"] = {
-                        "name": part.function_call.name,
-                        "args": self._to_dict_recursive(part.function_call.args),
-                    }
-                # Hanya menyimpan bagian yang relevan dari function_response
-                if hasattr(part, 'function_response') and part.function_response:
-                     part_dict["function_response"] = {
-                        "name": part.function_response.name,
-                        "response": self._to_dict_recursive(part.function_response.response),
-                    }
-                if part_dict:
-                    parts_data.append(part_dict)
-            if parts_data:
-                 history_data.append({"role": message.role, "parts": parts_data})
-
-        try:
-            with open(MEMORY_FILE_NAME, "w", encoding="utf-8") as f:
-                json.dump(history_data, f, indent=4)
-        except Exception as e:
-            log_error(f"Gagal menyimpan riwayat percakapan: {e}")
+    def _migrate_legacy_history(self):
+        # Riwayat format lama (satu file JSON) diimpor sekali ke journal JSONL
+        legacy_file = os.path.splitext(self.memory_file)[0] + ".json"
+        if legacy_file == self.memory_file or not os.path.exists(legacy_file):
+            return
+        with open(legacy_file, "r", encoding="utf-8") as f:
+            history_data = json.load(f)
+        self.journal.import_messages(history_data)
+        log_system_message(f"Riwayat lama dari {legacy_file} dipindahkan ke journal {self.memory_file}.")
 
     def _load_history(self):
-        if not os.path.exists(MEMORY_FILE_NAME):
-            return []
+        self.journal = HistoryJournal(self.memory_file)
+        # Jumlah pesan yang sudah tercatat di journal (seq untuk pesan berikutnya)
+        self._journal_seq = 0
+        # Pesan yang tersimpan tetapi belum sempat dikirim saat proses terhenti
+        self._pending_content = None
         try:
-            with open(MEMORY_FILE_NAME, "r", encoding="utf-8") as f:
-                history_data = json.load(f)
+            if not self.journal.exists():
+                self._migrate_legacy_history()
+            if not self.journal.exists():
+                return []
+
+            load_started = time.perf_counter()
+            # Hanya ekor journal yang muat di anggaran konteks yang diubah menjadi glm.Content
+            tail = self.journal.load_tail(HISTORY_TOKEN_BUDGET)
+            messages = tail.messages
+            control = tail.last_control
+
+            if control and control["type"] == RECORD_CHECKPOINT:
+                resume_seq = control["seq"]
+                self._pending_content = content_from_dict(messages[-1]) if messages else None
+                messages = messages[:-1]
+                self._journal_seq = resume_seq
+                if self._pending_content is None:
+                    self._journal_rollback(resume_seq - 1)
+            else:
+                self._journal_seq = control["seq"] if control else 0
 
             loaded_history = []
-            for message_data in history_data:
-                role = message_data.get("role")
-                parts_data = message_data.get("parts", [])
-                
-                if not role or not parts_data:
+            for message in messages:
+                content = content_from_dict(message)
+                if content is None:
                     continue
+                # Pin tersimpan di journal sehingga tetap berlaku setelah sesi dilanjutkan
+                if message.get("pinned"):
+                    self.context_manager.pin(len(loaded_history))
+                loaded_history.append(content)
+            if self._pending_content is not None and tail.messages[-1].get("pinned"):
+                self.context_manager.pin(len(loaded_history))
 
-                parts = []
-                for part_data in parts_data:
-                    if "text" in part_data:
-                        parts.append(glm.Part(text=part_data["text"]))
-                    elif "function_call" in part_data:
-                        fc_data = part_data["function_call"]
-                        args_struct = ParseDict(fc_data["args"], struct_pb2.Struct())
-                        parts.append(glm.Part(function_call=glm.FunctionCall(name=fc_data["name"], args=args_struct)))
-                    elif "function_response" in part_data:
-                        fr_data = part_data["function_response"]
-                        response_struct = ParseDict(fr_data["response"], struct_pb2.Struct())
-                        parts.append(glm.Part(function_response=glm.FunctionResponse(name=fr_data["name"], response=response_struct)))
-                
-                if parts:
-                    loaded_history.append(glm.Content(role=role, parts=parts))
-            
-            log_debug(f"Riwayat percakapan berhasil dimuat dari {MEMORY_FILE_NAME}")
+            # Pemeriksaan dan pemadatan journal berjalan di latar belakang
+            self.journal.compact_in_background()
+
+            load_ms = (time.perf_counter() - load_started) * 1000
+            load_message = f"Riwayat dimuat: {len(loaded_history)} pesan terbaru dalam {load_ms:.1f} ms"
+            if tail.offset:
+                load_message += f" ({tail.offset} pesan lama tetap di disk, dapat dicari dengan recall_memory)"
+            log_system_message(load_message + ".")
             return loaded_history
-            
+
         except (Exception) as e:
             log_error(f"Gagal memuat atau mem-parsing riwayat percakapan: {e}")
             # Jika file rusak, mulai dengan riwayat kosong
-            if os.path.exists(MEMORY_FILE_NAME):
+            self.journal.close()
+            self._journal_seq = 0
+            self._pending_content = None
+            self.context_manager.pinned.clear()
+            if os.path.exists(self.memory_file):
                 try:
-                    os.rename(MEMORY_FILE_NAME, f"{MEMORY_FILE_NAME}.corrupt")
-                    log_error(f"File riwayat yang rusak diganti nama menjadi {MEMORY_FILE_NAME}.corrupt")
+                    os.rename(self.memory_file, f"{self.memory_file}.corrupt")
+                    log_error(f"File riwayat yang rusak diganti nama menjadi {self.memory_file}.corrupt")
                 except OSError as ose:
                     log_error(f"Gagal mengganti nama file riwayat yang rusak: {ose}")
             return []
 
-    def _load_specific_instructions(self, filenames):
-        all_instructions = []
+    def _journal_pending(self, content, kind):
+        # Mengembalikan seq dari pesan yang akan dikirim ke model
+        if kind is None:
+            # Pesan sudah tercatat sebelumnya (melanjutkan tugas yang terputus)
+            return self._journal_seq - 1
+        seq = self._journal_seq
+        # Pesan ini akan menempati indeks len(history) di riwayat chat
+        pinned = self.context_manager.is_pinned(len(self.chat.history))
+        self.journal.append_pending(seq, content, kind, pinned=pinned)
+        self._journal_seq = seq + 1
+        return seq
+
+    def _journal_received(self):
+        self.journal.append_message(self._journal_seq, self.chat.history[-1])
+        self._journal_seq += 1
+
+    def _journal_rollback(self, seq):
+        self.journal.truncate(seq)
+        self._journal_seq = seq
+
+    def _journal_turn_end(self):
+        try:
+            self.journal.turn_end(self._journal_seq)
+        except Exception as e:
+            log_error(f"Gagal menyimpan riwayat percakapan: {e}")
+
+    def has_interrupted_task(self):
+        return self._pending_content is not None
+
+    def discard_interrupted_task(self):
+        if self._pending_content is None:
+            return
+        self._pending_content = None
+        self._journal_rollback(self._journal_seq - 1)
+
+    def _build_system_instruction(self):
         try:
-            for filename in filenames:
-                filepath = os.path.join(PROMPT_DIRECTORY, filename)
-                if os.path.exists(filepath):
-                    with open(filepath, "r", encoding="utf-8") as f:
-                        all_instructions.append(f.read())
-                else:
-                    log_error(f"File instruksi tidak ditemukan: {filename}")
-            return "\n\n".join(all_instructions) if all_instructions else "Anda adalah AI yang cerdas."
+            system_instruction = self.prompt_index.build_instruction(self.active_prompt_modules)
+            # Modul yang tidak dimuat tetap diumumkan agar model bisa memuatnya sendiri
+            other_modules = [
+                name for name in self.prompt_index.optional_modules()
+                if name not in self.active_prompt_modules
+            ]
         except Exception as e:
             log_error(f"Gagal memuat instruksi sistem: {e}")
-            return "Anda adalah AI yang cerdas."
+            system_instruction, other_modules = "", []
+
+        if not system_instruction:
+            system_instruction = "Anda adalah AI yang cerdas."
+        if other_modules:
+            module_lines = "\n".join(
+                f"- {name}: {self.prompt_index.modules[name].description or 'tanpa deskripsi'}"
+                for name in other_modules
+            )
+            system_instruction += (
+                "\n\n[MODUL PENGETAHUAN] Panduan berikut tersedia tetapi tidak dimuat. "
+                f"Gunakan load_knowledge_module jika tugas membutuhkannya:\n{module_lines}"
+            )
+        system_instruction += f"\n\n[PENTING] Direktori kerja absolut Anda saat ini adalah: {os.path.abspath(DIREKTORI_BATASAN_AI)}. Semua path relatif harus dari direktori ini."
+        return system_instruction
+
+    def _create_model(self):
+        return genai.GenerativeModel(
+            GEMINI_MODEL_NAME,
+            tools=[self.all_tool_definitions],
+            system_instruction=self._build_system_instruction(),
+        )
+
+    def _select_prompt_modules(self, user_input):
+        try:
+            selected = self.prompt_index.select(user_input)
+        except Exception as e:
+            log_error(f"Gagal memilih modul prompt: {e}")
+            return
+        # Skor dihitung ulang setiap giliran; modul yang tidak lagi cocok dilepas
+        if selected == self.active_prompt_modules:
+            return
+
+        previous = self.active_prompt_modules
+        self.active_prompt_modules = selected
+        try:
+            # Instruksi sistem melekat pada model, jadi model dibuat ulang dengan riwayat yang sama
+            model = self._create_model()
+            chat = model.start_chat(history=self.chat.history)
+        except Exception as e:
+            self.active_prompt_modules = previous
+            log_error(f"Gagal memuat ulang modul prompt: {e}")
+            return
+        self.model, self.chat = model, chat
+        log_debug(f"Modul prompt aktif: {', '.join(selected) or '-'}")
+
+    def _summarize_tool_payload(self, function_name, payload_text):
+        if not hasattr(self, "summary_model"):
+            self.summary_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        prompt = (
+            f"Ringkas output tool '{function_name}' berikut dalam maksimal 5 kalimat. "
+            f"Pertahankan path file, angka penting, dan pesan error.\n\n{payload_text[:20000]}"
+        )
+        response = self.rate_limiter.call(self.summary_model.generate_content, prompt)
+        return response.text.strip()
+
+    def _make_function_response(self, function_name, payload):
+        # Mengemas output ke dalam format yang diharapkan oleh model
+        return glm.Part(
+            function_response=glm.FunctionResponse(
+                name=function_name, response=ParseDict(payload, struct_pb2.Struct())
+            )
+        )
+
+    def _tracks_workspace_changes(self, function_name, function_args):
+        # Hanya tool eksklusif (efeknya tidak diketahui dari argumen) yang dipantau;
+        # tool ini berjalan sendirian sehingga diff tidak tercampur tool lain.
+        if self.change_feed is None:
+            return False
+        return EXCLUSIVE in get_call_resources(function_name, function_args)[1]
+
+    def _with_workspace_changes(self, payload, changes):
+        if changes is not None:
+            payload["workspace_changes"] = changes
+        return payload
 
     def _execute_tool_call(self, tool_call):
         function_name = tool_call.name
@@ -194,60 +327,151 @@ class Agent:
         log_tool_call(function_name, function_args)
 
         try:
-            # Memanggil fungsi tool yang sesuai
-            function_output = self.available_functions[function_name](**function_args)
+            tracks_changes = self._tracks_workspace_changes(function_name, function_args)
+            feed_token = self.change_feed.begin() if tracks_changes else None
+            # Memanggil fungsi tool yang sesuai, lewat cache untuk tool idempoten
+            function_output = self.tool_cache.call(
+                function_name, function_args, self.available_functions[function_name]
+            )
+            changes = self.change_feed.end(feed_token) if tracks_changes else None
             log_tool_output(function_name, function_output)
-            
-            # Mengemas output ke dalam format yang diharapkan oleh model
-            return glm.Part(
-                function_response=glm.FunctionResponse(
-                    name=function_name, response=ParseDict({"result": function_output}, struct_pb2.Struct())
-                )
+            return self._make_function_response(
+                function_name, self._with_workspace_changes({"result": function_output}, changes)
             )
         except Exception as e:
             error_message = f"Gagal mengeksekusi fungsi {function_name}: {e}"
             log_error(error_message)
-            return glm.Part(
-                function_response=glm.FunctionResponse(
-                    name=function_name, response=ParseDict({"error": error_message}, struct_pb2.Struct())
-                )
+            return self._make_function_response(function_name, {"error": error_message})
+
+    def _get_tool_calls(self, response):
+        if not response.candidates or not response.candidates[0].content.parts:
+            return []
+        return [part.function_call for part in response.candidates[0].content.parts if part.function_call]
+
+    def _record_turn_metrics(self, request_started, first_token_seconds):
+        self.turn_metrics.append(
+            {
+                "time_to_first_token": round(first_token_seconds, 3),
+                "total_seconds": round(time.perf_counter() - request_started, 3),
+            }
+        )
+
+    def _finish_interaction(self, response, streamed_text):
+        # Mengambil dan menampilkan respons teks akhir dari AI
+        final_text_response = " ".join([part.text for part in response.candidates[0].content.parts if part.text]).strip()
+        if final_text_response:
+            if not streamed_text:
+                log_agent_response(final_text_response)
+        else:
+            log_system_message("Tugas selesai tanpa output teks.")
+
+        for index, metrics in enumerate(self.turn_metrics, start=1):
+            log_debug(
+                f"Permintaan model #{index}: time-to-first-token {metrics['time_to_first_token']} detik, total {metrics['total_seconds']} detik."
             )
 
-    def interact(self, user_input):
+        cache_stats = self.tool_cache.stats()
+        log_debug(
+            f"Cache tool: {cache_stats['hits']} hit, {cache_stats['misses']} miss, "
+            f"{cache_stats['invalidations']} invalidasi, {cache_stats['entries']} entri."
+        )
+
+        # Menandai interaksi selesai di journal riwayat
+        self._journal_turn_end()
+
+    def _check_finish_reason(self, response):
+        # Dengan stream=True SDK tidak memeriksa finish_reason; respons SAFETY,
+        # RECITATION, atau MALFORMED_FUNCTION_CALL baru gagal saat chat.history
+        # dibaca, di luar penanganan error, dan riwayat chat macet sesudahnya.
+        candidates = response.candidates
+        if candidates and candidates[0].finish_reason not in ACCEPTED_FINISH_REASONS:
+            raise StopCandidateException(candidates[0])
+
+    def _render_stream(self, response):
+        # Menampilkan potongan teks saat tiba; function_call dirakit oleh SDK
+        # ke dalam response.candidates setelah iterasi selesai.
+        streamed_text = False
         try:
-            # Mengirim pesan pengguna ke sesi chat yang stateful
-            response = self.chat.send_message(user_input)
-
-            while True:
-                # Memeriksa apakah model meminta pemanggilan tool
-                if response.candidates and response.candidates[0].content.parts and response.candidates[0].content.parts[0].function_call:
-                    tool_calls = [part.function_call for part in response.candidates[0].content.parts]
-                    
-                    if SHOW_AGENT_THOUGHTS:
-                        log_agent_thought("Memutuskan untuk menggunakan tool...")
-
-                    tool_responses = []
-                    for call in tool_calls:
-                        # Mengeksekusi setiap tool call
-                        response_part = self._execute_tool_call(call)
-                        tool_responses.append(response_part)
-                        time.sleep(TOOL_CALL_PAUSE_SECONDS)
-                    
-                    # Mengirim hasil eksekusi tool kembali ke model
-                    response = self.chat.send_message(tool_responses)
-                else:
-                    # Jika tidak ada lagi tool call, loop selesai
-                    break
-            
-            # Mengambil dan menampilkan respons teks akhir dari AI
-            final_text_response = " ".join([part.text for part in response.candidates[0].content.parts if part.text]).strip()
-            if final_text_response:
-                log_agent_response(final_text_response)
-            else:
-                log_system_message("Tugas selesai tanpa output teks.")
+            for chunk in response:
+                if not chunk.candidates:
+                    continue
+                for part in chunk.candidates[0].content.parts:
+                    if part.text:
+                        log_agent_response_chunk(part.text, is_first=not streamed_text)
+                        streamed_text = True
+            self._check_finish_reason(response)
+        except Exception:
+            # Membuang pasangan pesan yang rusak agar riwayat chat tetap konsisten
+            self.chat.rewind()
+            raise
+        finally:
+            if streamed_text:
+                log_agent_response_end()
+        return streamed_text
+
+    def _send_message(self, content, journal_kind):
+        self.context_manager.compact(self.chat.history)
+        pending_seq = self._journal_pending(content, journal_kind)
+
+        # Hanya permintaan ke model yang dibatasi lajunya, bukan eksekusi tool
+        request_started = []
 
-            # Menyimpan riwayat setelah setiap interaksi yang berhasil
-            self._save_history()
+        def send():
+            request_started.append(time.perf_counter())
+            return self.chat.send_message(content, stream=STREAM_RESPONSES)
+
+        try:
+            response = self.rate_limiter.call(send)
+            # Dengan stream=True, send_message kembali segera setelah potongan pertama tiba
+            first_token_seconds = time.perf_counter() - request_started[-1]
+            streamed_text = self._render_stream(response) if STREAM_RESPONSES else False
+        except Exception:
+            # Pesan yang gagal dikirim tidak masuk riwayat chat, jadi dibatalkan di journal
+            self._journal_rollback(pending_seq)
+            self.context_manager.unpin(len(self.chat.history))
+            raise
+
+        self._journal_received()
+        self._record_turn_metrics(request_started[-1], first_token_seconds)
+        return response, streamed_text
+
+    def _run_interaction(self, content, journal_kind):
+        self.turn_metrics = []
+        try:
+            response, streamed_text = self._send_message(content, journal_kind)
+
+            # Selama model meminta pemanggilan tool, jalankan lalu kirim hasilnya kembali
+            tool_calls = self._get_tool_calls(response)
+            while tool_calls:
+                if SHOW_AGENT_THOUGHTS:
+                    log_agent_thought("Memutuskan untuk menggunakan tool...")
+
+                # Mengeksekusi tool call secara konkuren; hasil tetap berurutan
+                tool_responses = self.tool_dispatcher.dispatch(tool_calls)
+
+                response, streamed_text = self._send_message(
+                    glm.Content(role="user", parts=tool_responses), "tool_step"
+                )
+                tool_calls = self._get_tool_calls(response)
+
+            self._finish_interaction(response, streamed_text)
 
         except Exception as e:
             log_error(f"Terjadi kesalahan besar saat interaksi: {e}")
+
+    def resume_interrupted_task(self):
+        content = self._pending_content
+        if content is None:
+            return
+        self._pending_content = None
+        log_system_message("Melanjutkan tugas yang terputus dari langkah terakhir yang tersimpan...")
+        self._run_interaction(content, None)
+
+    def interact(self, user_input, pin=False):
+        # Input baru menggantikan tugas terputus yang tidak dilanjutkan
+        self.discard_interrupted_task()
+        self._select_prompt_modules(user_input)
+        if pin:
+            # Giliran yang dipin (pesan dan payload tool-nya) tidak pernah dipadatkan
+            self.context_manager.pin(len(self.chat.history))
+        self._run_interaction(glm.Content(role="user", parts=[glm.Part(text=user_input)]), "input")
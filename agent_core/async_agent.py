@@ -0,0 +1,186 @@
+import asyncio
+import itertools
+import time
+
+import google.ai.generativelanguage as glm
+
+from config import STREAM_RESPONSES, SHOW_AGENT_THOUGHTS, MAX_PARALLEL_TOOL_CALLS
+from logging_handler import (
+    log_agent_thought,
+    log_agent_response_chunk,
+    log_agent_response_end,
+    log_tool_call,
+    log_tool_output,
+    log_error,
+    log_system_message,
+)
+from agent_core.agent import Agent
+from agent_core.tool_dispatcher import get_call_resources, calls_conflict
+from tools.async_tools import async_functions
+
+
+class AsyncAgent(Agent):
+    """Varian Agent berbasis asyncio: permintaan model memakai send_message_async,
+    tool I/O memakai adaptor asinkron, dan setiap tool call dapat dibatalkan."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tool_semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOL_CALLS)
+        self._call_ids = itertools.count(1)
+        # Tool call yang sedang berjalan: {call_id: asyncio.Task}
+        self.pending_tool_calls = {}
+
+    def cancel_all_tool_calls(self):
+        """Membatalkan semua tool call yang sedang berjalan; mengembalikan jumlahnya."""
+        return sum(task.cancel() for task in list(self.pending_tool_calls.values()))
+
+    async def _execute_tool_call_async(self, tool_call):
+        function_name = tool_call.name
+        function_args = {k: v for k, v in tool_call.args.items()}
+        log_tool_call(function_name, function_args)
+
+        try:
+            if function_name in async_functions:
+                func = async_functions[function_name]
+            else:
+                # Tool sinkron dijalankan di thread; pembatalan hanya melepas
+                # penantiannya, tool itu sendiri tetap selesai di latar belakang.
+                sync_func = self.available_functions[function_name]
+
+                def func(**kwargs):
+                    return asyncio.to_thread(sync_func, **kwargs)
+
+            tracks_changes = self._tracks_workspace_changes(function_name, function_args)
+            feed_token = await asyncio.to_thread(self.change_feed.begin) if tracks_changes else None
+            function_output = await self.tool_cache.call_async(function_name, function_args, func)
+            changes = await asyncio.to_thread(self.change_feed.end, feed_token) if tracks_changes else None
+            log_tool_output(function_name, function_output)
+            return self._make_function_response(
+                function_name, self._with_workspace_changes({"result": function_output}, changes)
+            )
+        except Exception as e:
+            error_message = f"Gagal mengeksekusi fungsi {function_name}: {e}"
+            log_error(error_message)
+            return self._make_function_response(function_name, {"error": error_message})
+
+    async def _run_tool_call(self, dependencies, tool_call):
+        try:
+            if dependencies:
+                await asyncio.wait(dependencies)
+            async with self._tool_semaphore:
+                return await self._execute_tool_call_async(tool_call)
+        except asyncio.CancelledError:
+            error_message = f"Eksekusi fungsi {tool_call.name} dibatalkan."
+            log_error(error_message)
+            return self._make_function_response(tool_call.name, {"error": error_message})
+
+    async def _dispatch_tool_calls(self, tool_calls):
+        resources = [
+            get_call_resources(call.name, {k: v for k, v in call.args.items()})
+            for call in tool_calls
+        ]
+
+        tasks, call_ids = [], []
+        for index, call in enumerate(tool_calls):
+            dependencies = [
+                tasks[earlier]
+                for earlier in range(index)
+                if calls_conflict(resources[earlier], resources[index])
+            ]
+            call_id = next(self._call_ids)
+            task = asyncio.create_task(
+                self._run_tool_call(dependencies, call), name=call.name
+            )
+            self.pending_tool_calls[call_id] = task
+            tasks.append(task)
+            call_ids.append(call_id)
+
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for call_id in call_ids:
+                self.pending_tool_calls.pop(call_id, None)
+
+    async def _render_stream_async(self, response):
+        streamed_text = False
+        try:
+            async for chunk in response:
+                if not chunk.candidates:
+                    continue
+                for part in chunk.candidates[0].content.parts:
+                    if part.text:
+                        log_agent_response_chunk(part.text, is_first=not streamed_text)
+                        streamed_text = True
+            self._check_finish_reason(response)
+        except Exception:
+            self.chat.rewind()
+            raise
+        finally:
+            if streamed_text:
+                log_agent_response_end()
+        return streamed_text
+
+    async def _send_message_async(self, content, journal_kind):
+        # Pemadatan bisa memanggil model untuk meringkas, jadi dijalankan di thread
+        await asyncio.to_thread(self.context_manager.compact, self.chat.history)
+        pending_seq = await asyncio.to_thread(self._journal_pending, content, journal_kind)
+
+        request_started = []
+
+        async def send():
+            request_started.append(time.perf_counter())
+            return await self.chat.send_message_async(content, stream=STREAM_RESPONSES)
+
+        try:
+            response = await self.rate_limiter.call_async(send)
+            first_token_seconds = time.perf_counter() - request_started[-1]
+            streamed_text = await self._render_stream_async(response) if STREAM_RESPONSES else False
+        except BaseException:
+            # Termasuk pembatalan: pesan yang tidak sampai ke riwayat chat dibatalkan di journal
+            self._journal_rollback(pending_seq)
+            self.context_manager.unpin(len(self.chat.history))
+            raise
+
+        await asyncio.to_thread(self._journal_received)
+        self._record_turn_metrics(request_started[-1], first_token_seconds)
+        return response, streamed_text
+
+    async def _run_interaction_async(self, content, journal_kind):
+        self.turn_metrics = []
+        try:
+            response, streamed_text = await self._send_message_async(content, journal_kind)
+
+            tool_calls = self._get_tool_calls(response)
+            while tool_calls:
+                if SHOW_AGENT_THOUGHTS:
+                    log_agent_thought("Memutuskan untuk menggunakan tool...")
+
+                tool_responses = await self._dispatch_tool_calls(tool_calls)
+
+                response, streamed_text = await self._send_message_async(
+                    glm.Content(role="user", parts=tool_responses), "tool_step"
+                )
+                tool_calls = self._get_tool_calls(response)
+
+            # Pencatatan akhir riwayat berupa I/O disk, jadi tidak dijalankan di event loop
+            await asyncio.to_thread(self._finish_interaction, response, streamed_text)
+
+        except Exception as e:
+            log_error(f"Terjadi kesalahan besar saat interaksi: {e}")
+
+    async def resume_interrupted_task(self):
+        content = self._pending_content
+        if content is None:
+            return
+        self._pending_content = None
+        log_system_message("Melanjutkan tugas yang terputus dari langkah terakhir yang tersimpan...")
+        await self._run_interaction_async(content, None)
+
+    async def interact(self, user_input, pin=False):
+        self.discard_interrupted_task()
+        self._select_prompt_modules(user_input)
+        if pin:
+            self.context_manager.pin(len(self.chat.history))
+        await self._run_interaction_async(
+            glm.Content(role="user", parts=[glm.Part(text=user_input)]), "input"
+        )
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+
+from config import (
+    DIREKTORI_BATASAN_AI,
+    TREE_DEFAULT_EXCLUDED_DIRS,
+    CHANGE_FEED_MAX_PATHS,
+    CHANGE_FEED_MAX_FILES,
+)
+from logging_handler import log_debug
+
+# Jeda singkat agar event inotify terakhir sempat dibaca oleh watcher
+CHANGE_FEED_SETTLE_SECONDS = 0.05
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    # watchdog opsional; tanpa itu perubahan dideteksi lewat diff snapshot scandir
+    FileSystemEventHandler = object
+    Observer = None
+
+
+def _relative_path(root, path):
+    """Path relatif terhadap root, atau None untuk path di dalam direktori
+    dependensi/build/internal (mis. node_modules, .han_logs) yang tidak dilaporkan."""
+    relative = os.path.relpath(path, root).replace(os.sep, "/")
+    # Hanya komponen direktori yang diperiksa; file bernama mis. "build" tetap dilaporkan
+    if any(part in TREE_DEFAULT_EXCLUDED_DIRS for part in relative.split("/")[:-1]):
+        return None
+    return relative
+
+
+def take_snapshot(root, max_files=CHANGE_FEED_MAX_FILES):
+    """Memetakan path relatif ke (mtime_ns, size). Direktori dependensi/build
+    tidak ditelusuri dan tidak dicatat."""
+    snapshot = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = list(iterator)
+        except OSError:
+            continue
+        for entry in entries:
+            if len(snapshot) >= max_files:
+                return snapshot, False
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in TREE_DEFAULT_EXCLUDED_DIRS:
+                        stack.append(entry.path)
+                else:
+                    stat = entry.stat(follow_symlinks=False)
+                    snapshot[os.path.relpath(entry.path, root).replace(os.sep, "/")] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+    return snapshot, True
+
+
+def _summarize(created, modified, deleted, complete=True):
+    summary = {}
+    for name, paths in (("created", created), ("modified", modified), ("deleted", deleted)):
+        paths = sorted(paths)
+        if paths:
+            summary[name] = paths[:CHANGE_FEED_MAX_PATHS]
+            if len(paths) > CHANGE_FEED_MAX_PATHS:
+                summary[f"{name}_total"] = len(paths)
+    if not complete:
+        summary["incomplete"] = True
+    return summary
+
+
+class _EventCollector(FileSystemEventHandler):
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        self.lock = threading.Lock()
+        self.touched = set()
+        self.created = set()
+
+    def _record(self, path, is_directory, created=False):
+        relative = _relative_path(self.root, path)
+        # Seperti snapshot, direktori tidak dilaporkan; hanya file di dalamnya
+        if relative is None or relative.startswith("..") or is_directory:
+            return
+        with self.lock:
+            self.touched.add(relative)
+            if created:
+                self.created.add(relative)
+
+    def on_created(self, event):
+        self._record(event.src_path, event.is_directory, created=True)
+
+    def on_modified(self, event):
+        # Perubahan isi direktori sudah tercermin pada event file di dalamnya
+        if not event.is_directory:
+            self._record(event.src_path, False)
+
+    def on_deleted(self, event):
+        self._record(event.src_path, event.is_directory)
+
+    def on_moved(self, event):
+        self._record(event.src_path, event.is_directory)
+        self._record(event.dest_path, event.is_directory, created=True)
+
+    def drain(self):
+        with self.lock:
+            touched, created = self.touched, self.created
+            self.touched, self.created = set(), set()
+        return touched, created
+
+
+class WorkspaceChangeFeed:
+    """Mendeteksi file yang dibuat, diubah, dan dihapus selama satu tool call.
+    Memakai watchdog (inotify/FSEvents) bila terpasang, selain itu diff snapshot."""
+
+    def __init__(self, root=DIREKTORI_BATASAN_AI):
+        self.root = os.path.abspath(root)
+        self._observer = None
+        self._collector = None
+        if Observer is not None and os.path.isdir(self.root):
+            try:
+                self._collector = _EventCollector(self.root)
+                self._observer = Observer()
+                self._observer.schedule(self._collector, self.root, recursive=True)
+                self._observer.daemon = True
+                self._observer.start()
+            except Exception as e:
+                log_debug(f"Watcher workspace tidak tersedia, memakai snapshot scandir: {e}")
+                self._observer, self._collector = None, None
+
+    @property
+    def uses_watcher(self):
+        return self._observer is not None
+
+    def begin(self):
+        """Dipanggil sebelum tool berjalan; mengembalikan token untuk end()."""
+        if self._collector is not None:
+            self._collector.drain()
+            return None
+        return take_snapshot(self.root)
+
+    def end(self, token):
+        if self._collector is not None:
+            return self._summarize_events()
+        before, before_complete = token
+        after, after_complete = take_snapshot(self.root)
+        created = [path for path in after if path not in before]
+        deleted = [path for path in before if path not in after]
+        modified = [path for path in after if path in before and after[path] != before[path]]
+        return _summarize(created, modified, deleted, before_complete and after_complete)
+
+    def _summarize_events(self):
+        # Event dari observer datang secara asinkron; beri waktu event terakhir
+        # dibaca emitter lalu tunggu sampai antreannya selesai diproses.
+        time.sleep(CHANGE_FEED_SETTLE_SECONDS)
+        self._observer.event_queue.join()
+        touched, created_during = self._collector.drain()
+        created, modified, deleted = [], [], []
+        for path in touched:
+            exists = os.path.lexists(os.path.join(self.root, path))
+            if not exists:
+                if path not in created_during:
+                    deleted.append(path)
+            elif path in created_during:
+                created.append(path)
+            else:
+                modified.append(path)
+        return _summarize(created, modified, deleted)
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
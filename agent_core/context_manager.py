@@ -0,0 +1,191 @@
+import json
+
+import google.ai.generativelanguage as glm
+from google.protobuf import struct_pb2
+from google.protobuf.json_format import ParseDict
+
+from config import (
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_KEEP_LAST_STEPS,
+    HISTORY_COMPACTION_MIN_CHARS,
+)
+from logging_handler import log_debug, log_error
+
+# Perkiraan kasar jumlah karakter per token untuk teks campuran kode/prosa
+CHARS_PER_TOKEN = 4
+# Setelah anggaran terlampaui, riwayat dipadatkan hingga rasio ini agar
+# pemadatan tidak terpicu lagi pada setiap giliran berikutnya.
+COMPACTION_TARGET_RATIO = 0.75
+COMPACTED_MARKER = "[Dipadatkan]"
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _is_turn_start(content):
+    # Giliran baru dimulai oleh pesan teks pengguna, bukan oleh function_response
+    return content.role == "user" and any(part.text for part in content.parts)
+
+
+class ContextManager:
+    """Menghitung token tiap entri riwayat chat dan mengganti payload tool lama
+    dengan stub (atau ringkasan dari model) ketika anggaran terlampaui."""
+
+    def __init__(
+        self,
+        token_budget=HISTORY_TOKEN_BUDGET,
+        keep_last_steps=HISTORY_KEEP_LAST_STEPS,
+        summarizer=None,
+    ):
+        self.token_budget = token_budget
+        self.keep_last_steps = keep_last_steps
+        self.summarizer = summarizer
+        self.pinned = set()
+        # {id(content): (content, tokens)}; objek disimpan agar id tidak didaur ulang
+        self._token_cache = {}
+
+    def pin(self, index):
+        self.pinned.add(index)
+
+    def unpin(self, index):
+        self.pinned.discard(index)
+
+    def is_pinned(self, index):
+        return index in self.pinned
+
+    def _pinned_indexes(self, history):
+        # Pin berlaku untuk seluruh giliran: pesan pengguna beserta semua
+        # pemanggilan tool dan hasilnya hingga giliran berikutnya dimulai
+        protected = set()
+        for start in self.pinned:
+            index = start
+            while index < len(history) and (index == start or not _is_turn_start(history[index])):
+                protected.add(index)
+                index += 1
+        return protected
+
+    def count_tokens(self, content):
+        cached = self._token_cache.get(id(content))
+        if cached is not None and cached[0] is content:
+            return cached[1]
+        tokens = estimate_tokens(json.dumps(type(content).to_dict(content), ensure_ascii=False))
+        self._token_cache[id(content)] = (content, tokens)
+        return tokens
+
+    def total_tokens(self, history):
+        return sum(self.count_tokens(content) for content in history)
+
+    def _prune_token_cache(self, history):
+        # Konten yang sudah tidak ada di riwayat (di-rewind, dipadatkan, atau riwayat
+        # dibangun ulang) dilepas agar cache tidak tumbuh tanpa batas
+        live = {id(content) for content in history}
+        self._token_cache = {
+            key: cached for key, cached in self._token_cache.items() if key in live
+        }
+
+    def _protected_start(self, history):
+        # Yang dilindungi adalah N langkah model terakhir (jawaban atau pemanggilan
+        # tool beserta hasilnya), bukan N giliran pengguna, sehingga loop tool
+        # panjang di dalam satu giliran tetap bisa dipadatkan.
+        steps_seen = 0
+        for index in range(len(history) - 1, -1, -1):
+            if history[index].role == "model":
+                steps_seen += 1
+                if steps_seen >= self.keep_last_steps:
+                    return index
+        return 0
+
+    def _stub_for(self, function_name, payload_text):
+        if self.summarizer is not None:
+            try:
+                summary = self.summarizer(function_name, payload_text)
+                if summary:
+                    return f"{COMPACTED_MARKER} Ringkasan output {function_name}: {summary}"
+            except Exception as e:
+                log_error(f"Gagal meringkas output {function_name}: {e}")
+        return (
+            f"{COMPACTED_MARKER} Output {function_name} sebanyak {len(payload_text)} karakter "
+            "dihapus dari riwayat. Panggil ulang tool jika isinya diperlukan lagi."
+        )
+
+    def _compact_response(self, function_response):
+        payload = glm.FunctionResponse.to_dict(function_response).get("response", {})
+        payload_text = json.dumps(payload, ensure_ascii=False)
+        if len(payload_text) < HISTORY_COMPACTION_MIN_CHARS:
+            return None
+
+        success = "error" not in payload
+        if isinstance(payload.get("result"), str):
+            try:
+                success = bool(json.loads(payload["result"]).get("success", success))
+            except (ValueError, AttributeError):
+                pass
+
+        stub = json.dumps(
+            {"success": success, "data": self._stub_for(function_response.name, payload_text)}
+        )
+        return glm.Part(
+            function_response=glm.FunctionResponse(
+                name=function_response.name,
+                response=ParseDict({"result": stub}, struct_pb2.Struct()),
+            )
+        )
+
+    def _compact_call(self, function_call):
+        args = glm.FunctionCall.to_dict(function_call).get("args", {})
+        changed = False
+        for key, value in args.items():
+            if isinstance(value, str) and len(value) >= HISTORY_COMPACTION_MIN_CHARS:
+                args[key] = f"{COMPACTED_MARKER} argumen {key} sebanyak {len(value)} karakter."
+                changed = True
+        if not changed:
+            return None
+        return glm.Part(
+            function_call=glm.FunctionCall(
+                name=function_call.name, args=ParseDict(args, struct_pb2.Struct())
+            )
+        )
+
+    def _compact_content(self, content):
+        new_parts, changed = [], False
+        for part in content.parts:
+            replacement = None
+            if part.function_response:
+                replacement = self._compact_response(part.function_response)
+            elif part.function_call:
+                replacement = self._compact_call(part.function_call)
+            new_parts.append(replacement if replacement is not None else part)
+            changed = changed or replacement is not None
+        if not changed:
+            return None
+        return glm.Content(role=content.role, parts=new_parts)
+
+    def compact(self, history):
+        """Memadatkan `history` secara in-place; mengembalikan jumlah token yang dihemat."""
+        self._prune_token_cache(history)
+        total = self.total_tokens(history)
+        if total <= self.token_budget:
+            return 0
+
+        target = self.token_budget * COMPACTION_TARGET_RATIO
+        protected_start = self._protected_start(history)
+        pinned = self._pinned_indexes(history)
+        saved = 0
+        for index in range(protected_start):
+            if total <= target:
+                break
+            if index in pinned:
+                continue
+            compacted = self._compact_content(history[index])
+            if compacted is None:
+                continue
+            before = self.count_tokens(history[index])
+            self._token_cache.pop(id(history[index]), None)
+            history[index] = compacted
+            after = self.count_tokens(compacted)
+            total -= before - after
+            saved += before - after
+
+        log_debug(f"Riwayat dipadatkan: {saved} token dihemat, sisa sekitar {total} token.")
+        return saved
@@ -0,0 +1,356 @@
+import json
+import mmap
+import os
+import threading
+
+import google.ai.generativelanguage as glm
+from google.protobuf import struct_pb2
+from google.protobuf.json_format import MessageToDict, ParseDict
+
+from logging_handler import log_error, log_debug
+from agent_core.context_manager import CHARS_PER_TOKEN
+
+# Jenis record di dalam journal JSONL:
+#   message    - satu pesan riwayat chat dengan nomor urut global "seq";
+#                "pinned" menandai giliran yang dipin pengguna
+#   checkpoint - pesan ber-seq < "seq" sudah tersimpan dan pesan terakhirnya
+#                (input pengguna atau hasil tool) siap dikirim ke model
+#   turn_end   - interaksi selesai dengan riwayat sepanjang "seq" pesan
+#   truncate   - pesan ber-seq >= "seq" dibatalkan (mis. permintaan gagal)
+RECORD_MESSAGE = "message"
+RECORD_CHECKPOINT = "checkpoint"
+RECORD_TURN_END = "turn_end"
+RECORD_TRUNCATE = "truncate"
+
+# Journal dipadatkan ulang jika jumlah record jauh melebihi pesan yang hidup
+COMPACTION_MIN_RECORDS = 200
+COMPACTION_RECORD_RATIO = 2
+# Ukuran blok saat mencari akhir record lengkap terakhir dari belakang file
+TAIL_SCAN_BYTES = 65536
+
+
+def _to_dict_recursive(obj):
+    if isinstance(obj, dict):
+        return {k: _to_dict_recursive(v) for k, v in obj.items()}
+    elif hasattr(obj, 'items') and callable(getattr(obj, 'items')):
+        # This handles MapComposite and similar
+        return {k: _to_dict_recursive(v) for k, v in obj.items()}
+    elif hasattr(obj, 'DESCRIPTOR') and hasattr(obj, 'ListFields'):
+        # This handles protobuf messages
+        return MessageToDict(obj)
+    elif isinstance(obj, list) or (hasattr(obj, '__iter__') and not isinstance(obj, str)):
+        # This handles lists and RepeatedComposite
+        return [_to_dict_recursive(elem) for elem in obj]
+    else:
+        return obj
+
+
+def content_to_dict(message):
+    parts_data = []
+    for part in message.parts:
+        part_dict = {}
+        if hasattr(part, 'text') and part.text:
+            part_dict["text"] = part.text
+        if hasattr(part, 'function_call') and part.function_call:
+            part_dict["function_call"] = {
+                "name": part.function_call.name,
+                "args": _to_dict_recursive(part.function_call.args),
+            }
+        # Hanya menyimpan bagian yang relevan dari function_response
+        if hasattr(part, 'function_response') and part.function_response:
+            part_dict["function_response"] = {
+                "name": part.function_response.name,
+                "response": _to_dict_recursive(part.function_response.response),
+            }
+        if part_dict:
+            parts_data.append(part_dict)
+    if not parts_data:
+        return None
+    return {"role": message.role, "parts": parts_data}
+
+
+def content_from_dict(message_data):
+    role = message_data.get("role")
+    parts_data = message_data.get("parts", [])
+    if not role or not parts_data:
+        return None
+
+    parts = []
+    for part_data in parts_data:
+        if "text" in part_data:
+            parts.append(glm.Part(text=part_data["text"]))
+        elif "function_call" in part_data:
+            fc_data = part_data["function_call"]
+            args_struct = ParseDict(fc_data["args"], struct_pb2.Struct())
+            parts.append(glm.Part(function_call=glm.FunctionCall(name=fc_data["name"], args=args_struct)))
+        elif "function_response" in part_data:
+            fr_data = part_data["function_response"]
+            response_struct = ParseDict(fr_data["response"], struct_pb2.Struct())
+            parts.append(glm.Part(function_response=glm.FunctionResponse(name=fr_data["name"], response=response_struct)))
+
+    if not parts:
+        return None
+    return glm.Content(role=role, parts=parts)
+
+
+class JournalState:
+    def __init__(self):
+        self.messages = []
+        self.record_count = 0
+        # Record kontrol terakhir (checkpoint/turn_end) menentukan titik lanjut
+        self.last_control = None
+
+
+class JournalTail:
+    def __init__(self):
+        # Pesan terbaru (urut dari yang terlama) yang dimuat ke riwayat aktif
+        self.messages = []
+        # seq pesan pertama yang dimuat; pesan dengan seq lebih kecil tetap di disk
+        self.offset = 0
+        self.last_control = None
+
+
+def _is_turn_start_record(record):
+    return record.get("role") == "user" and any("text" in part for part in record.get("parts", []))
+
+
+class HistoryJournal:
+    """Journal JSONL append-only untuk riwayat chat: setiap pesan ditulis
+    sekali, fsync dilakukan per langkah tool, dan pemadatan berjalan di latar."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        # Baris yang ditulis selama pemadatan latar belakang sedang berjalan
+        self._captured_lines = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _truncate_partial_record(self):
+        # Proses yang mati saat menulis meninggalkan baris tanpa '\n'; record baru
+        # yang ditambahkan langsung akan tersambung ke baris itu dan ikut rusak.
+        try:
+            f = open(self.path, "rb+")
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+            keep, position = 0, end
+            while position > 0:
+                start = max(0, position - TAIL_SCAN_BYTES)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    keep = start + newline + 1
+                    break
+                position = start
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+        log_debug(f"Record terakhir yang terpotong di {self.path} dibuang ({end - keep} byte).")
+
+    def _write_lines(self, lines, sync):
+        with self._lock:
+            if self._file is None:
+                self._truncate_partial_record()
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.writelines(lines)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+            if self._captured_lines is not None:
+                self._captured_lines.extend(lines)
+
+    def _append(self, records, sync=False):
+        lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in records]
+        self._write_lines(lines, sync)
+
+    def append_message(self, seq, content, sync=False):
+        message = content_to_dict(content) or {"role": content.role, "parts": []}
+        self._append([{"type": RECORD_MESSAGE, "seq": seq, **message}], sync=sync)
+
+    def append_pending(self, seq, content, kind, pinned=False):
+        # Pesan yang akan dikirim dan checkpoint-nya ditulis bersama lalu di-fsync,
+        # sehingga setelah crash agen bisa melanjutkan dari titik ini.
+        message = content_to_dict(content) or {"role": content.role, "parts": []}
+        if pinned:
+            message["pinned"] = True
+        self._append(
+            [
+                {"type": RECORD_MESSAGE, "seq": seq, **message},
+                {"type": RECORD_CHECKPOINT, "seq": seq + 1, "kind": kind},
+            ],
+            sync=True,
+        )
+
+    def turn_end(self, seq):
+        self._append([{"type": RECORD_TURN_END, "seq": seq}], sync=True)
+
+    def truncate(self, seq):
+        self._append([{"type": RECORD_TRUNCATE, "seq": seq}], sync=True)
+
+    def _parse_line(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # Baris terakhir bisa terpotong jika proses mati saat menulis
+            log_debug(f"Melewatkan record journal yang rusak di {self.path}")
+            return None
+
+    def iter_records(self, limit_bytes=None):
+        consumed = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                consumed += len(line)
+                if limit_bytes is not None and consumed > limit_bytes:
+                    break
+                record = self._parse_line(line)
+                if record is not None:
+                    yield record
+
+    def iter_records_reversed(self):
+        # Membaca journal dari belakang lewat mmap tanpa mem-parsing bagian awal file
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = len(mm)
+                while end > 0:
+                    start = mm.rfind(b"\n", 0, end - 1) + 1
+                    line = mm[start:end]
+                    end = start
+                    record = self._parse_line(line)
+                    if record is not None:
+                        yield record, len(line)
+
+    def replay(self, limit_bytes=None):
+        state = JournalState()
+        for record in self.iter_records(limit_bytes):
+            state.record_count += 1
+            record_type = record.get("type")
+            seq = record.get("seq", 0)
+            if record_type == RECORD_MESSAGE:
+                del state.messages[seq:]
+                state.messages.append(record)
+            elif record_type == RECORD_TRUNCATE:
+                del state.messages[seq:]
+                if state.last_control and state.last_control["seq"] > seq:
+                    state.last_control = {"type": RECORD_TURN_END, "seq": seq}
+            elif record_type in (RECORD_CHECKPOINT, RECORD_TURN_END):
+                state.last_control = record
+        return state
+
+    def load_tail(self, token_budget):
+        """Mengambil pesan terbaru yang muat dalam `token_budget` dengan membaca
+        journal dari belakang; pesan yang lebih lama tetap di disk."""
+        tail = JournalTail()
+        cutoff = None
+        tokens = 0
+
+        for record, size in self.iter_records_reversed():
+            record_type = record.get("type")
+            seq = record.get("seq", 0)
+
+            if record_type == RECORD_TRUNCATE:
+                cutoff = seq if cutoff is None else min(cutoff, seq)
+            elif record_type in (RECORD_CHECKPOINT, RECORD_TURN_END):
+                if tail.last_control is None:
+                    if cutoff is not None and seq > cutoff:
+                        # Checkpoint ini dibatalkan oleh truncate setelahnya
+                        tail.last_control = {"type": RECORD_TURN_END, "seq": cutoff}
+                    else:
+                        tail.last_control = record
+                    cutoff = tail.last_control["seq"]
+            elif record_type == RECORD_MESSAGE:
+                if tail.last_control is None or seq >= cutoff:
+                    continue
+                # Pesan diterima dengan seq menurun; record lama dengan seq sama
+                # atau lebih besar sudah ditimpa oleh record yang lebih baru.
+                tail.messages.append(record)
+                cutoff = seq
+                tokens += size // CHARS_PER_TOKEN
+                if seq == 0:
+                    break
+                if _is_turn_start_record(record) and tokens >= token_budget:
+                    break
+
+        tail.messages.reverse()
+        tail.offset = tail.messages[0]["seq"] if tail.messages else 0
+        return tail
+
+    def needs_compaction(self, state):
+        return (
+            state.record_count >= COMPACTION_MIN_RECORDS
+            and state.record_count > COMPACTION_RECORD_RATIO * max(1, len(state.messages))
+        )
+
+    def import_messages(self, messages):
+        # Dipakai untuk migrasi sekali jalan dari file riwayat JSON lama
+        records = []
+        for message in messages:
+            if message.get("role") and message.get("parts"):
+                records.append({"type": RECORD_MESSAGE, "seq": len(records), **message})
+        records.append({"type": RECORD_TURN_END, "seq": len(records)})
+        self._append(records, sync=True)
+
+    def compact_in_background(self):
+        """Memeriksa dan (bila perlu) memadatkan journal di thread terpisah."""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            snapshot_bytes = os.path.getsize(self.path)
+            # Mulai menangkap append baru sebelum thread berjalan agar tidak ada yang hilang
+            self._captured_lines = []
+        thread = threading.Thread(
+            target=self._compact, args=(snapshot_bytes,), name="han-journal-compaction", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _compact(self, snapshot_bytes):
+        tmp_path = f"{self.path}.compact"
+        try:
+            state = self.replay(limit_bytes=snapshot_bytes)
+            if not self.needs_compaction(state):
+                with self._lock:
+                    self._captured_lines = None
+                return
+
+            records = list(state.messages)
+            if state.last_control is not None:
+                records.append(state.last_control)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            with self._lock:
+                # Record yang ditambahkan selama pemadatan disalin ke file baru
+                with open(tmp_path, "a", encoding="utf-8") as f:
+                    f.writelines(self._captured_lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                os.replace(tmp_path, self.path)
+                self._captured_lines = None
+            log_debug(f"Journal riwayat {self.path} berhasil dipadatkan.")
+        except Exception as e:
+            with self._lock:
+                self._captured_lines = None
+            log_error(f"Gagal memadatkan journal riwayat: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,120 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+from google.api_core import exceptions as google_exceptions
+
+from config import (
+    MODEL_REQUESTS_PER_MINUTE,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    RATE_LIMIT_MAX_RETRIES,
+    RATE_LIMIT_BASE_BACKOFF_SECONDS,
+    RATE_LIMIT_MAX_BACKOFF_SECONDS,
+)
+from logging_handler import log_system_message, log_debug
+
+RATE_LIMIT_WINDOW_SECONDS = 60.0
+
+
+def is_quota_error(error):
+    if isinstance(
+        error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+    ):
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+class RateLimiter:
+    """Membatasi permintaan ke model dengan jendela geser per menit dan
+    melakukan backoff eksponensial (dengan jitter) hanya saat terkena kuota."""
+
+    def __init__(
+        self,
+        requests_per_minute,
+        max_retries=RATE_LIMIT_MAX_RETRIES,
+        base_backoff=RATE_LIMIT_BASE_BACKOFF_SECONDS,
+        max_backoff=RATE_LIMIT_MAX_BACKOFF_SECONDS,
+    ):
+        self.requests_per_minute = max(1, int(requests_per_minute))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._timestamps = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_model(cls, model_name):
+        rpm = MODEL_REQUESTS_PER_MINUTE.get(model_name, DEFAULT_REQUESTS_PER_MINUTE)
+        return cls(rpm)
+
+    def _reserve_slot(self):
+        # Mengembalikan lama waktu tunggu sebelum permintaan boleh dikirim,
+        # sekaligus mencatat permintaan tersebut di jendela.
+        with self._lock:
+            now = time.monotonic()
+            while self._timestamps and now - self._timestamps[0] >= RATE_LIMIT_WINDOW_SECONDS:
+                self._timestamps.popleft()
+
+            if len(self._timestamps) < self.requests_per_minute:
+                self._timestamps.append(now)
+                return 0.0
+
+            send_at = self._timestamps[0] + RATE_LIMIT_WINDOW_SECONDS
+            self._timestamps.popleft()
+            self._timestamps.append(send_at)
+            return send_at - now
+
+    def _backoff_delay(self, attempt):
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _retry_delay(self, error, attempt):
+        # Hanya error kuota yang dicoba ulang; error lain diteruskan ke pemanggil
+        if not is_quota_error(error) or attempt >= self.max_retries:
+            raise error
+        delay = self._backoff_delay(attempt)
+        log_system_message(
+            f"Kuota model tercapai, mencoba lagi dalam {delay:.1f} detik (percobaan {attempt + 1}/{self.max_retries})."
+        )
+        return delay
+
+    def _wait_time(self):
+        wait_seconds = self._reserve_slot()
+        if wait_seconds > 0:
+            log_debug(f"Batas {self.requests_per_minute} RPM tercapai, menunggu {wait_seconds:.1f} detik.")
+        return wait_seconds
+
+    def acquire(self):
+        wait_seconds = self._wait_time()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self):
+        wait_seconds = self._wait_time()
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+
+    def call(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                time.sleep(delay)
+
+    async def call_async(self, func, *args, **kwargs):
+        attempt = 0
+        while True:
+            await self.acquire_async()
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                await asyncio.sleep(delay)
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import TOOL_CACHE_POLICIES, TOOL_CACHE_MAX_ENTRIES
+from logging_handler import log_debug
+from agent_core.tool_dispatcher import READ_ONLY_TOOLS, get_call_resources, calls_conflict
+from utils.path_utils import sanitize_path
+
+
+def _is_success(output):
+    # Hanya hasil yang berhasil yang di-cache; kegagalan bisa bersifat sementara
+    try:
+        return bool(json.loads(output).get("success"))
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+class CacheEntry:
+    def __init__(self, output, expires_at, resources):
+        self.output = output
+        self.expires_at = expires_at
+        # (reads, writes) dari panggilan asal, dipakai untuk invalidasi
+        self.resources = resources
+
+
+class ToolResultCache:
+    """Cache LRU + TTL untuk hasil tool idempoten. Entri filesystem dikunci
+    dengan mtime/ukuran path-nya dan dibuang saat tool lain menulis ke sana."""
+
+    def __init__(self, policies=TOOL_CACHE_POLICIES, max_entries=TOOL_CACHE_MAX_ENTRIES):
+        # {nama_tool: ttl_detik}
+        self.policies = dict(policies)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _fingerprint(self, function_name, function_args):
+        fingerprint = []
+        for arg_name in READ_ONLY_TOOLS.get(function_name, ()):
+            path = sanitize_path(str(function_args.get(arg_name, ".")))
+            try:
+                stat = os.stat(path)
+                fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((path, None, None))
+        return tuple(fingerprint)
+
+    def _make_key(self, function_name, function_args):
+        if function_name not in self.policies:
+            return None
+        try:
+            args_key = json.dumps(function_args, sort_keys=True, ensure_ascii=False, default=str)
+            return (function_name, args_key, self._fingerprint(function_name, function_args))
+        except (TypeError, ValueError):
+            return None
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.output
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def _put(self, key, function_name, function_args, output):
+        if not _is_success(output):
+            return
+        entry = CacheEntry(
+            output,
+            time.monotonic() + self.policies[function_name],
+            get_call_resources(function_name, function_args),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, function_name, function_args):
+        """Membuang entri yang path-nya bisa diubah oleh panggilan tool ini."""
+        call_resources = get_call_resources(function_name, function_args)
+        if not call_resources[1]:
+            return
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if calls_conflict(call_resources, entry.resources)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            log_debug(f"Cache tool: {len(stale)} entri dibuang setelah {function_name}.")
+
+    def call(self, function_name, function_args, func):
+        key = self._make_key(function_name, function_args)
+        if key is None:
+            try:
+                return func(**function_args)
+            finally:
+                # Invalidasi tetap dilakukan walau tool gagal di tengah jalan
+                self.invalidate(function_name, function_args)
+
+        output = self._get(key)
+        if output is None:
+            output = func(**function_args)
+            self._put(key, function_name, function_args, output)
+        return output
+
+    async def call_async(self, function_name, function_args, func):
+        key = self._make_key(function_name, function_args)
+        if key is None:
+            try:
+                return await func(**function_args)
+            finally:
+                self.invalidate(function_name, function_args)
+
+        output = self._get(key)
+        if output is None:
+            output = await func(**function_args)
+            self._put(key, function_name, function_args, output)
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import MAX_PARALLEL_TOOL_CALLS
+from utils.path_utils import sanitize_path
+from utils.patch_utils import patch_target_paths
+
+# Penanda sumber daya global: tool yang memakainya tidak boleh berjalan
+# bersamaan dengan tool lain (perintah shell, proses, kontrol alur).
+EXCLUSIVE = "*"
+
+# Tool baca-saja yang aman dijalankan bersamaan. Nilai adalah nama argumen
+# path yang dibaca (kosong jika tool tidak menyentuh workspace).
+READ_ONLY_TOOLS = {
+    "read_file": ("filename",),
+    "list_directory": ("path",),
+    "list_tree": ("path",),
+    "search_workspace": ("path",),
+    "web_search": (),
+    "fetch_webpage_content": (),
+    "fetch_many": (),
+}
+
+# Tool yang menulis ke path tertentu. Panggilan yang menyentuh path yang sama
+# (atau induk/anaknya) dijalankan berurutan sesuai urutan dari model.
+PATH_WRITE_TOOLS = {
+    "create_directory": ("path",),
+    "write_file": ("filename",),
+    "append_to_file": ("filename",),
+    "delete_file": ("filename",),
+    "move_item": ("source_path", "destination_path"),
+    "create_zip_archive": ("output_zip_path",),
+    "set_permissions": ("path",),
+}
+
+# Tool yang membaca/menulis state bersama non-file (scratchpad, todo, proses).
+STATE_READ_TOOLS = {
+    "read_from_scratchpad": "scratchpad",
+    "read_many_from_scratchpad": "scratchpad",
+    "list_scratchpad_keys": "scratchpad",
+    "read_todo_list": "todo",
+    "list_running_processes": "processes",
+    "get_command_resource_usage": "resource_usage",
+    "recall_memory": "memory",
+    "list_knowledge_modules": "knowledge",
+    "load_knowledge_module": "knowledge",
+}
+STATE_WRITE_TOOLS = {
+    "write_to_scratchpad": "scratchpad",
+    "write_many_to_scratchpad": "scratchpad",
+    "add_todo_items": "todo",
+    "mark_todo_items_done": "todo",
+    "export_todo_markdown": "todo",
+}
+PROCESS_TOOLS = ("send_input_to_process", "check_process_status", "read_process_output", "stop_process")
+
+
+def _path_resource(path):
+    try:
+        return "path:" + sanitize_path(str(path))
+    except ValueError:
+        return "path:" + str(path)
+
+
+def get_call_resources(function_name, function_args):
+    """Mengembalikan (reads, writes) berupa himpunan sumber daya yang disentuh tool."""
+    reads, writes = set(), set()
+
+    if function_name in READ_ONLY_TOOLS:
+        for arg_name in READ_ONLY_TOOLS[function_name]:
+            reads.add(_path_resource(function_args.get(arg_name, ".")))
+    elif function_name in PATH_WRITE_TOOLS:
+        for arg_name in PATH_WRITE_TOOLS[function_name]:
+            if arg_name in function_args:
+                writes.add(_path_resource(function_args[arg_name]))
+        for source in function_args.get("source_paths", None) or []:
+            reads.add(_path_resource(source))
+    elif function_name == "apply_patch":
+        # Path target ada di dalam teks patch, bukan di argumen tool
+        target_paths = patch_target_paths(str(function_args.get("patch", "")))
+        writes.update(_path_resource(path) for path in target_paths)
+        if not target_paths:
+            writes.add(EXCLUSIVE)
+    elif function_name in STATE_READ_TOOLS:
+        reads.add(STATE_READ_TOOLS[function_name])
+    elif function_name in STATE_WRITE_TOOLS:
+        writes.add(STATE_WRITE_TOOLS[function_name])
+    elif function_name in PROCESS_TOOLS:
+        writes.add(f"process:{function_args.get('pid')}")
+        reads.add("processes")
+    else:
+        # Tool yang tidak dikenal atau berefek luas selalu dijalankan sendirian.
+        writes.add(EXCLUSIVE)
+
+    return reads, writes
+
+
+def _resources_overlap(a, b):
+    if a == EXCLUSIVE or b == EXCLUSIVE:
+        return True
+    if a.startswith("path:") and b.startswith("path:"):
+        path_a, path_b = a[5:], b[5:]
+        try:
+            return os.path.commonpath([path_a, path_b]) in (path_a, path_b)
+        except ValueError:
+            return path_a == path_b
+    return a == b
+
+
+def _sets_overlap(set_a, set_b):
+    return any(_resources_overlap(a, b) for a in set_a for b in set_b)
+
+
+def calls_conflict(earlier, later):
+    earlier_reads, earlier_writes = earlier
+    later_reads, later_writes = later
+    return (
+        _sets_overlap(earlier_writes, later_reads | later_writes)
+        or _sets_overlap(earlier_reads, later_writes)
+    )
+
+
+class ToolDispatcher:
+    """Menjalankan sekumpulan function_call secara konkuren dengan tetap
+    mempertahankan urutan untuk panggilan yang saling bergantung."""
+
+    def __init__(self, execute_fn, max_workers=MAX_PARALLEL_TOOL_CALLS):
+        self._execute_fn = execute_fn
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="han-tool"
+        )
+
+    def _run_after(self, dependencies, tool_call):
+        # Dependensi selalu dikirim lebih dulu ke antrean FIFO executor,
+        # sehingga menunggunya di sini tidak bisa menyebabkan deadlock.
+        if dependencies:
+            wait(dependencies)
+        return self._execute_fn(tool_call)
+
+    def dispatch(self, tool_calls):
+        if len(tool_calls) <= 1 or self._max_workers <= 1:
+            return [self._execute_fn(call) for call in tool_calls]
+
+        resources = [
+            get_call_resources(call.name, {k: v for k, v in call.args.items()})
+            for call in tool_calls
+        ]
+
+        futures = []
+        for index, call in enumerate(tool_calls):
+            dependencies = [
+                futures[earlier]
+                for earlier in range(index)
+                if calls_conflict(resources[earlier], resources[index])
+            ]
+            futures.append(self._executor.submit(self._run_after, dependencies, call))
+
+        # Hasil dikembalikan sesuai urutan asli function_call dari model.
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
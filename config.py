@@ -1,15 +1,113 @@
 import os
 
 DIREKTORI_BATASAN_AI = os.path.abspath(os.path.join(os.getcwd(), "han_workspace"))
+# Cache web per pengguna, sengaja di luar workspace agar tidak terbaca atau
+# terhapus bersama file proyek
+HAN_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "han_agent"
+)
 
 PROMPT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), "prompt"))
+# Modul prompt non-inti (tanpa awalan '_') dipilih per pesan berdasarkan skor BM25
+PROMPT_MODULE_MAX_SELECTED = 2
+PROMPT_MODULE_MIN_SCORE = 1.0
 
 GEMINI_MODEL_NAME = "gemini-2.5-flash"
-TOOL_CALL_PAUSE_SECONDS = 8
+# Menampilkan respons model secara bertahap saat potongan teks tiba
+STREAM_RESPONSES = True
+
+# Batas permintaan per menit untuk tiap model beserta backoff saat kuota habis
+MODEL_REQUESTS_PER_MINUTE = {
+    "gemini-2.5-pro": 5,
+    "gemini-2.5-flash": 10,
+    "gemini-2.5-flash-lite": 15,
+}
+DEFAULT_REQUESTS_PER_MINUTE = 10
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BASE_BACKOFF_SECONDS = 2
+RATE_LIMIT_MAX_BACKOFF_SECONDS = 60
+
+MAX_PARALLEL_TOOL_CALLS = 4
+
+# Cache hasil tool idempoten: {nama_tool: TTL dalam detik}
+TOOL_CACHE_POLICIES = {
+    "read_file": 300,
+    "list_directory": 60,
+    "list_tree": 30,
+    "web_search": 900,
+    "fetch_webpage_content": 900,
+}
+TOOL_CACHE_MAX_ENTRIES = 256
+
+# Menjalankan sesi dengan AsyncAgent (asyncio) alih-alih Agent sinkron
+USE_ASYNC_AGENT = False
+
+# Pemadatan riwayat chat: payload tool lama diganti stub saat anggaran token terlampaui
+HISTORY_TOKEN_BUDGET = 120000
+# Jumlah langkah model terakhir (beserta hasil tool-nya) yang tidak pernah dipadatkan
+HISTORY_KEEP_LAST_STEPS = 4
+HISTORY_COMPACTION_MIN_CHARS = 500
+HISTORY_COMPACTION_USE_SUMMARIES = False
 
 SHOW_AGENT_THOUGHTS = False
 
 SHOW_DEBUG_MESSAGES = False
 
+# Batas default byte yang dikembalikan read_file per panggilan; sisanya dibaca per halaman
+READ_FILE_MAX_BYTES = 100000
+LINE_INDEX_CACHE_SIZE = 32
+# list_tree: direktori dependensi/hasil build yang dilewati secara default
+TREE_DEFAULT_EXCLUDED_DIRS = (
+    ".git", "node_modules", "__pycache__", ".venv", "venv", "build", "dist",
+    "target", ".gradle", ".next", ".mypy_cache", ".pytest_cache", ".tox", ".han_logs", ".han_cache",
+)
+TREE_DEFAULT_MAX_DEPTH = 3
+TREE_DEFAULT_MAX_ENTRIES = 500
+# search_workspace: file lebih besar dari batas ini tidak diindeks
+SEARCH_MAX_FILE_BYTES = 2000000
+SEARCH_DEFAULT_MAX_RESULTS = 50
+# execute_command: hanya awal dan akhir output yang dikirim ke model; output
+# yang melebihi anggaran disimpan utuh di COMMAND_LOG_DIRECTORY (relatif workspace)
+COMMAND_OUTPUT_HEAD_BYTES = 8000
+COMMAND_OUTPUT_TAIL_BYTES = 24000
+COMMAND_LOG_DIRECTORY = ".han_logs"
+# run_commands: jumlah perintah yang dijalankan bersamaan
+RUN_COMMANDS_MAX_WORKERS = os.cpu_count() or 4
+# Proses latar belakang: output dikuras ke ring buffer dan log berotasi di COMMAND_LOG_DIRECTORY
+PROCESS_OUTPUT_BUFFER_BYTES = 256000
+PROCESS_LOG_MAX_BYTES = 10000000
+PROCESS_LOG_BACKUPS = 2
+PROCESS_READ_DEFAULT_MAX_BYTES = 16000
+PROCESS_STATUS_TAIL_BYTES = 4000
+# Proses yang sudah selesai dihapus dari daftar setelah jeda ini
+PROCESS_RETENTION_SECONDS = 600
+PROCESS_REAPER_INTERVAL_SECONDS = 30
+# Ringkasan file yang dibuat/diubah/dihapus dilampirkan ke hasil tool yang berefek luas
+WORKSPACE_CHANGE_FEED = True
+CHANGE_FEED_MAX_PATHS = 30
+CHANGE_FEED_MAX_FILES = 20000
+# fetch_webpage_content: koneksi keep-alive per host dan cache revalidasi (ETag/Last-Modified)
+HTTP_POOL_MAXSIZE = 10
+HTTP_CACHE_DIRECTORY = os.path.join(HAN_CACHE_DIRECTORY, "http")
+HTTP_CACHE_MAX_ENTRIES = 500
+# Batas unduhan body halaman dan panjang teks yang dikembalikan ke model
+FETCH_MAX_BYTES = 3000000
+FETCH_MAX_TEXT_CHARS = 60000
+# fetch_webpage_content dengan 'query': hanya potongan teks teratas (BM25) yang dikembalikan
+FETCH_QUERY_CHUNK_CHARS = 1200
+FETCH_QUERY_TOP_K = 5
+# fetch_many: jumlah unduhan paralel, koneksi per host, batas waktu total, dan teks per halaman
+FETCH_MANY_MAX_WORKERS = 8
+FETCH_MANY_PER_HOST = 4
+FETCH_MANY_DEADLINE_SECONDS = 30
+FETCH_MANY_MAX_TEXT_CHARS = 15000
+# web_search: cache hasil persisten per (query ternormalisasi, num_results)
+WEB_SEARCH_CACHE_FILE = os.path.join(HAN_CACHE_DIRECTORY, "search.db")
+WEB_SEARCH_CACHE_TTL_SECONDS = 6 * 60 * 60
+WEB_SEARCH_CACHE_MAX_ENTRIES = 1000
+
+# Todo disimpan terstruktur di TODO_STORE_FILE_NAME; TODO_FILE_NAME hanya hasil ekspor Markdown
 TODO_FILE_NAME = "todo.md"
-MEMORY_FILE_NAME = "agent_memory.json"
+TODO_STORE_FILE_NAME = ".todo.db"
+# Journal riwayat JSONL; file lama 'agent_memory.json' dimigrasikan otomatis
+MEMORY_FILE_NAME = "agent_memory.jsonl"
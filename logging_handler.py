@@ -2,6 +2,8 @@ from utils.colors import Colors
 import json
 import textwrap
 import shlex
+import threading
+import functools
 from config import SHOW_DEBUG_MESSAGES
 
 MAX_TOOL_ARG_LENGTH = 200
@@ -9,6 +11,19 @@ MAX_TOOL_OUTPUT_LENGTH = 1000
 MAX_FILE_PREVIEW_LINES = 10
 MAX_LINES_FOR_TRUNCATION = 20
 
+# Tool dapat dijalankan dari beberapa thread sekaligus; kunci ini mencegah
+# blok output multi-baris saling bertumpuk di terminal.
+_output_lock = threading.RLock()
+
+
+def _synchronized(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _output_lock:
+            return func(*args, **kwargs)
+
+    return wrapper
+
 
 def _truncate_string(s, max_len):
     if len(s) > max_len:
@@ -40,10 +55,24 @@ def log_agent_response(text):
     print()
 
 
+@_synchronized
+def log_agent_response_chunk(text, is_first=False):
+    if is_first:
+        print(f"{Colors.BOLD}{Colors.BLUE}Han Agent: {Colors.RESET}", end="")
+    print(text, end="", flush=True)
+
+
+@_synchronized
+def log_agent_response_end():
+    print()
+    print()
+
+
 def log_system_message(message):
     print(f"{Colors.CYAN}[SYSTEM]: {message}{Colors.RESET}")
 
 
+@_synchronized
 def log_error(message):
     print(f"{Colors.RED}[ERROR]: {message}{Colors.RESET}")
 
@@ -57,6 +86,7 @@ def log_debug(message):
         print(f"{Colors.MAGENTA}[DEBUG]: {message}{Colors.RESET}")
 
 
+@_synchronized
 def log_tool_call(function_name, args):
     if function_name == "ask_user_for_input":
         question = args.get("question", "...")
@@ -93,6 +123,7 @@ def log_tool_call(function_name, args):
         print("    (Tanpa argumen)")
 
 
+@_synchronized
 def log_tool_output(function_name, output_result):
     if function_name == "ask_user_for_input":
         print("-" * 30 + Colors.RESET)
@@ -1,10 +1,60 @@
+import asyncio
+import signal
 from dotenv import load_dotenv
 from agent_core.agent import Agent
+from agent_core.async_agent import AsyncAgent
+from config import USE_ASYNC_AGENT
+from tools.async_tools import close_http_session
 from utils.colors import Colors
 from utils.path_utils import create_workspace_if_not_exists, clean_workspace
 from logging_handler import log_system_message
 
 
+PIN_COMMAND_PREFIX = "/pin "
+
+
+def parse_user_input(user_input):
+    # Giliran berawalan '/pin ' (termasuk hasil tool-nya) dipertahankan utuh saat riwayat dipadatkan
+    if user_input.startswith(PIN_COMMAND_PREFIX):
+        return user_input[len(PIN_COMMAND_PREFIX):].strip(), True
+    return user_input, False
+
+
+def cancel_running_tool_calls(agent):
+    cancelled = agent.cancel_all_tool_calls()
+    if cancelled:
+        log_system_message(f"{Colors.YELLOW}Ctrl-C: {cancelled} tool call yang sedang berjalan dibatalkan.{Colors.RESET}")
+    else:
+        log_system_message(f"{Colors.YELLOW}Ctrl-C: tidak ada tool call yang sedang berjalan.{Colors.RESET}")
+
+
+async def run_cancellable(agent, coroutine):
+    # Selama agen bekerja, Ctrl-C hanya membatalkan tool call yang berjalan;
+    # model menerima pesan pembatalan sebagai hasil tool dan sesi tetap hidup.
+    loop = asyncio.get_running_loop()
+    previous_handler = signal.getsignal(signal.SIGINT)
+    try:
+        loop.add_signal_handler(signal.SIGINT, cancel_running_tool_calls, agent)
+    except (NotImplementedError, RuntimeError):
+        # Mis. Windows: event loop tidak mendukung handler sinyal
+        return await coroutine
+    try:
+        return await coroutine
+    finally:
+        loop.remove_signal_handler(signal.SIGINT)
+        signal.signal(signal.SIGINT, previous_handler)
+
+
+def ask_resume_interrupted_task():
+    return (
+        input(
+            f"{Colors.YELLOW}Sesi sebelumnya terhenti di tengah tugas. Lanjutkan dari langkah terakhir yang tersimpan? (y/n): {Colors.RESET}"
+        )
+        .strip()
+        .lower()
+    )
+
+
 def main():
     load_dotenv()
     create_workspace_if_not_exists()
@@ -32,9 +82,25 @@ def main():
     log_system_message(
         f"{Colors.BLUE}Ketik '{Colors.BOLD}exit{Colors.RESET}{Colors.BLUE}' untuk keluar.{Colors.RESET}"
     )
+    log_system_message(
+        f"{Colors.BLUE}Awali pesan dengan '{Colors.BOLD}/pin{Colors.RESET}{Colors.BLUE}' agar giliran itu beserta hasil tool-nya tidak pernah dipadatkan dari riwayat.{Colors.RESET}"
+    )
+    if USE_ASYNC_AGENT:
+        log_system_message(
+            f"{Colors.BLUE}Tekan '{Colors.BOLD}Ctrl-C{Colors.RESET}{Colors.BLUE}' saat agen bekerja untuk membatalkan tool call yang sedang berjalan.{Colors.RESET}"
+        )
     log_system_message(f"{Colors.BLUE}{'-' * 50}{Colors.RESET}\n")
 
+    if USE_ASYNC_AGENT:
+        asyncio.run(run_async_session())
+        return
+
     agent = Agent()
+    if agent.has_interrupted_task():
+        if ask_resume_interrupted_task() == "y":
+            agent.resume_interrupted_task()
+        else:
+            agent.discard_interrupted_task()
     log_system_message("Han Agent siap menerima perintah Anda.")
 
     while True:
@@ -43,7 +109,34 @@ def main():
             log_system_message("Keluar dari Han Agent. Sampai jumpa!")
             break
 
-        agent.interact(user_input)
+        agent.interact(*parse_user_input(user_input))
+
+
+async def run_async_session():
+    agent = AsyncAgent()
+    if agent.has_interrupted_task():
+        if await asyncio.to_thread(ask_resume_interrupted_task) == "y":
+            await run_cancellable(agent, agent.resume_interrupted_task())
+        else:
+            agent.discard_interrupted_task()
+    log_system_message("Han Agent (asyncio) siap menerima perintah Anda.")
+
+    try:
+        while True:
+            # input() dijalankan di thread agar event loop tetap bebas
+            user_input = (
+                await asyncio.to_thread(
+                    input, f"{Colors.BOLD}{Colors.YELLOW}Anda: {Colors.RESET}"
+                )
+            ).strip()
+            if user_input.lower() == "exit":
+                log_system_message("Keluar dari Han Agent. Sampai jumpa!")
+                break
+
+            await run_cancellable(agent, agent.interact(*parse_user_input(user_input)))
+    finally:
+        agent.cancel_all_tool_calls()
+        await close_http_session()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# Modul proyek diimpor dari akar repositori (config, tools, utils, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Workspace AI sementara untuk tool yang memakai sanitize_path."""
+    from utils import path_utils
+
+    monkeypatch.setattr(path_utils, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    return tmp_path
@@ -0,0 +1,20 @@
+import json
+import subprocess
+
+from tools import advanced_tools
+from utils import process_output
+
+
+def test_stop_process_keeps_resource_usage(tmp_path, monkeypatch):
+    monkeypatch.setattr(advanced_tools, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    monkeypatch.setattr(process_output, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    pid = json.loads(advanced_tools.start_background_process("sleep", ["30"]))["data"]["pid"]
+
+    def poll(self):
+        raise AssertionError("poll() bisa memanen proses sebelum thread waiter")
+
+    monkeypatch.setattr(subprocess.Popen, "poll", poll)
+    result = json.loads(advanced_tools.stop_process(pid))
+
+    assert result["success"]
+    assert "peak_rss_mb" in result["data"]["resource_usage"]
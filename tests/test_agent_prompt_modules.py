@@ -0,0 +1,52 @@
+from agent_core.agent import Agent
+
+
+class FakePromptIndex:
+    def __init__(self, selections):
+        self.selections = selections
+
+    def select(self, query):
+        return self.selections.get(query, [])
+
+
+class FakeModel:
+    def start_chat(self, history):
+        return FakeChat(history)
+
+
+class FakeChat:
+    def __init__(self, history):
+        self.history = list(history)
+
+
+def make_agent(selections, create_model):
+    agent = Agent.__new__(Agent)
+    agent.prompt_index = FakePromptIndex(selections)
+    agent.active_prompt_modules = []
+    agent.chat = FakeChat(["riwayat"])
+    agent._create_model = create_model
+    return agent
+
+
+def test_modules_are_unloaded_when_they_no_longer_match():
+    agent = make_agent({"buat docker": ["docker.txt"]}, FakeModel)
+
+    agent._select_prompt_modules("buat docker")
+    assert agent.active_prompt_modules == ["docker.txt"]
+
+    agent._select_prompt_modules("terima kasih")
+    assert agent.active_prompt_modules == []
+    assert agent.chat.history == ["riwayat"]
+
+
+def test_failed_model_rebuild_keeps_previous_chat():
+    def broken_model():
+        raise RuntimeError("gagal")
+
+    agent = make_agent({"buat docker": ["docker.txt"]}, broken_model)
+    chat = agent.chat
+
+    agent._select_prompt_modules("buat docker")
+
+    assert agent.active_prompt_modules == []
+    assert agent.chat is chat
@@ -0,0 +1,84 @@
+import google.ai.generativelanguage as glm
+import pytest
+from google.generativeai.generative_models import ChatSession
+from google.generativeai.types import StopCandidateException, generation_types
+
+from agent_core import agent as agent_module
+from agent_core.agent import Agent
+from agent_core.context_manager import ContextManager
+from agent_core.history_journal import HistoryJournal
+
+
+class FakeModel:
+    def __init__(self, finish_reason, texts=("sebagian",)):
+        self.finish_reason = finish_reason
+        self.texts = texts
+
+    def _get_tools_lib(self, tools):
+        return None
+
+    def generate_content(self, contents, stream, **kwargs):
+        chunks = [
+            glm.GenerateContentResponse(candidates=[glm.Candidate(
+                content=glm.Content(role="model", parts=[glm.Part(text=text)]),
+                finish_reason=self.finish_reason if index == len(self.texts) - 1 else 0,
+            )])
+            for index, text in enumerate(self.texts)
+        ]
+        return generation_types.GenerateContentResponse.from_iterator(iter(chunks))
+
+
+class DirectRateLimiter:
+    def call(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+def make_agent(tmp_path, finish_reason, texts=("sebagian",)):
+    agent = Agent.__new__(Agent)
+    agent.context_manager = ContextManager()
+    agent.rate_limiter = DirectRateLimiter()
+    agent.turn_metrics = []
+    agent.journal = HistoryJournal(str(tmp_path / "history.jsonl"))
+    agent._journal_seq = 0
+    agent.chat = ChatSession(FakeModel(finish_reason, texts))
+    return agent
+
+
+def user_text(text):
+    return glm.Content(role="user", parts=[glm.Part(text=text)])
+
+
+def test_stream_ending_with_safety_is_rewound_and_rolled_back(tmp_path):
+    agent = make_agent(tmp_path, glm.Candidate.FinishReason.SAFETY)
+
+    with pytest.raises(StopCandidateException):
+        agent._send_message(user_text("halo"), "input")
+
+    assert agent.chat.history == []
+    assert agent._journal_seq == 0
+    assert agent.journal.replay().messages == []
+
+
+def test_stream_ending_with_stop_is_recorded(tmp_path):
+    agent = make_agent(tmp_path, glm.Candidate.FinishReason.STOP)
+
+    agent._send_message(user_text("halo"), "input")
+
+    assert [content.role for content in agent.chat.history] == ["user", "model"]
+    assert agent._journal_seq == 2
+
+
+def test_stream_chunks_are_rendered_as_they_arrive(tmp_path, monkeypatch):
+    rendered = []
+    monkeypatch.setattr(agent_module, "STREAM_RESPONSES", True)
+    monkeypatch.setattr(agent_module, "log_agent_response_chunk", lambda text, is_first: rendered.append((text, is_first)))
+    monkeypatch.setattr(agent_module, "log_agent_response_end", lambda: rendered.append("end"))
+    agent = make_agent(tmp_path, glm.Candidate.FinishReason.STOP, texts=("Halo", " dunia"))
+
+    response, streamed_text = agent._send_message(user_text("halo"), "input")
+
+    assert streamed_text
+    assert rendered == [("Halo", True), (" dunia", False), "end"]
+    assert response.text == "Halo dunia"
+    assert len(agent.turn_metrics) == 1
+    assert agent.turn_metrics[0]["time_to_first_token"] <= agent.turn_metrics[0]["total_seconds"]
@@ -0,0 +1,56 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+from agent_core.async_agent import AsyncAgent
+
+
+def call(name, **args):
+    return SimpleNamespace(name=name, args=args)
+
+
+def make_agent(execute):
+    agent = AsyncAgent.__new__(AsyncAgent)
+    agent._tool_semaphore = asyncio.Semaphore(4)
+    agent._call_ids = itertools.count(1)
+    agent.pending_tool_calls = {}
+    agent._execute_tool_call_async = execute
+    return agent
+
+
+def test_dependent_calls_wait_and_results_keep_order(workspace):
+    events = []
+
+    async def execute(tool_call):
+        events.append(("start", tool_call.name, tool_call.args["filename"]))
+        await asyncio.sleep(0.1 if tool_call.name == "write_file" else 0)
+        events.append(("end", tool_call.name, tool_call.args["filename"]))
+        return tool_call.args["filename"]
+
+    agent = make_agent(execute)
+    results = asyncio.run(agent._dispatch_tool_calls([
+        call("write_file", filename="a.txt"),
+        call("read_file", filename="a.txt"),
+        call("read_file", filename="b.txt"),
+    ]))
+
+    assert results == ["a.txt", "a.txt", "b.txt"]
+    assert events.index(("end", "write_file", "a.txt")) < events.index(("start", "read_file", "a.txt"))
+    assert events.index(("end", "read_file", "b.txt")) < events.index(("end", "write_file", "a.txt"))
+    assert agent.pending_tool_calls == {}
+
+
+def test_cancelled_call_returns_error_response(workspace):
+    async def execute(tool_call):
+        await asyncio.sleep(10)
+
+    async def scenario(agent):
+        dispatch = asyncio.create_task(agent._dispatch_tool_calls([call("read_file", filename="a.txt")]))
+        await asyncio.sleep(0.05)
+        assert agent.cancel_all_tool_calls() == 1
+        return await dispatch
+
+    [response] = asyncio.run(scenario(make_agent(execute)))
+
+    assert response.function_response.name == "read_file"
+    assert "dibatalkan" in response.function_response.response["error"]
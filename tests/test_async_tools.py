@@ -0,0 +1,11 @@
+import asyncio
+import json
+
+from tools import async_tools, execution_tools
+
+
+def test_async_execute_command_uses_shared_validation():
+    result = json.loads(asyncio.run(async_tools.execute_command("ls -la", ["src"])))
+    expected = json.loads(execution_tools.execute_command("ls -la", ["src"]))
+    assert result == expected
+    assert result["success"] is False
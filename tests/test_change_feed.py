@@ -0,0 +1,34 @@
+import os
+
+from agent_core.change_feed import WorkspaceChangeFeed, _EventCollector
+
+
+def write(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_snapshot_ignores_internal_and_dependency_dirs(tmp_path):
+    root = str(tmp_path)
+    write(os.path.join(root, "node_modules", "lib", "old.js"))
+    feed = WorkspaceChangeFeed(root)
+    feed._observer = feed._collector = None
+    token = feed.begin()
+
+    write(os.path.join(root, ".han_logs", "cmd.log"))
+    write(os.path.join(root, "node_modules", "lib", "new.js"))
+    write(os.path.join(root, "src", "app.py"))
+    write(os.path.join(root, "build"))
+
+    assert feed.end(token) == {"created": ["build", "src/app.py"]}
+
+
+def test_watcher_events_in_excluded_dirs_are_dropped(tmp_path):
+    root = str(tmp_path)
+    collector = _EventCollector(root)
+    collector._record(os.path.join(root, ".han_cache", "http", "a.json"), False, created=True)
+    collector._record(os.path.join(root, "node_modules"), True, created=True)
+    collector._record(os.path.join(root, "src", "app.py"), False, created=True)
+
+    assert collector.drain() == ({"src/app.py"}, {"src/app.py"})
@@ -0,0 +1,80 @@
+import json
+
+import google.ai.generativelanguage as glm
+from google.protobuf import struct_pb2
+from google.protobuf.json_format import ParseDict
+
+from agent_core.context_manager import COMPACTED_MARKER, ContextManager
+from agent_core.history_journal import HistoryJournal
+
+LARGE_OUTPUT = "x" * 5000
+
+
+def user_text(text):
+    return glm.Content(role="user", parts=[glm.Part(text=text)])
+
+
+def tool_round_trip(name):
+    call = glm.Content(
+        role="model",
+        parts=[glm.Part(function_call=glm.FunctionCall(name=name, args=ParseDict({}, struct_pb2.Struct())))],
+    )
+    result = json.dumps({"success": True, "data": LARGE_OUTPUT})
+    response = glm.Content(
+        role="user",
+        parts=[glm.Part(function_response=glm.FunctionResponse(
+            name=name, response=ParseDict({"result": result}, struct_pb2.Struct())
+        ))],
+    )
+    return [call, response]
+
+
+def is_compacted(content):
+    return COMPACTED_MARKER in json.dumps(type(content).to_dict(content))
+
+
+def test_pin_protects_tool_payloads_of_the_turn():
+    history = [user_text("pinned")] + tool_round_trip("read_file")
+    history += [user_text("later")] + tool_round_trip("read_file")
+    for _ in range(3):
+        history += [user_text("filler")] + tool_round_trip("read_file") + [glm.Content(role="model", parts=[glm.Part(text="ok")])]
+    manager = ContextManager(token_budget=100, keep_last_steps=2)
+    manager.pin(0)
+
+    manager.compact(history)
+
+    assert not is_compacted(history[2])
+    assert is_compacted(history[5])
+
+
+def test_long_tool_loop_in_one_turn_is_compacted():
+    history = [user_text("one long task")]
+    for _ in range(8):
+        history += tool_round_trip("run_command")
+    manager = ContextManager(token_budget=100, keep_last_steps=2)
+
+    assert manager.compact(history) > 0
+    assert is_compacted(history[2])
+    assert not is_compacted(history[-1])
+
+
+def test_pin_is_persisted_in_journal(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "history.jsonl"))
+    journal.append_pending(0, user_text("pinned"), "input", pinned=True)
+    journal.append_message(1, glm.Content(role="model", parts=[glm.Part(text="ok")]))
+    journal.turn_end(2)
+    journal.close()
+
+    tail = journal.load_tail(10000)
+
+    assert tail.messages[0].get("pinned") is True
+    assert "pinned" not in tail.messages[1]
+
+
+def test_token_cache_only_keeps_current_history():
+    manager = ContextManager(token_budget=10 ** 6)
+    for _ in range(5):
+        history = [user_text("halo")] + tool_round_trip("read_file")
+        manager.compact(history)
+
+    assert len(manager._token_cache) == len(history)
@@ -0,0 +1,65 @@
+import json
+import threading
+import time
+
+from tools import internet_tools
+
+
+def test_pages_keep_order_dedupe_and_report_errors(monkeypatch):
+    def fake_fetch_page(url, view, deadline):
+        if "rusak" in url:
+            return {"success": False, "data": "HTTP 500"}
+        return {"success": True, "data": {"text": url.rsplit("/", 1)[-1]}}
+
+    monkeypatch.setattr(internet_tools, "fetch_page", fake_fetch_page)
+    urls = ["https://a.test/satu", "https://b.test/rusak", "https://a.test/satu", "https://c.test/dua"]
+
+    data = json.loads(internet_tools.fetch_many(urls))["data"]
+
+    assert [(page["url"], page["status"]) for page in data["pages"]] == [
+        ("https://a.test/satu", "ok"), ("https://b.test/rusak", "error"), ("https://c.test/dua", "ok")
+    ]
+    assert data["pages"][0]["text"] == "satu" and data["pages"][1]["error"] == "HTTP 500"
+    assert (data["summary"]["ok"], data["summary"]["failed"]) == (2, 1)
+
+
+def test_slow_pages_time_out_without_blocking_the_rest(monkeypatch):
+    release = threading.Event()
+
+    def fake_fetch_page(url, view, deadline):
+        if "lambat" in url:
+            release.wait(5)
+        return {"success": True, "data": {"text": "ok"}}
+
+    monkeypatch.setattr(internet_tools, "fetch_page", fake_fetch_page)
+    started = time.monotonic()
+    try:
+        data = json.loads(internet_tools.fetch_many(["https://a.test/cepat", "https://b.test/lambat"], timeout=0.3))["data"]
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert [page["status"] for page in data["pages"]] == ["ok", "timeout"]
+    assert data["summary"]["timed_out"] == 1
+
+
+def test_connections_per_host_are_limited(monkeypatch):
+    monkeypatch.setattr(internet_tools, "FETCH_MANY_PER_HOST", 2)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def fake_fetch_page(url, view, deadline):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return {"success": True, "data": {"text": ""}}
+
+    monkeypatch.setattr(internet_tools, "fetch_page", fake_fetch_page)
+
+    data = json.loads(internet_tools.fetch_many([f"https://a.test/{n}" for n in range(6)]))["data"]
+
+    assert data["summary"]["ok"] == 6
+    assert peak[0] == 2
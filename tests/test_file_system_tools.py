@@ -0,0 +1,73 @@
+import json
+
+from tools.file_system_tools import read_file
+
+
+def read(*args, **kwargs):
+    return json.loads(read_file(*args, **kwargs))
+
+
+def test_full_read_returns_plain_content(workspace):
+    (workspace / "a.txt").write_text("satu\ndua\n", encoding="utf-8")
+
+    assert read("a.txt") == {"success": True, "data": "satu\ndua\n"}
+
+
+def test_full_read_over_budget_is_paged(workspace):
+    (workspace / "big.txt").write_text("baris\n" * 10, encoding="utf-8")
+
+    data = read("big.txt", max_bytes=12)["data"]
+
+    assert data["content"] == "baris\nbaris\n"
+    assert data["truncated"] and data["next_line"] == 3
+
+
+def test_line_range(workspace):
+    (workspace / "a.txt").write_text("1\n2\n3\n4\n", encoding="utf-8")
+
+    data = read("a.txt", start_line=2, end_line=3)["data"]
+
+    assert data["content"] == "2\n3\n"
+    assert (data["start_line"], data["end_line"], data["next_line"]) == (2, 3, 4)
+
+
+def test_byte_window_is_aligned_to_utf8_characters(workspace):
+    # 'é' dan '語' adalah karakter multi-byte; offset 2 dan panjang 4 memotong keduanya
+    (workspace / "u.txt").write_text("aé語b", encoding="utf-8")
+
+    data = read("u.txt", offset=2, length=4)["data"]
+
+    assert data["content"] == "語"
+    assert data["offset"] == 3
+    assert data["next_offset"] == 6
+
+
+def test_byte_window_end_does_not_split_a_character(workspace):
+    (workspace / "u.txt").write_text("aé語b", encoding="utf-8")
+
+    data = read("u.txt", offset=0, length=2)["data"]
+
+    assert data["content"] == "a"
+    assert data["next_offset"] == 1
+
+
+def test_line_index_is_rebuilt_after_the_file_changes(workspace):
+    path = workspace / "a.txt"
+    path.write_text("1\n2\n", encoding="utf-8")
+    assert read("a.txt", start_line=2)["data"]["total_lines"] == 2
+
+    path.write_text("1\n2\n3\n4\n", encoding="utf-8")
+    data = read("a.txt", start_line=3)["data"]
+
+    assert data["content"] == "3\n4\n"
+    assert data["total_lines"] == 4
+    assert "next_line" not in data
+
+
+def test_line_range_past_end_of_file_is_rejected(workspace):
+    (workspace / "a.txt").write_text("1\n2\n", encoding="utf-8")
+
+    result = read("a.txt", start_line=10)
+
+    assert result["success"] is False
+    assert "melebihi jumlah baris (2)" in result["data"]
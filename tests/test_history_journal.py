@@ -0,0 +1,68 @@
+import google.ai.generativelanguage as glm
+
+from agent_core.history_journal import HistoryJournal
+
+
+def text_content(role, text):
+    return glm.Content(role=role, parts=[glm.Part(text=text)])
+
+
+def test_append_after_truncated_record_keeps_new_records(tmp_path):
+    path = tmp_path / "history.jsonl"
+    journal = HistoryJournal(str(path))
+    journal.append_pending(0, text_content("user", "halo"), "input")
+    journal.close()
+    # Proses mati di tengah penulisan record berikutnya
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "message", "seq": 1, "role": "mo')
+
+    journal = HistoryJournal(str(path))
+    journal.append_message(1, text_content("model", "jawaban"))
+    journal.turn_end(2)
+    journal.close()
+
+    assert path.read_text(encoding="utf-8").endswith("\n")
+    state = journal.replay()
+    assert [message["parts"][0]["text"] for message in state.messages] == ["halo", "jawaban"]
+    assert state.last_control["seq"] == 2
+
+
+def write_turns(journal, count, text="x"):
+    seq = 0
+    for turn in range(count):
+        journal.append_pending(seq, text_content("user", f"tanya {turn} {text}"), "input")
+        journal.append_message(seq + 1, text_content("model", f"jawab {turn} {text}"))
+        seq += 2
+        journal.turn_end(seq)
+    return seq
+
+
+def test_load_tail_stops_at_a_turn_start_within_budget(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "history.jsonl"))
+    write_turns(journal, 10, text="x" * 400)
+    journal.close()
+
+    tail = journal.load_tail(token_budget=150)
+
+    texts = [message["parts"][0]["text"].split(" x")[0] for message in tail.messages]
+    assert tail.offset > 0 and tail.offset % 2 == 0
+    assert texts[0].startswith("tanya") and texts[-1] == "jawab 9"
+    assert [message["seq"] for message in tail.messages] == list(range(tail.offset, 20))
+    assert tail.last_control == {"type": "turn_end", "seq": 20}
+    assert journal.replay().messages[tail.offset:] == tail.messages
+
+
+def test_load_tail_applies_truncate_and_pending_checkpoint(tmp_path):
+    journal = HistoryJournal(str(tmp_path / "history.jsonl"))
+    seq = write_turns(journal, 2)
+    # Permintaan gagal: pesan ber-seq 4 dibatalkan, lalu input baru menunggu dikirim
+    journal.append_pending(seq, text_content("user", "gagal"), "input")
+    journal.truncate(seq)
+    journal.append_pending(seq, text_content("user", "baru"), "input")
+    journal.close()
+
+    tail = journal.load_tail(token_budget=10000)
+
+    assert [message["parts"][0]["text"] for message in tail.messages][-2:] == ["jawab 1 x", "baru"]
+    assert tail.offset == 0
+    assert tail.last_control["type"] == "checkpoint" and tail.last_control["seq"] == seq + 1
@@ -0,0 +1,52 @@
+import os
+import threading
+
+from config import DIREKTORI_BATASAN_AI
+from tools import internet_tools
+from tools.internet_tools import page_result
+
+# download_truncated=True agar page_result tidak menulis ke cache halaman
+UTF8_PAGE = "<html><body><main><p>Café naïve — 日本語</p></main></body></html>".encode("utf-8")
+
+
+def test_header_only_charset_is_used_for_html():
+    data = page_result("http://example.test/utf8", UTF8_PAGE, "text/html; charset=utf-8", True)
+    assert data["text"] == "Café naïve — 日本語"
+
+
+def test_undeclared_utf8_html_is_not_decoded_as_latin1():
+    data = page_result("http://example.test/bare", UTF8_PAGE, "text/html", True)
+    assert data["text"] == "Café naïve — 日本語"
+
+
+def test_header_charset_for_plain_text():
+    data = page_result("http://example.test/latin1", "café".encode("latin-1"), "text/plain; charset=iso-8859-1", True)
+    assert data["text"] == "café"
+
+
+def test_page_cache_lives_outside_workspace():
+    cache_directory = os.path.abspath(internet_tools.page_cache.directory)
+    assert not cache_directory.startswith(DIREKTORI_BATASAN_AI + os.sep)
+
+
+def test_searches_from_different_threads_run_concurrently(monkeypatch):
+    both_started = threading.Barrier(2, timeout=5)
+
+    class FakeDDGS:
+        def text(self, query, max_results):
+            # Gagal dengan BrokenBarrierError jika pencarian diserialkan
+            both_started.wait()
+            return [{"title": query}]
+
+    monkeypatch.setattr(internet_tools, "DDGS", FakeDDGS)
+    results = []
+    workers = [
+        threading.Thread(target=lambda q=q: results.append(internet_tools._search_text(q, 1)))
+        for q in ("a", "b")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(results, key=str) == [[{"title": "a"}], [{"title": "b"}]]
@@ -0,0 +1,50 @@
+import json
+
+from tools.file_system_tools import list_tree
+
+
+def tree(*args, **kwargs):
+    return json.loads(list_tree(*args, **kwargs))["data"]
+
+
+def make_project(root):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "src" / "main.py").write_text("print(1)\n", encoding="utf-8")
+    (root / "src" / "pkg" / "util.py").write_text("", encoding="utf-8")
+    (root / "build.log").write_text("log\n", encoding="utf-8")
+    (root / "node_modules" / "dep").mkdir(parents=True)
+    (root / ".gitignore").write_text("*.log\n", encoding="utf-8")
+
+
+def test_entries_are_breadth_first_with_metadata(workspace):
+    make_project(workspace)
+
+    data = tree()
+
+    paths = [entry[0] for entry in data["entries"]]
+    assert paths == [".gitignore", "src/", "src/main.py", "src/pkg/", "src/pkg/util.py"]
+    assert data["columns"] == ["path", "type", "size", "mtime"]
+    assert data["entries"][2][1:3] == ["f", 9]
+    assert data["entries"][1][1:3] == ["d", None]
+    assert data["truncated"] is False
+
+
+def test_gitignore_and_default_dirs_can_be_disabled(workspace):
+    make_project(workspace)
+
+    paths = [entry[0] for entry in tree(respect_gitignore=False, skip_default_dirs=False)["entries"]]
+
+    assert "build.log" in paths and "node_modules/dep/" in paths
+
+
+def test_depth_entry_limits_and_include_filter(workspace):
+    make_project(workspace)
+
+    shallow = tree(max_depth=1)
+    assert [entry[0] for entry in shallow["entries"]] == [".gitignore", "src/"]
+    assert shallow["dirs_beyond_max_depth"] == 1
+
+    assert tree(max_entries=2)["truncated"] is True
+    assert [entry[0] for entry in tree(include=["*.py"])["entries"] if entry[1] == "f"] == [
+        "src/main.py", "src/pkg/util.py"
+    ]
@@ -0,0 +1,35 @@
+import asyncio
+import os
+import signal
+
+import main
+from agent_core.async_agent import AsyncAgent
+
+
+class FakeAgent:
+    cancel_all_tool_calls = AsyncAgent.cancel_all_tool_calls
+
+    def __init__(self):
+        self.pending_tool_calls = {}
+
+
+def test_ctrl_c_cancels_running_tool_calls_only():
+    previous_handler = signal.getsignal(signal.SIGINT)
+
+    async def scenario():
+        agent = FakeAgent()
+        tool_call = asyncio.create_task(asyncio.sleep(10))
+        agent.pending_tool_calls[1] = tool_call
+
+        async def interaction():
+            os.kill(os.getpid(), signal.SIGINT)
+            try:
+                await tool_call
+            except asyncio.CancelledError:
+                return "dibatalkan"
+            return "selesai"
+
+        return await main.run_cancellable(agent, interaction())
+
+    assert asyncio.run(scenario()) == "dibatalkan"
+    assert signal.getsignal(signal.SIGINT) is previous_handler
@@ -0,0 +1,68 @@
+import json
+import os
+
+from tools import execution_tools
+from utils import output_capture
+from utils.output_capture import OutputCapture
+
+
+def test_large_output_spills_to_log_with_head_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_capture, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    capture = OutputCapture("cmd-test", head_bytes=4, tail_bytes=4)
+    for chunk in (b"abcd", b"efgh", b"ijkl"):
+        capture.feed(chunk)
+    capture.close()
+
+    assert capture.truncated
+    assert capture.text().startswith("abcd") and capture.text().endswith("ijkl")
+    with open(os.path.join(tmp_path, capture.log_file), "rb") as f:
+        assert f.read() == b"abcdefghijkl"
+
+
+def test_feed_after_close_keeps_spilled_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_capture, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    capture = OutputCapture("cmd-late", head_bytes=2, tail_bytes=2)
+    capture.feed(b"0123456789")
+    capture.close()
+    text = capture.text()
+
+    capture.feed(b"late output")
+
+    assert capture.text() == text
+    with open(os.path.join(tmp_path, capture.log_file), "rb") as f:
+        assert f.read() == b"0123456789"
+
+
+def test_pipe_held_by_grandchild_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(execution_tools, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    monkeypatch.setattr(execution_tools, "PIPE_DRAIN_TIMEOUT_SECONDS", 0.3)
+
+    payload = execution_tools.run_command(["sh", "-c", "echo siap; sleep 3 &"], timeout=10)
+
+    assert payload["data"]["stdout"] == "siap\n"
+    assert "output_incomplete" in payload["data"]
+
+
+def test_execute_command_keeps_only_head_and_tail_of_large_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(execution_tools, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    monkeypatch.setattr(output_capture, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    # Anggaran head/tail terikat sebagai nilai default argumen, jadi konstruktornya dibungkus
+    monkeypatch.setattr(execution_tools, "OutputCapture", lambda label: OutputCapture(label, 16, 16))
+
+    result = json.loads(execution_tools.execute_command("seq", ["1", "2000"]))
+
+    data = result["data"]
+    assert result["success"] and data["stdout"].startswith("1\n2\n3\n")
+    assert data["stdout"].endswith("1999\n2000\n")
+    assert data["output_bytes"]["stdout"] > 1000 and "stderr" not in data["log_files"]
+    with open(os.path.join(tmp_path, data["log_files"]["stdout"]), encoding="utf-8") as f:
+        assert f.read() == "".join(f"{number}\n" for number in range(1, 2001))
+
+
+def test_small_output_is_returned_whole_without_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(execution_tools, "DIREKTORI_BATASAN_AI", str(tmp_path))
+
+    data = json.loads(execution_tools.execute_command("echo", ["halo"]))["data"]
+
+    assert data["stdout"] == "halo\n" and data["exit_code"] == 0
+    assert "log_files" not in data
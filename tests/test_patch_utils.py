@@ -0,0 +1,76 @@
+import json
+
+from tools.file_system_tools import apply_patch
+
+
+def test_removed_and_added_lines_that_look_like_file_headers(workspace):
+    (workspace / "notes.md").write_text("a\n-- x\nb\n", encoding="utf-8")
+    patch = "--- a/notes.md\n+++ b/notes.md\n@@ -1,3 +1,3 @@\n a\n--- x\n+++ y\n b\n"
+
+    result = json.loads(apply_patch(patch))
+
+    assert result["success"], result["data"]
+    assert (workspace / "notes.md").read_text(encoding="utf-8") == "a\n++ y\nb\n"
+
+
+def test_hunk_with_undercounted_header_is_still_read_to_next_header(workspace):
+    (workspace / "a.py").write_text("x = 1\ny = 2\n", encoding="utf-8")
+    patch = "--- a/a.py\n+++ b/a.py\n@@ -1,1 +1,1 @@\n-x = 1\n+x = 10\n-y = 2\n+y = 20\n"
+
+    assert json.loads(apply_patch(patch))["success"]
+    assert (workspace / "a.py").read_text(encoding="utf-8") == "x = 10\ny = 20\n"
+
+
+def test_search_block_matches_last_line_without_trailing_newline(workspace):
+    (workspace / "a.txt").write_text("first\nabc", encoding="utf-8")
+    patch = "a.txt\n<<<<<<< SEARCH\nabc\n=======\nxyz\n>>>>>>> REPLACE\n"
+
+    result = json.loads(apply_patch(patch))
+
+    assert result["success"], result["data"]
+    assert (workspace / "a.txt").read_text(encoding="utf-8") == "first\nxyz"
+
+
+def test_multi_file_diff_creates_modifies_and_deletes(workspace):
+    (workspace / "a.py").write_text("x = 1\ny = 2\nz = 3\n", encoding="utf-8")
+    (workspace / "old.txt").write_text("hapus\n", encoding="utf-8")
+    patch = (
+        "--- a/a.py\n+++ b/a.py\n@@ -2,1 +2,1 @@\n-y = 2\n+y = 20\n"
+        "--- /dev/null\n+++ b/pkg/new.py\n@@ -0,0 +1,2 @@\n+baru = True\n+selesai = True\n"
+        "--- a/old.txt\n+++ /dev/null\n@@ -1,1 +0,0 @@\n-hapus\n"
+    )
+
+    result = json.loads(apply_patch(patch))
+
+    assert result["success"], result["data"]
+    assert [(f["path"], f["action"]) for f in result["data"]["files"]] == [
+        ("a.py", "modified"), ("pkg/new.py", "created"), ("old.txt", "deleted")
+    ]
+    assert (workspace / "a.py").read_text(encoding="utf-8") == "x = 1\ny = 20\nz = 3\n"
+    assert (workspace / "pkg" / "new.py").read_text(encoding="utf-8") == "baru = True\nselesai = True\n"
+    assert not (workspace / "old.txt").exists()
+
+
+def test_patch_with_one_failing_file_changes_nothing(workspace):
+    (workspace / "a.txt").write_text("satu\n", encoding="utf-8")
+    (workspace / "b.txt").write_text("dua\n", encoding="utf-8")
+    patch = (
+        "a.txt\n<<<<<<< SEARCH\nsatu\n=======\nSATU\n>>>>>>> REPLACE\n"
+        "b.txt\n<<<<<<< SEARCH\ntiga\n=======\nTIGA\n>>>>>>> REPLACE\n"
+    )
+
+    result = json.loads(apply_patch(patch))
+
+    assert result["success"] is False
+    assert "b.txt" in result["data"]
+    assert (workspace / "a.txt").read_text(encoding="utf-8") == "satu\n"
+
+
+def test_dry_run_validates_without_writing(workspace):
+    (workspace / "a.txt").write_text("satu\n", encoding="utf-8")
+    patch = "a.txt\n<<<<<<< SEARCH\nsatu\n=======\nSATU\n>>>>>>> REPLACE\n"
+
+    result = json.loads(apply_patch(patch, dry_run=True))
+
+    assert result["success"] and result["data"]["files"][0]["lines_added"] == 1
+    assert (workspace / "a.txt").read_text(encoding="utf-8") == "satu\n"
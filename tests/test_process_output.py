@@ -0,0 +1,55 @@
+import json
+import os
+import time
+
+from tools import advanced_tools
+from utils import process_output
+from utils.process_output import ProcessOutput
+
+
+def test_rotated_log_segments_cover_output_since_their_offsets(tmp_path, monkeypatch):
+    monkeypatch.setattr(process_output, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    monkeypatch.setattr(process_output, "PROCESS_LOG_MAX_BYTES", 10)
+    monkeypatch.setattr(process_output, "PROCESS_LOG_BACKUPS", 1)
+    output = ProcessOutput("proc-test", buffer_bytes=4)
+    chunks = [b"aaaaaa", b"bbbbbb", b"cccccc", b"dddddd"]
+    for chunk in chunks:
+        output.feed(chunk)
+    output.close()
+    everything = b"".join(chunks)
+
+    segments = output.log_segments()
+
+    assert [segment["offset"] for segment in segments] == [12, 18]
+    for segment in segments:
+        with open(os.path.join(tmp_path, segment["path"]), "rb") as f:
+            data = f.read()
+        assert data == everything[segment["offset"]:segment["offset"] + len(data)]
+    read = output.read(0)
+    assert read["skipped_bytes"] == 20 and read["output"] == "dddd"
+
+
+def wait_until_finished(pid, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = json.loads(advanced_tools.read_process_output(pid, max_bytes=1))["data"]
+        if data["status"] == "selesai":
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"Proses {pid} tidak selesai")
+
+
+def test_chatty_background_process_is_drained_and_read_incrementally(tmp_path, monkeypatch):
+    monkeypatch.setattr(advanced_tools, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    monkeypatch.setattr(process_output, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    # Output jauh melebihi kapasitas pipe (64 KB); tanpa pengurasan proses akan macet
+    pid = json.loads(advanced_tools.start_background_process("seq", ["1", "30000"]))["data"]["pid"]
+    wait_until_finished(pid)
+
+    first = json.loads(advanced_tools.read_process_output(pid, 0, 6))["data"]
+    second = json.loads(advanced_tools.read_process_output(pid, first["next_offset"], 6))["data"]
+
+    assert first["output"] == "1\n2\n3\n" and second["output"] == "4\n5\n6\n"
+    assert first["exit_code"] == 0
+    assert first["total_bytes"] == sum(len(f"{number}\n") for number in range(1, 30001))
+    advanced_tools.stop_process(pid)
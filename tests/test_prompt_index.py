@@ -0,0 +1,38 @@
+import json
+import os
+
+from utils.prompt_index import PromptIndex
+
+
+def write_modules(directory):
+    (directory / "_inti.txt").write_text("Anda adalah agen pemrograman.", encoding="utf-8")
+    (directory / "docker.txt").write_text("Panduan menulis Dockerfile dan compose.", encoding="utf-8")
+    (directory / "git.txt").write_text("Panduan commit, branch, dan rebase.", encoding="utf-8")
+    (directory / "manifest.json").write_text(json.dumps({
+        "docker.txt": {"description": "Container", "keywords": ["docker", "container"]},
+        "git.txt": {"description": "Version control", "keywords": ["git", "commit"]},
+    }), encoding="utf-8")
+
+
+def test_only_modules_with_a_mentioned_keyword_are_selected(tmp_path):
+    write_modules(tmp_path)
+    index = PromptIndex(str(tmp_path))
+
+    assert index.select("tolong buat container docker untuk aplikasi") == ["docker.txt"]
+    assert index.select("buat fungsi fibonacci") == []
+    instruction = index.build_instruction(["git.txt"])
+    assert instruction.startswith("Anda adalah agen pemrograman.")
+    assert "rebase" in instruction and "Dockerfile" not in instruction
+
+
+def test_changed_module_is_reloaded(tmp_path):
+    write_modules(tmp_path)
+    index = PromptIndex(str(tmp_path))
+    assert "rebase" in index.get("git")
+
+    path = tmp_path / "git.txt"
+    path.write_text("Panduan cherry-pick.", encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert index.get("git") == "Panduan cherry-pick."
@@ -0,0 +1,59 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from agent_core import rate_limiter
+from agent_core.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    # Modul time diganti hanya untuk rate_limiter agar thread lain tetap tidur sungguhan
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=time.monotonic, sleep=recorded.append))
+    return recorded
+
+
+def test_quota_errors_are_retried_with_growing_backoff(sleeps):
+    limiter = RateLimiter(1000, max_retries=3, base_backoff=1, max_backoff=3)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 4:
+            raise google_exceptions.ResourceExhausted("quota")
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    # Jitter: setiap jeda berada di antara setengah dan seluruh backoff (dibatasi max_backoff)
+    assert [0.5 <= sleeps[0] <= 1, 1 <= sleeps[1] <= 2, 1.5 <= sleeps[2] <= 3] == [True] * 3
+
+
+def test_other_errors_and_exhausted_retries_are_raised(sleeps):
+    limiter = RateLimiter(1000, max_retries=1, base_backoff=1)
+
+    def broken():
+        raise ValueError("bukan kuota")
+
+    with pytest.raises(ValueError):
+        limiter.call(broken)
+    assert sleeps == []
+
+    def always_quota():
+        raise google_exceptions.TooManyRequests("429")
+
+    with pytest.raises(google_exceptions.TooManyRequests):
+        limiter.call(always_quota)
+    assert len(sleeps) == 1
+
+
+def test_requests_over_the_rpm_wait_for_the_window(sleeps):
+    limiter = RateLimiter(2)
+
+    for _ in range(3):
+        limiter.call(lambda: None)
+
+    assert len(sleeps) == 1
+    assert 59 < sleeps[0] <= rate_limiter.RATE_LIMIT_WINDOW_SECONDS
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+from utils.resource_usage import ResourceLedger, wait_for_exit
+
+
+def test_wait_for_exit_reports_child_cpu_and_exit_code():
+    burn = "sum(i * i for i in range(3000000)); raise SystemExit(3)"
+    process = subprocess.Popen([sys.executable, "-c", burn])
+
+    usage = wait_for_exit(process, timeout=30)
+
+    assert process.returncode == 3
+    assert usage.ru_utime + usage.ru_stime > 0.05
+    assert usage.ru_maxrss > 0
+
+
+def test_ledger_totals_and_rankings():
+    ledger = ResourceLedger()
+    ledger.record("make", 2.0)
+    ledger.record("make", 3.0)
+    entry = ledger.record("pytest", 1.0, cpu_times=(0.5, 0.25))
+
+    summary = ledger.summary()
+
+    assert entry == {"wall_seconds": 1.0, "user_cpu_seconds": 0.5, "sys_cpu_seconds": 0.25, "approximate": True}
+    assert summary["commands_run"] == 3
+    assert summary["total_wall_seconds"] == 6.0 and summary["total_cpu_seconds"] == 0.75
+    assert [item["command"] for item in summary["slowest"]] == ["make", "pytest"]
+    assert summary["slowest"][0]["runs"] == 2
+    assert summary["most_memory"] == []
@@ -0,0 +1,38 @@
+import json
+
+from tools import execution_tools
+
+
+def run(monkeypatch, tmp_path, commands, **kwargs):
+    monkeypatch.setattr(execution_tools, "DIREKTORI_BATASAN_AI", str(tmp_path))
+    monkeypatch.setattr(execution_tools, "RUN_COMMANDS_MAX_WORKERS", 4)
+    return json.loads(execution_tools.run_commands(commands, **kwargs))
+
+
+def test_commands_run_concurrently_and_results_keep_input_order(tmp_path, monkeypatch):
+    result = run(monkeypatch, tmp_path, [
+        {"command": "sh", "args": ["-c", "sleep 0.6; echo lambat"]},
+        {"command": "sh", "args": ["-c", "sleep 0.6; echo cepat"]},
+        {"command": "ls -la", "args": ["x"]},
+    ])
+
+    summary, results = result["data"]["summary"], result["data"]["results"]
+    assert [entry["index"] for entry in results] == [0, 1, 2]
+    assert results[0]["stdout"] == "lambat\n" and results[1]["stdout"] == "cepat\n"
+    assert "Kesalahan keamanan" in results[2]["error"]
+    assert (summary["total"], summary["succeeded"], summary["failed"]) == (3, 2, 1)
+    assert summary["duration_seconds"] < 1.1
+    assert result["success"] is False
+
+
+def test_fail_fast_stops_running_commands(tmp_path, monkeypatch):
+    result = run(monkeypatch, tmp_path, [
+        {"command": "sleep", "args": ["30"]},
+        {"command": "sh", "args": ["-c", "sleep 0.2; exit 1"]},
+    ], fail_fast=True)
+
+    summary, results = result["data"]["summary"], result["data"]["results"]
+    assert results[0]["cancelled"] is True and results[0]["exit_code"] == -9
+    assert results[1]["exit_code"] == 1 and "cancelled" not in results[1]
+    assert (summary["failed"], summary["cancelled"]) == (1, 1)
+    assert summary["duration_seconds"] < 10
@@ -0,0 +1,34 @@
+import os
+
+from utils.scratchpad_store import ScratchpadStore
+
+
+def remove_database(db_path):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def test_deleted_database_gets_schema_again(tmp_path):
+    db_path = str(tmp_path / ".scratchpad.db")
+    store = ScratchpadStore(db_path)
+    store.set("a", "1")
+    store.close()
+    remove_database(db_path)
+
+    store.set("b", "2")
+
+    assert store.get("b") == "2"
+    assert store.get("a") is None
+
+
+def test_writes_after_deletion_on_same_thread_are_kept(tmp_path):
+    db_path = str(tmp_path / ".scratchpad.db")
+    store = ScratchpadStore(db_path)
+    store.set("a", "1")
+    remove_database(db_path)
+
+    store.set("b", "2")
+
+    assert os.path.exists(db_path)
+    assert ScratchpadStore(db_path).get("b") == "2"
@@ -0,0 +1,23 @@
+import os
+
+from config import DIREKTORI_BATASAN_AI
+from tools import internet_tools
+from utils.search_cache import SearchCache
+
+
+def test_search_cache_lives_outside_workspace():
+    db_path = os.path.abspath(internet_tools.search_cache.database.db_path)
+    assert not db_path.startswith(DIREKTORI_BATASAN_AI + os.sep)
+
+
+def test_deleted_database_gets_schema_again(tmp_path):
+    db_path = str(tmp_path / "search.db")
+    cache = SearchCache(db_path, ttl_seconds=60, max_entries=10)
+    cache.put("Python  WAL", 5, [{"title": "a"}])
+    assert cache.get("python wal", 5) == [{"title": "a"}]
+    cache.database.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    assert cache.get("python wal", 5) is None
@@ -0,0 +1,40 @@
+from tools.internet_tools import page_view
+from utils.text_chunks import split_chunks, top_chunks
+
+PAGE = (
+    "Sejarah singkat kota dan pelabuhannya.\n"
+    "Instalasi: jalankan pip install paket lalu set variabel API_KEY.\n"
+    "Cuaca di musim hujan cukup lembap.\n"
+)
+
+
+def test_chunk_offsets_point_into_the_original_text():
+    text = "baris pertama\n" + "kata " * 40 + "\nakhir\n"
+
+    chunks = split_chunks(text, 60)
+
+    assert all(len(chunk) <= 60 for _, chunk in chunks)
+    for offset, chunk in chunks:
+        assert text[offset:offset + len(chunk)] == chunk
+
+
+def test_most_relevant_chunk_is_ranked_first():
+    chunks = top_chunks(PAGE, "cara install paket", top_k=1, max_chars=70)
+
+    assert len(chunks) == 1
+    assert chunks[0]["text"].startswith("Instalasi")
+    assert PAGE[chunks[0]["offset"]:].startswith("Instalasi")
+
+
+def test_page_view_without_query_pages_by_offset():
+    first = page_view(PAGE, max_chars=20)
+    second = page_view(PAGE, offset=first["next_offset"], max_chars=20)
+
+    assert first["text"] + second["text"] == PAGE[:40]
+    assert first["text_truncated"] and first["total_chars"] == len(PAGE)
+
+
+def test_query_without_matches_adds_a_note():
+    data = page_view(PAGE, query="kuantum")
+
+    assert data["chunks"] == [] and "note" in data
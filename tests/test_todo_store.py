@@ -0,0 +1,37 @@
+import os
+import threading
+
+from utils.todo_store import TODO_STATUS_PENDING, TodoStore
+
+
+def test_deleted_database_gets_schema_again_on_new_thread(tmp_path):
+    db_path = str(tmp_path / ".todo.db")
+    store = TodoStore(db_path)
+    store.add_many(["lama"])
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    # Tool dijalankan di thread pool; thread baru membuka koneksi baru
+    result = []
+    worker = threading.Thread(target=lambda: result.append(store.add_many(["baru"])))
+    worker.start()
+    worker.join()
+
+    assert result == [[1]]
+    assert os.path.exists(db_path)
+    assert TodoStore(db_path).list(TODO_STATUS_PENDING) == [{"id": 1, "text": "baru", "status": TODO_STATUS_PENDING}]
+
+
+def test_todos_added_after_deletion_on_same_thread_are_kept(tmp_path):
+    db_path = str(tmp_path / ".todo.db")
+    store = TodoStore(db_path)
+    store.add_many(["lama"])
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    store.add_many(["baru"])
+
+    assert os.path.exists(db_path)
+    assert [item["text"] for item in TodoStore(db_path).list()] == ["baru"]
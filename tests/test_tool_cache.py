@@ -0,0 +1,64 @@
+import json
+import os
+
+from agent_core.tool_cache import ToolResultCache
+
+
+def counting_tool(calls):
+    def tool(**kwargs):
+        calls.append(kwargs)
+        return json.dumps({"success": True, "data": len(calls)})
+    return tool
+
+
+def test_read_is_served_from_cache_until_a_write_touches_its_path(workspace):
+    (workspace / "a.txt").write_text("satu", encoding="utf-8")
+    cache = ToolResultCache(policies={"read_file": 60})
+    calls = []
+    read = counting_tool(calls)
+
+    first = cache.call("read_file", {"filename": "a.txt"}, read)
+    assert cache.call("read_file", {"filename": "a.txt"}, read) == first
+    assert len(calls) == 1
+
+    cache.call("write_file", {"filename": "a.txt", "content": "satu"}, counting_tool([]))
+    cache.call("read_file", {"filename": "a.txt"}, read)
+
+    assert len(calls) == 2
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_change_outside_the_agent_misses_through_the_fingerprint(workspace):
+    path = workspace / "a.txt"
+    path.write_text("satu", encoding="utf-8")
+    cache = ToolResultCache(policies={"read_file": 60})
+    calls = []
+    read = counting_tool(calls)
+    cache.call("read_file", {"filename": "a.txt"}, read)
+
+    path.write_text("dua!", encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    cache.call("read_file", {"filename": "a.txt"}, read)
+
+    assert len(calls) == 2
+
+
+def test_failures_and_expired_entries_are_not_reused(workspace):
+    cache = ToolResultCache(policies={"read_file": 0})
+    calls = []
+    read = counting_tool(calls)
+    cache.call("read_file", {"filename": "a.txt"}, read)
+    cache.call("read_file", {"filename": "a.txt"}, read)
+    assert len(calls) == 2
+
+    cache = ToolResultCache(policies={"read_file": 60})
+    failing = []
+
+    def broken(**kwargs):
+        failing.append(kwargs)
+        return json.dumps({"success": False, "data": "tidak ditemukan"})
+
+    cache.call("read_file", {"filename": "b.txt"}, broken)
+    cache.call("read_file", {"filename": "b.txt"}, broken)
+    assert len(failing) == 2
@@ -0,0 +1,59 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from agent_core.tool_dispatcher import EXCLUSIVE, ToolDispatcher, calls_conflict, get_call_resources
+
+
+def call(name, **args):
+    return SimpleNamespace(name=name, args=args)
+
+
+def resources(tool_call):
+    return get_call_resources(tool_call.name, tool_call.args)
+
+
+def test_reads_do_not_conflict_but_write_to_parent_does(workspace):
+    read_a = resources(call("read_file", filename="src/a.txt"))
+    read_b = resources(call("read_file", filename="src/b.txt"))
+    write_dir = resources(call("create_directory", path="src"))
+
+    assert not calls_conflict(read_a, read_b)
+    assert calls_conflict(write_dir, read_a)
+    assert calls_conflict(read_a, write_dir)
+
+
+def test_unknown_tools_are_exclusive(workspace):
+    _, writes = resources(call("execute_command", command="ls"))
+
+    assert writes == {EXCLUSIVE}
+    assert calls_conflict(resources(call("read_file", filename="a.txt")), (set(), writes))
+
+
+def test_conflicting_calls_keep_model_order(workspace):
+    events = []
+    lock = threading.Lock()
+
+    def execute(tool_call):
+        with lock:
+            events.append(("start", tool_call.args["filename"], tool_call.name))
+        if tool_call.name == "write_file":
+            time.sleep(0.2)
+        with lock:
+            events.append(("end", tool_call.args["filename"], tool_call.name))
+        return tool_call.name + ":" + tool_call.args["filename"]
+
+    dispatcher = ToolDispatcher(execute, max_workers=4)
+    try:
+        results = dispatcher.dispatch([
+            call("write_file", filename="a.txt", content="x"),
+            call("read_file", filename="a.txt"),
+            call("read_file", filename="b.txt"),
+        ])
+    finally:
+        dispatcher.shutdown()
+
+    assert results == ["write_file:a.txt", "read_file:a.txt", "read_file:b.txt"]
+    # Baca a.txt menunggu tulisannya selesai; baca b.txt tidak perlu menunggu
+    assert events.index(("end", "a.txt", "write_file")) < events.index(("start", "a.txt", "read_file"))
+    assert events.index(("end", "b.txt", "read_file")) < events.index(("end", "a.txt", "write_file"))
@@ -0,0 +1,35 @@
+import re
+
+from utils.trigram_index import TrigramIndex, regex_required_literals, scan_large_file, search_file
+
+
+def test_quantifier_braces_are_not_literals():
+    assert regex_required_literals("error{1,3}") == ["erro"]
+    assert regex_required_literals("xyzb{0,2}abc") == ["xyz", "abc"]
+    assert regex_required_literals("foo(bar){2}baz") == ["foo", "baz"]
+
+
+def test_quantified_regex_finds_matching_file(tmp_path):
+    target = tmp_path / "log.txt"
+    target.write_text("xyzabc\nerrorrr\n", encoding="utf-8")
+    (tmp_path / "other.txt").write_text("nothing here\n", encoding="utf-8")
+    index = TrigramIndex(root=str(tmp_path))
+    index.refresh()
+
+    for pattern in ("xyzb{0,2}abc", "error{1,3}"):
+        candidates = index.candidates(regex_required_literals(pattern))
+        assert candidates == [str(target)]
+        assert search_file(candidates[0], re.compile(pattern), 0, 200, 10)
+
+
+def test_oversized_text_file_is_scanned_line_by_line(tmp_path):
+    big = tmp_path / "big.log"
+    big.write_text("awal\nneedle di sini\nakhir\n", encoding="utf-8")
+    (tmp_path / "big.bin").write_bytes(b"\0" * 64)
+    index = TrigramIndex(root=str(tmp_path), max_file_bytes=8)
+    index.refresh()
+
+    assert index.candidates(["needle"]) == []
+    assert index.oversized_files() == [str(big)]
+    matches = scan_large_file(str(big), re.compile("needle"), 1, 200, 10)
+    assert matches == [{"line": 2, "text": "needle di sini", "before": ["awal"], "after": ["akhir"]}]
@@ -1,6 +1,10 @@
 from . import advanced_tools
+from . import async_tools
 from . import control_tools
 from . import execution_tools
 from . import file_system_tools
 from . import internet_tools
+from . import knowledge_tools
+from . import memory_tools
+from . import search_tools
 from . import todo_manager_tools
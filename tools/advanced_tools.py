@@ -4,28 +4,33 @@ import json
 import os
 import subprocess
 import shlex
+import threading
+import time
+
+from config import (
+    DIREKTORI_BATASAN_AI,
+    PROCESS_READ_DEFAULT_MAX_BYTES,
+    PROCESS_STATUS_TAIL_BYTES,
+    PROCESS_RETENTION_SECONDS,
+    PROCESS_REAPER_INTERVAL_SECONDS,
+)
+from utils.output_capture import drain_pipe, new_log_label
+from utils.process_output import ProcessOutput
+from utils.resource_usage import wait_for_exit, stop_child, get_session_ledger
+from utils.scratchpad_store import ScratchpadStore
+from tools.execution_tools import PIPE_DRAIN_TIMEOUT_SECONDS
 
-from config import DIREKTORI_BATASAN_AI
-
-SCRATCHPAD_FILE = os.path.join(DIREKTORI_BATASAN_AI, ".scratchpad.json")
-
+SCRATCHPAD_FILE = os.path.join(DIREKTORI_BATASAN_AI, ".scratchpad.db")
+# Scratchpad format lama; isinya diimpor otomatis saat database pertama kali dibuat
+LEGACY_SCRATCHPAD_FILE = os.path.join(DIREKTORI_BATASAN_AI, ".scratchpad.json")
+SCRATCHPAD_LIST_DEFAULT_LIMIT = 100
 
-def _read_scratchpad_data():
-    if not os.path.exists(SCRATCHPAD_FILE):
-        return {}
-    try:
-        with open(SCRATCHPAD_FILE, "r") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
+_scratchpad = ScratchpadStore(SCRATCHPAD_FILE, legacy_json_path=LEGACY_SCRATCHPAD_FILE)
 
 
 def write_to_scratchpad(key: str, value: str):
     try:
-        data = _read_scratchpad_data()
-        data[key] = value
-        with open(SCRATCHPAD_FILE, "w") as f:
-            json.dump(data, f, indent=2)
+        _scratchpad.set(key, value)
         return json.dumps(
             {
                 "success": True,
@@ -39,8 +44,12 @@ def write_to_scratchpad(key: str, value: str):
 
 
 def read_from_scratchpad(key: str):
-    data = _read_scratchpad_data()
-    value = data.get(key)
+    try:
+        value = _scratchpad.get(key)
+    except Exception as e:
+        return json.dumps(
+            {"success": False, "data": f"Gagal membaca dari scratchpad: {e}"}
+        )
     if value is not None:
         return json.dumps({"success": True, "data": value})
     else:
@@ -52,7 +61,115 @@ def read_from_scratchpad(key: str):
         )
 
 
+def write_many_to_scratchpad(entries: list):
+    try:
+        items = [(entry["key"], entry["value"]) for entry in entries]
+        count = _scratchpad.set_many(items)
+        return json.dumps(
+            {"success": True, "data": f"{count} kunci berhasil disimpan ke scratchpad."}
+        )
+    except Exception as e:
+        return json.dumps(
+            {"success": False, "data": f"Gagal menulis ke scratchpad: {e}"}
+        )
+
+
+def read_many_from_scratchpad(keys: list):
+    try:
+        found = _scratchpad.get_many(keys)
+    except Exception as e:
+        return json.dumps(
+            {"success": False, "data": f"Gagal membaca dari scratchpad: {e}"}
+        )
+    missing = [key for key in keys if key not in found]
+    return json.dumps({"success": True, "data": {"values": found, "missing": missing}})
+
+
+def list_scratchpad_keys(prefix: str = "", limit: int = SCRATCHPAD_LIST_DEFAULT_LIMIT):
+    try:
+        keys, total = _scratchpad.list_keys(prefix, limit=max(1, int(limit)))
+    except Exception as e:
+        return json.dumps(
+            {"success": False, "data": f"Gagal membaca daftar kunci scratchpad: {e}"}
+        )
+    return json.dumps(
+        {"success": True, "data": {"keys": keys, "total": total, "truncated": total > len(keys)}}
+    )
+
+
+class BackgroundProcess:
+    def __init__(self, process, command, output):
+        self.process = process
+        self.command = command
+        self.output = output
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.exit_code = None
+        self.resource_usage = None
+        self.reader = None
+        self.waiter = None
+
+    @property
+    def running(self):
+        # Jangan memakai process.poll(): waitpid di sana akan memanen proses
+        # sebelum waiter sempat membaca rusage-nya lewat wait4.
+        return self.exit_code is None
+
+
+# {pid: BackgroundProcess}
 BACKGROUND_PROCESSES = {}
+_processes_lock = threading.Lock()
+_reaper_thread = None
+
+
+def _reader_loop(entry):
+    # Output dikuras terus-menerus agar pipe 64 KB tidak pernah penuh dan
+    # proses yang banyak menulis (mis. dev server) tidak macet.
+    drain_pipe(entry.process.stdout, entry.output)
+    entry.output.close()
+
+
+def _waiter_loop(entry):
+    usage = wait_for_exit(entry.process)
+    entry.resource_usage = get_session_ledger().record(
+        entry.command, time.monotonic() - entry.started_at, usage=usage
+    )
+    entry.exit_code = entry.process.returncode
+    entry.reader.join(PIPE_DRAIN_TIMEOUT_SECONDS)
+    entry.finished_at = time.monotonic()
+
+
+def _reap_finished_processes():
+    now = time.monotonic()
+    with _processes_lock:
+        for pid, entry in list(BACKGROUND_PROCESSES.items()):
+            # Proses yang selesai tetap disimpan sebentar agar output akhirnya masih bisa dibaca
+            if entry.finished_at is not None and now - entry.finished_at >= PROCESS_RETENTION_SECONDS:
+                del BACKGROUND_PROCESSES[pid]
+
+
+def _reaper_loop():
+    while True:
+        time.sleep(PROCESS_REAPER_INTERVAL_SECONDS)
+        _reap_finished_processes()
+
+
+def _ensure_reaper():
+    global _reaper_thread
+    with _processes_lock:
+        if _reaper_thread is None:
+            _reaper_thread = threading.Thread(target=_reaper_loop, name="han-process-reaper", daemon=True)
+            _reaper_thread.start()
+
+
+def _get_process(pid):
+    with _processes_lock:
+        return BACKGROUND_PROCESSES.get(int(pid))
+
+
+def _forget_process(pid):
+    with _processes_lock:
+        BACKGROUND_PROCESSES.pop(int(pid), None)
 
 
 def start_background_process(command: str, args: list = None):
@@ -65,18 +182,24 @@ def start_background_process(command: str, args: list = None):
             cwd=DIREKTORI_BATASAN_AI,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+            stderr=subprocess.STDOUT,
             shell=False,
         )
         pid = process.pid
-        BACKGROUND_PROCESSES[pid] = process
+        entry = BackgroundProcess(process, shlex.join(full_command), ProcessOutput(new_log_label(f"proc-{pid}")))
+        entry.reader = threading.Thread(target=_reader_loop, args=(entry,), name=f"han-proc-{pid}", daemon=True)
+        entry.reader.start()
+        entry.waiter = threading.Thread(target=_waiter_loop, args=(entry,), name=f"han-wait-{pid}", daemon=True)
+        entry.waiter.start()
+        with _processes_lock:
+            BACKGROUND_PROCESSES[pid] = entry
+        _ensure_reaper()
         return json.dumps(
             {
                 "success": True,
                 "data": {
                     "pid": pid,
-                    "message": f"Proses '{shlex.join(full_command)}' dimulai di latar belakang dengan PID {pid}.",
+                    "message": f"Proses '{entry.command}' dimulai di latar belakang dengan PID {pid}. Gunakan read_process_output untuk membaca output-nya (stderr digabung ke stdout).",
                 },
             }
         )
@@ -88,7 +211,8 @@ def start_background_process(command: str, args: list = None):
 
 def send_input_to_process(pid: int, input_string: str):
     pid = int(pid)
-    if pid not in BACKGROUND_PROCESSES:
+    entry = _get_process(pid)
+    if entry is None:
         return json.dumps(
             {
                 "success": False,
@@ -96,9 +220,7 @@ def send_input_to_process(pid: int, input_string: str):
             }
         )
 
-    process = BACKGROUND_PROCESSES[pid]
-    if process.poll() is not None:
-        del BACKGROUND_PROCESSES[pid]
+    if not entry.running:
         return json.dumps(
             {
                 "success": False,
@@ -110,8 +232,8 @@ def send_input_to_process(pid: int, input_string: str):
         full_input = (
             input_string if input_string.endswith("\n") else input_string + "\n"
         )
-        process.stdin.write(full_input)
-        process.stdin.flush()
+        entry.process.stdin.write(full_input.encode("utf-8"))
+        entry.process.stdin.flush()
         return json.dumps(
             {"success": True, "data": f"Input berhasil dikirim ke proses PID {pid}."}
         )
@@ -121,9 +243,10 @@ def send_input_to_process(pid: int, input_string: str):
         )
 
 
-def check_process_status(pid: int):
+def read_process_output(pid: int, since_offset: int = 0, max_bytes: int = PROCESS_READ_DEFAULT_MAX_BYTES):
     pid = int(pid)
-    if pid not in BACKGROUND_PROCESSES:
+    entry = _get_process(pid)
+    if entry is None:
         return json.dumps(
             {
                 "success": False,
@@ -131,38 +254,72 @@ def check_process_status(pid: int):
             }
         )
 
-    process = BACKGROUND_PROCESSES[pid]
-    return_code = process.poll()
+    return_code = entry.exit_code
+    if return_code is not None and entry.reader is not None:
+        entry.reader.join(timeout=1)
+    response_data = entry.output.read(since_offset, max_bytes)
+    response_data["pid"] = pid
+    response_data["status"] = "berjalan" if return_code is None else "selesai"
+    response_data["exit_code"] = return_code
+    if entry.resource_usage is not None:
+        response_data["resource_usage"] = entry.resource_usage
+    response_data["log_file"] = entry.output.log_file
+    if response_data["skipped_bytes"]:
+        segments = entry.output.log_segments()
+        response_data["log_files"] = segments
+        requested = response_data["offset"] - response_data["skipped_bytes"]
+        if segments and requested >= segments[0]["offset"]:
+            response_data["note"] = (
+                "Sebagian output lama sudah keluar dari buffer memori; bagian itu ada di log_files "
+                "(urut dari yang terlama, 'offset' = offset byte pertama tiap file)."
+            )
+        else:
+            oldest = segments[0]["offset"] if segments else response_data["offset"]
+            response_data["note"] = (
+                f"Output sebelum offset {oldest} sudah terbuang karena log berotasi; "
+                "log_files hanya berisi output sejak offset itu."
+            )
+    return json.dumps({"success": True, "data": response_data})
 
-    stdout_res = ""
-    stderr_res = ""
+
+def check_process_status(pid: int):
+    pid = int(pid)
+    entry = _get_process(pid)
+    if entry is None:
+        return json.dumps(
+            {
+                "success": False,
+                "data": f"Tidak ada proses latar belakang dengan PID {pid} yang ditemukan.",
+            }
+        )
+
+    return_code = entry.exit_code
+    if return_code is not None and entry.reader is not None:
+        # Pastikan sisa output terakhir sudah masuk ke buffer
+        entry.reader.join(timeout=1)
+    tail = entry.output.tail(PROCESS_STATUS_TAIL_BYTES)
 
     response_data = {
         "pid": pid,
+        "command": entry.command,
         "status": "berjalan" if return_code is None else "selesai",
         "exit_code": return_code,
-        "stdout": stdout_res,
-        "stderr": stderr_res,
-        "note": "Untuk output real-time, periksa file log yang dibuat oleh proses. Tool ini hanya akan menampilkan output lengkap setelah proses selesai.",
+        "output_tail": tail["output"],
+        "total_bytes": tail["total_bytes"],
+        "next_offset": tail["next_offset"],
+        "log_file": entry.output.log_file,
     }
-
-    if return_code is not None:
-        try:
-            stdout_res, stderr_res = process.communicate(timeout=5)
-            response_data["stdout"] = stdout_res
-            response_data["stderr"] = stderr_res
-        except Exception:
-            response_data["stdout"] = "(gagal membaca stdout akhir)"
-            response_data["stderr"] = "(gagal membaca stderr akhir)"
-
-        del BACKGROUND_PROCESSES[pid]
-
+    if entry.resource_usage is not None:
+        response_data["resource_usage"] = entry.resource_usage
+    else:
+        response_data["elapsed_seconds"] = round(time.monotonic() - entry.started_at, 3)
     return json.dumps({"success": True, "data": response_data})
 
 
 def stop_process(pid: int):
     pid = int(pid)
-    if pid not in BACKGROUND_PROCESSES:
+    entry = _get_process(pid)
+    if entry is None:
         return json.dumps(
             {
                 "success": False,
@@ -170,36 +327,36 @@ def stop_process(pid: int):
             }
         )
 
+    process = entry.process
     try:
-        process = BACKGROUND_PROCESSES[pid]
-        process.terminate()
-        process.wait(timeout=5)
-        del BACKGROUND_PROCESSES[pid]
-        return json.dumps(
-            {"success": True, "data": f"Proses dengan PID {pid} berhasil dihentikan."}
-        )
-    except subprocess.TimeoutExpired:
-        process.kill()
-        process.wait()
-        del BACKGROUND_PROCESSES[pid]
-        return json.dumps(
-            {
-                "success": True,
-                "data": f"Proses dengan PID {pid} dihentikan secara paksa (kill).",
-            }
-        )
-    except Exception as e:
-        if pid not in BACKGROUND_PROCESSES:
+        if not entry.running:
+            _forget_process(pid)
             return json.dumps(
                 {"success": True, "data": f"Proses PID {pid} sudah tidak berjalan."}
             )
+        # Proses hanya dipanen oleh thread waiter agar rusage-nya tetap tercatat
+        stop_child(process)
+        entry.waiter.join(timeout=5)
+        message = f"Proses dengan PID {pid} berhasil dihentikan."
+        if entry.waiter.is_alive():
+            stop_child(process, force=True)
+            entry.waiter.join()
+            message = f"Proses dengan PID {pid} dihentikan secara paksa (kill)."
+        _forget_process(pid)
+        return json.dumps(
+            {"success": True, "data": {"message": message, "resource_usage": entry.resource_usage}}
+        )
+    except Exception as e:
         return json.dumps(
             {"success": False, "data": f"Gagal menghentikan proses PID {pid}: {e}"}
         )
 
 
 def list_running_processes():
-    if not BACKGROUND_PROCESSES:
+    _reap_finished_processes()
+    with _processes_lock:
+        entries = dict(BACKGROUND_PROCESSES)
+    if not entries:
         return json.dumps(
             {
                 "success": True,
@@ -207,8 +364,12 @@ def list_running_processes():
             }
         )
 
-    active_pids = list(BACKGROUND_PROCESSES.keys())
-    return json.dumps({"success": True, "data": {"active_pids": active_pids}})
+    active_pids = [pid for pid, entry in entries.items() if entry.running]
+    finished_pids = [pid for pid in entries if pid not in active_pids]
+    data = {"active_pids": active_pids}
+    if finished_pids:
+        data["finished_pids"] = finished_pids
+    return json.dumps({"success": True, "data": data})
 
 
 advanced_tool_definitions = glm.Tool(
@@ -234,9 +395,57 @@ advanced_tool_definitions = glm.Tool(
                 required=["key"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="write_many_to_scratchpad",
+            description="Menyimpan banyak pasangan kunci-nilai ke memori jangka pendek dalam satu operasi.",
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "entries": glm.Schema(
+                        type=Type.ARRAY,
+                        items=glm.Schema(
+                            type=Type.OBJECT,
+                            properties={
+                                "key": glm.Schema(type=Type.STRING),
+                                "value": glm.Schema(type=Type.STRING),
+                            },
+                            required=["key", "value"],
+                        ),
+                    )
+                },
+                required=["entries"],
+            ),
+        ),
+        glm.FunctionDeclaration(
+            name="read_many_from_scratchpad",
+            description="Membaca beberapa kunci sekaligus dari memori jangka pendek. Mengembalikan 'values' dan daftar kunci yang tidak ada ('missing').",
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "keys": glm.Schema(type=Type.ARRAY, items=glm.Schema(type=Type.STRING))
+                },
+                required=["keys"],
+            ),
+        ),
+        glm.FunctionDeclaration(
+            name="list_scratchpad_keys",
+            description="Melihat daftar kunci di memori jangka pendek, bisa difilter dengan awalan (prefix), misalnya 'build/'.",
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "prefix": glm.Schema(
+                        type=Type.STRING, description="Awalan kunci (default: semua kunci)."
+                    ),
+                    "limit": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah kunci maksimum (default: {SCRATCHPAD_LIST_DEFAULT_LIMIT}).",
+                    ),
+                },
+            ),
+        ),
         glm.FunctionDeclaration(
             name="start_background_process",
-            description="Memulai perintah di latar belakang (misalnya server atau skrip interaktif) dan mengembalikan PID.",
+            description="Memulai perintah di latar belakang (misalnya server atau skrip interaktif) dan mengembalikan PID. stderr proses digabung ke stdout dalam satu aliran output.",
             parameters=glm.Schema(
                 type=Type.OBJECT,
                 properties={
@@ -262,13 +471,35 @@ advanced_tool_definitions = glm.Tool(
         ),
         glm.FunctionDeclaration(
             name="check_process_status",
-            description="Memeriksa status (berjalan/selesai) dan output dari proses latar belakang yang sudah selesai.",
+            description="Memeriksa status (berjalan/selesai), exit code, dan potongan output terakhir dari proses latar belakang.",
             parameters=glm.Schema(
                 type=Type.OBJECT,
                 properties={"pid": glm.Schema(type=Type.NUMBER)},
                 required=["pid"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="read_process_output",
+            description=(
+                "Membaca output proses latar belakang secara bertahap; stderr digabung ke stdout sehingga urutannya "
+                "sesuai waktu penulisan dan keduanya tidak bisa dibedakan. Berikan 'since_offset' dari "
+                "'next_offset' panggilan sebelumnya untuk hanya mendapatkan output baru."
+            ),
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "pid": glm.Schema(type=Type.NUMBER),
+                    "since_offset": glm.Schema(
+                        type=Type.INTEGER, description="Offset byte awal (default: 0)."
+                    ),
+                    "max_bytes": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah byte maksimum (default: {PROCESS_READ_DEFAULT_MAX_BYTES}).",
+                    ),
+                },
+                required=["pid"],
+            ),
+        ),
         glm.FunctionDeclaration(
             name="stop_process",
             description="Menghentikan proses latar belakang berdasarkan PID-nya.",
@@ -289,9 +520,13 @@ advanced_tool_definitions = glm.Tool(
 advanced_functions = {
     "write_to_scratchpad": write_to_scratchpad,
     "read_from_scratchpad": read_from_scratchpad,
+    "write_many_to_scratchpad": write_many_to_scratchpad,
+    "read_many_from_scratchpad": read_many_from_scratchpad,
+    "list_scratchpad_keys": list_scratchpad_keys,
     "start_background_process": start_background_process,
     "send_input_to_process": send_input_to_process,
     "check_process_status": check_process_status,
+    "read_process_output": read_process_output,
     "stop_process": stop_process,
     "list_running_processes": list_running_processes,
 }
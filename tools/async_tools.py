@@ -0,0 +1,192 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from config import DIREKTORI_BATASAN_AI
+from tools.execution_tools import build_command, shlex_join, new_output_captures, command_result
+from utils.output_capture import READ_CHUNK_BYTES
+from utils.resource_usage import children_cpu_times
+from tools.internet_tools import (
+    REQUEST_HEADERS,
+    REQUEST_TIMEOUT_SECONDS,
+    FETCH_CHUNK_BYTES,
+    FETCH_MAX_BYTES,
+    FETCH_QUERY_TOP_K,
+    page_cache,
+    unsupported_content_type,
+    page_result,
+    cached_page_result,
+)
+from utils.http_cache import conditional_headers
+
+# Adaptor asinkron untuk tool yang berbasis I/O. Tool lain dijalankan oleh
+# AsyncAgent melalui asyncio.to_thread.
+
+_http_session = None
+_http_session_loop = None
+
+
+async def _get_http_session():
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(headers=REQUEST_HEADERS)
+        _http_session_loop = loop
+    return _http_session
+
+
+async def close_http_session():
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+async def _kill_process(process):
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+async def _drain_stream(stream, capture):
+    while True:
+        chunk = await stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        capture.feed(chunk)
+
+
+async def execute_command(command, args=None, timeout=60):
+    full_command, error_msg = build_command(command, args)
+    if error_msg:
+        return json.dumps({"success": False, "data": error_msg})
+
+    try:
+        started = time.perf_counter()
+        # Child watcher asyncio memanen proses dengan waitpid, jadi rusage per proses
+        # tidak tersedia; waktu CPU diperkirakan dari selisih RUSAGE_CHILDREN.
+        cpu_before = children_cpu_times()
+        process = await asyncio.create_subprocess_exec(
+            *full_command,
+            cwd=DIREKTORI_BATASAN_AI,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        error_msg = f"Error: Perintah '{command}' tidak ditemukan. Pastikan program terinstal dan berada di dalam PATH sistem, atau gunakan path absolut."
+        return json.dumps({"success": False, "data": error_msg})
+    except Exception as e:
+        return json.dumps(
+            {
+                "success": False,
+                "data": f"Gagal mengeksekusi perintah '{shlex_join(full_command)}': {e}",
+            }
+        )
+
+    captures = new_output_captures()
+    timed_out = False
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                _drain_stream(process.stdout, captures["stdout"]),
+                _drain_stream(process.stderr, captures["stderr"]),
+                process.wait(),
+            ),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        await _kill_process(process)
+        timed_out = True
+    except asyncio.CancelledError:
+        # Pembatalan tool call juga menghentikan proses anaknya
+        await _kill_process(process)
+        for capture in captures.values():
+            capture.close()
+        raise
+
+    cpu_after = children_cpu_times()
+    cpu_times = None
+    if cpu_before is not None and cpu_after is not None:
+        cpu_times = (cpu_after[0] - cpu_before[0], cpu_after[1] - cpu_before[1])
+    return command_result(
+        full_command, captures, process.returncode, started, timeout, timed_out, cpu_times=cpu_times
+    )
+
+
+async def install_python_package(package_name):
+    results = {}
+    for installer in ("pip3", "pip"):
+        result = json.loads(await execute_command(installer, ["install", package_name]))
+        if result["success"]:
+            return json.dumps(
+                {
+                    "success": True,
+                    "data": f"Paket '{package_name}' berhasil diinstal menggunakan {installer}. Output: {result['data']}",
+                }
+            )
+        results[installer] = result["data"]
+
+    return json.dumps(
+        {
+            "success": False,
+            "data": f"Gagal menginstal paket '{package_name}'.\nOutput pip3: {results['pip3']}\nOutput pip: {results['pip']}",
+        }
+    )
+
+
+async def fetch_webpage_content(url: str, query: str = None, top_k: int = FETCH_QUERY_TOP_K, offset: int = 0):
+    view = {"query": query, "top_k": top_k, "offset": offset}
+    try:
+        cached = await asyncio.to_thread(page_cache.load, url)
+        session = await _get_http_session()
+        async with session.get(
+            url,
+            headers=conditional_headers(cached),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        ) as response:
+            if response.status == 304 and cached:
+                await asyncio.to_thread(page_cache.touch, url)
+                return json.dumps({"success": True, "data": cached_page_result(cached, view)})
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            error = unsupported_content_type(content_type)
+            if error:
+                return json.dumps({"success": False, "data": error})
+
+            content = bytearray()
+            truncated = False
+            async for chunk in response.content.iter_chunked(FETCH_CHUNK_BYTES):
+                content += chunk
+                if len(content) > FETCH_MAX_BYTES:
+                    truncated = True
+                    break
+            validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+        # Parsing HTML bersifat CPU-bound, jadi dijalankan di luar event loop
+        data = await asyncio.to_thread(
+            page_result, url, bytes(content[:FETCH_MAX_BYTES]), content_type, truncated, *validators, view=view
+        )
+        return json.dumps({"success": True, "data": data})
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return json.dumps(
+            {"success": False, "data": f"Gagal mengambil konten dari URL '{url}': {e}"}
+        )
+    except Exception as e:
+        return json.dumps(
+            {
+                "success": False,
+                "data": f"Terjadi kesalahan saat memproses URL '{url}': {e}",
+            }
+        )
+
+
+async_functions = {
+    "execute_command": execute_command,
+    "install_python_package": install_python_package,
+    "fetch_webpage_content": fetch_webpage_content,
+}
@@ -1,65 +1,214 @@
 import subprocess
 import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import google.ai.generativelanguage as glm
 from google.ai.generativelanguage import Type
 import os
 import json
 
 from utils.path_utils import sanitize_path
-from config import DIREKTORI_BATASAN_AI
+from utils.output_capture import OutputCapture, drain_pipe, new_log_label
+from utils.resource_usage import wait_for_exit, stop_child, get_session_ledger
+from config import DIREKTORI_BATASAN_AI, RUN_COMMANDS_MAX_WORKERS
+
+# Batas tunggu pembaca pipe setelah proses selesai (cucu proses bisa menahan pipe)
+PIPE_DRAIN_TIMEOUT_SECONDS = 5
 
 
 def shlex_join(args_list):
     return shlex.join(args_list)
 
 
-def execute_command(command, args=None, timeout=60):
+def new_output_captures():
+    label = new_log_label()
+    return {
+        "stdout": OutputCapture(f"{label}-stdout"),
+        "stderr": OutputCapture(f"{label}-stderr"),
+    }
+
+
+def command_result(full_command, captures, exit_code, started, timeout, timed_out, usage=None, cpu_times=None):
+    return json.dumps(
+        command_payload(full_command, captures, exit_code, started, timeout, timed_out, usage, cpu_times)
+    )
+
+
+def command_payload(
+    full_command, captures, exit_code, started, timeout, timed_out, usage=None, cpu_times=None, drain_timed_out=False
+):
+    for capture in captures.values():
+        capture.close()
+    wall_seconds = time.perf_counter() - started
+    output_data = {
+        "stdout": captures["stdout"].text(),
+        "stderr": captures["stderr"].text(),
+        "exit_code": exit_code,
+        "duration_seconds": round(wall_seconds, 3),
+        "resource_usage": get_session_ledger().record(
+            shlex_join(full_command), wall_seconds, usage=usage, cpu_times=cpu_times
+        ),
+    }
+    truncated = {name: capture for name, capture in captures.items() if capture.truncated}
+    if truncated:
+        output_data["output_bytes"] = {name: capture.total_bytes for name, capture in captures.items()}
+        output_data["log_files"] = {name: capture.log_file for name, capture in truncated.items()}
+    if drain_timed_out:
+        output_data["output_incomplete"] = (
+            f"Pipe output masih terbuka {PIPE_DRAIN_TIMEOUT_SECONDS} detik setelah perintah selesai "
+            "(mis. ditahan proses anak yang berjalan di latar belakang); output setelah titik ini tidak ditampung."
+        )
+    if timed_out:
+        output_data["error"] = f"Perintah '{shlex_join(full_command)}' melebihi batas waktu {timeout} detik dan dihentikan."
+    return {"success": exit_code == 0 and not timed_out, "data": output_data}
+
+
+def build_command(command, args=None):
+    """Menggabungkan perintah dan argumennya; mengembalikan (full_command, error)."""
     if args is None:
         args = []
-
     if " " in command and len(args) > 0:
         error_msg = f"Kesalahan keamanan: Perintah '{command}' tidak boleh mengandung spasi jika argumen diberikan secara terpisah. Panggil dengan 'command' hanya nama perintah dan 'args' sebagai daftar."
+        return None, error_msg
+    return [str(command)] + [str(arg) for arg in args], None
+
+
+def execute_command(command, args=None, timeout=60):
+    full_command, error_msg = build_command(command, args)
+    if error_msg:
         return json.dumps({"success": False, "data": error_msg})
+    return json.dumps(run_command(full_command, timeout))
 
-    full_command = [str(command)] + [str(arg) for arg in args]
 
+def run_command(full_command, timeout=60, on_start=None):
+    """Menjalankan satu perintah dan mengembalikan payload {"success", "data"}.
+    `on_start` dipanggil dengan objek Popen begitu proses berjalan."""
     try:
-        result = subprocess.run(
+        started = time.perf_counter()
+        process = subprocess.Popen(
             full_command,
             cwd=DIREKTORI_BATASAN_AI,
-            capture_output=True,
-            text=True,
-            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             shell=False,
-            timeout=timeout,
         )
+        if on_start is not None:
+            on_start(process)
+        # Output dibaca bertahap oleh thread agar memori tetap terbatas dan
+        # kedua pipe tidak saling mengunci saat salah satunya penuh.
+        captures = new_output_captures()
+        readers = [
+            threading.Thread(target=drain_pipe, args=(process.stdout, captures["stdout"]), daemon=True),
+            threading.Thread(target=drain_pipe, args=(process.stderr, captures["stderr"]), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
 
-        output_data = {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "exit_code": result.returncode,
-        }
+        timed_out = False
+        try:
+            # wait4 sekaligus mengembalikan waktu CPU dan RSS puncak proses anak
+            usage = wait_for_exit(process, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            stop_child(process, force=True)
+            usage = wait_for_exit(process)
+            timed_out = True
+        drain_deadline = time.monotonic() + PIPE_DRAIN_TIMEOUT_SECONDS
+        for reader in readers:
+            reader.join(max(0, drain_deadline - time.monotonic()))
+        drain_timed_out = any(reader.is_alive() for reader in readers)
 
-        success = result.returncode == 0
-        return json.dumps({"success": success, "data": output_data})
+        return command_payload(
+            full_command, captures, process.returncode, started, timeout, timed_out,
+            usage=usage, drain_timed_out=drain_timed_out,
+        )
 
     except FileNotFoundError:
-        error_msg = f"Error: Perintah '{command}' tidak ditemukan. Pastikan program terinstal dan berada di dalam PATH sistem, atau gunakan path absolut."
-        return json.dumps({"success": False, "data": error_msg})
-    except subprocess.TimeoutExpired:
-        return json.dumps(
-            {
-                "success": False,
-                "data": f"Error: Perintah '{shlex_join(full_command)}' melebihi batas waktu {timeout} detik.",
-            }
-        )
+        error_msg = f"Error: Perintah '{full_command[0]}' tidak ditemukan. Pastikan program terinstal dan berada di dalam PATH sistem, atau gunakan path absolut."
+        return {"success": False, "data": error_msg}
     except Exception as e:
-        return json.dumps(
-            {
-                "success": False,
-                "data": f"Gagal mengeksekusi perintah '{shlex_join(full_command)}': {e}",
-            }
-        )
+        return {
+            "success": False,
+            "data": f"Gagal mengeksekusi perintah '{shlex_join(full_command)}': {e}",
+        }
+
+
+def run_commands(commands, timeout=60, fail_fast=False):
+    """Menjalankan beberapa perintah independen sekaligus di pool thread seukuran
+    jumlah CPU. Dengan fail_fast, kegagalan pertama menghentikan perintah lain
+    yang sedang berjalan dan membatalkan yang belum dimulai."""
+    started = time.perf_counter()
+    jobs = []
+    results = [None] * len(commands)
+    for index, item in enumerate(commands):
+        item = dict(item)
+        full_command, error_msg = build_command(str(item.get("command", "")), list(item.get("args") or []))
+        if error_msg or not full_command[0]:
+            results[index] = {"success": False, "data": error_msg or "Perintah kosong."}
+            continue
+        jobs.append((index, full_command, item.get("timeout") or timeout))
+
+    lock = threading.Lock()
+    running = {}
+    cancelled = threading.Event()
+    if fail_fast and len(jobs) < len(commands):
+        # Perintah yang tidak valid sudah dihitung sebagai kegagalan pertama
+        cancelled.set()
+
+    def register(index, process):
+        with lock:
+            running[index] = process
+            if not cancelled.is_set():
+                return
+        stop_child(process, force=True)
+
+    def run_job(index, full_command, job_timeout):
+        if cancelled.is_set():
+            results[index] = {"success": False, "cancelled": True, "data": "Dibatalkan karena perintah lain gagal (fail_fast)."}
+            return
+        result = run_command(full_command, job_timeout, on_start=lambda process: register(index, process))
+        with lock:
+            running.pop(index, None)
+            if cancelled.is_set() and not result["success"]:
+                result["cancelled"] = True
+            results[index] = result
+            if result["success"] or not fail_fast or cancelled.is_set():
+                return
+            cancelled.set()
+            others = list(running.values())
+        for process in others:
+            try:
+                stop_child(process, force=True)
+            except OSError:
+                pass
+
+    if jobs:
+        workers = max(1, min(len(jobs), RUN_COMMANDS_MAX_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="han-run") as executor:
+            for future in [executor.submit(run_job, *job) for job in jobs]:
+                future.result()
+
+    entries = []
+    for index, result in enumerate(results):
+        entry = {"index": index, "success": result["success"]}
+        if result.get("cancelled"):
+            entry["cancelled"] = True
+        if isinstance(result["data"], dict):
+            entry.update(result["data"])
+        else:
+            entry["error"] = result["data"]
+        entries.append(entry)
+
+    summary = {
+        "total": len(entries),
+        "succeeded": sum(1 for entry in entries if entry["success"]),
+        "failed": sum(1 for entry in entries if not entry["success"] and not entry.get("cancelled")),
+        "cancelled": sum(1 for entry in entries if entry.get("cancelled")),
+        "duration_seconds": round(time.perf_counter() - started, 3),
+    }
+    return json.dumps(
+        {"success": summary["succeeded"] == summary["total"], "data": {"summary": summary, "results": entries}}
+    )
 
 
 def install_python_package(package_name):
@@ -102,6 +251,13 @@ def install_python_package(package_name):
         )
 
 
+def get_command_resource_usage():
+    try:
+        return json.dumps({"success": True, "data": get_session_ledger().summary()})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal membaca pemakaian sumber daya: {e}"})
+
+
 def set_permissions(path, mode):
     try:
         full_path = sanitize_path(path)
@@ -133,7 +289,7 @@ execution_tool_definitions = glm.Tool(
     function_declarations=[
         glm.FunctionDeclaration(
             name="execute_command",
-            description="Mengeksekusi perintah command line. Mengembalikan objek JSON dengan kunci 'success' (boolean), dan 'data' yang berisi 'stdout', 'stderr', dan 'exit_code'. 'success' bernilai true jika exit_code adalah 0.",
+            description="Mengeksekusi perintah command line. Mengembalikan objek JSON dengan kunci 'success' (boolean), dan 'data' yang berisi 'stdout', 'stderr', 'exit_code', 'duration_seconds', dan 'resource_usage' (waktu CPU dan RSS puncak). 'success' bernilai true jika exit_code adalah 0. Output yang sangat panjang dipotong di tengah; output lengkapnya ada di file 'log_files' yang bisa dibaca per halaman dengan read_file.",
             parameters=glm.Schema(
                 type=Type.OBJECT,
                 properties={
@@ -146,6 +302,40 @@ execution_tool_definitions = glm.Tool(
                 required=["command"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="run_commands",
+            description="Menjalankan beberapa perintah independen secara paralel (mis. lint, typecheck, dan tes beberapa modul) dan mengembalikan semua hasilnya dalam satu respons. Setiap hasil berisi 'index', 'success', 'stdout', 'stderr', 'exit_code', dan 'resource_usage'. Jangan gunakan untuk perintah yang saling bergantung atau harus berurutan.",
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "commands": glm.Schema(
+                        type=Type.ARRAY,
+                        description="Daftar perintah. Aturan 'command' dan 'args' sama seperti execute_command.",
+                        items=glm.Schema(
+                            type=Type.OBJECT,
+                            properties={
+                                "command": glm.Schema(type=Type.STRING),
+                                "args": glm.Schema(type=Type.ARRAY, items=glm.Schema(type=Type.STRING)),
+                                "timeout": glm.Schema(
+                                    type=Type.INTEGER,
+                                    description="Batas waktu perintah ini dalam detik. Default mengikuti 'timeout' utama.",
+                                ),
+                            },
+                            required=["command"],
+                        ),
+                    ),
+                    "timeout": glm.Schema(
+                        type=Type.INTEGER,
+                        description="Batas waktu default per perintah dalam detik. Default 60.",
+                    ),
+                    "fail_fast": glm.Schema(
+                        type=Type.BOOLEAN,
+                        description="Jika true, kegagalan pertama menghentikan perintah lain yang masih berjalan dan membatalkan sisanya. Default false.",
+                    ),
+                },
+                required=["commands"],
+            ),
+        ),
         glm.FunctionDeclaration(
             name="install_python_package",
             description="Menginstal paket Python menggunakan pip. Mengembalikan JSON dengan status keberhasilan.",
@@ -155,6 +345,11 @@ execution_tool_definitions = glm.Tool(
                 required=["package_name"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="get_command_resource_usage",
+            description="Ringkasan pemakaian sumber daya semua perintah di sesi ini: total waktu, waktu CPU, serta perintah paling lambat dan paling boros memori.",
+            parameters=glm.Schema(type=Type.OBJECT, properties={}),
+        ),
         glm.FunctionDeclaration(
             name="set_permissions",
             description="Mengubah izin file atau direktori. Mengembalikan JSON dengan status keberhasilan.",
@@ -172,6 +367,8 @@ execution_tool_definitions = glm.Tool(
 
 execution_functions = {
     "execute_command": execute_command,
+    "run_commands": run_commands,
     "install_python_package": install_python_package,
+    "get_command_resource_usage": get_command_resource_usage,
     "set_permissions": set_permissions,
 }
@@ -1,11 +1,23 @@
+import fnmatch
+import mmap
 import os
 import shutil
+from collections import deque
 import google.ai.generativelanguage as glm
 from google.ai.generativelanguage import Type
 import zipfile
 import json
 
+from config import (
+    READ_FILE_MAX_BYTES,
+    TREE_DEFAULT_EXCLUDED_DIRS,
+    TREE_DEFAULT_MAX_DEPTH,
+    TREE_DEFAULT_MAX_ENTRIES,
+)
 from utils.path_utils import sanitize_path
+from utils.line_index import get_line_index
+from utils.patch_utils import PatchError, plan_patch, commit_patch
+from utils.ignore_utils import load_gitignore, is_ignored
 
 
 def _json_response(success, data):
@@ -23,16 +35,100 @@ def create_directory(path):
         return _json_response(False, f"Gagal membuat direktori '{path}': {e}")
 
 
-def read_file(filename):
+def _is_utf8_continuation(mm, position):
+    return position < len(mm) and mm[position] & 0xC0 == 0x80
+
+
+def _align_to_utf8(mm, start, end):
+    """Menggeser jendela byte ke batas karakter UTF-8 agar karakter multi-byte
+    tidak terpotong: awal maju ke karakter berikutnya, akhir mundur ke awal
+    karakter yang terpotong (atau maju jika jendela jadi kosong)."""
+    size = len(mm)
+    for _ in range(3):
+        if not _is_utf8_continuation(mm, start):
+            break
+        start += 1
+    aligned_end = max(end, start)
+    for _ in range(3):
+        if aligned_end <= start or not _is_utf8_continuation(mm, aligned_end):
+            break
+        aligned_end -= 1
+    if aligned_end <= start < end:
+        aligned_end = min(size, start + 1)
+        while _is_utf8_continuation(mm, aligned_end):
+            aligned_end += 1
+    return start, aligned_end
+
+
+def _read_range(mm, index, start_line, end_line, offset, length, max_bytes):
+    size = index.size
+    if offset is not None or length is not None:
+        start = min(max(0, int(offset or 0)), size)
+        end = size if length is None else min(size, start + max(0, int(length)))
+        by_lines = False
+    else:
+        first_line = max(1, int(start_line or 1))
+        last_line = index.line_count if end_line is None else min(int(end_line), index.line_count)
+        if first_line > max(1, index.line_count):
+            raise IndexError(f"start_line {first_line} melebihi jumlah baris ({index.line_count}).")
+        if last_line < first_line:
+            raise IndexError("end_line tidak boleh lebih kecil dari start_line.")
+        start, end = index.line_start(first_line), index.line_start(last_line + 1)
+        by_lines = True
+
+    truncated = end - start > max_bytes
+    if truncated:
+        end = start + max_bytes
+        if by_lines:
+            # Halaman berbasis baris dipotong di akhir baris utuh terakhir
+            newline = mm.rfind(b"\n", start, end)
+            if newline != -1:
+                end = newline + 1
+    start, end = _align_to_utf8(mm, start, end)
+    return start, end, truncated
+
+
+def read_file(filename, start_line=None, end_line=None, offset=None, length=None, max_bytes=READ_FILE_MAX_BYTES):
     try:
         full_path = sanitize_path(filename)
         if not os.path.isfile(full_path):
             return _json_response(
                 False, f"File '{filename}' tidak ditemukan atau bukan file."
             )
-        with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-        return _json_response(True, content)
+        max_bytes = max(1, int(max_bytes))
+        with open(full_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                content, index, start, end, truncated = "", get_line_index(full_path, stat=stat), 0, 0, False
+            else:
+                # mmap membuat halaman file hanya dibaca sebatas rentang yang diminta
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    index = get_line_index(full_path, mm, stat)
+                    start, end, truncated = _read_range(
+                        mm, index, start_line, end_line, offset, length, max_bytes
+                    )
+                    content = mm[start:end].decode("utf-8", errors="ignore")
+
+        ranged = any(value is not None for value in (start_line, end_line, offset, length))
+        if not ranged and not truncated:
+            # Pembacaan file utuh tetap mengembalikan isi file apa adanya
+            return _json_response(True, content)
+        data = {
+            "content": content,
+            "total_bytes": index.size,
+            "total_lines": index.line_count,
+            "start_line": index.line_at(start) if content else 0,
+            "end_line": index.line_at(end - 1) if content else 0,
+            "offset": start,
+            "bytes_returned": end - start,
+            "truncated": truncated,
+        }
+        if end < index.size:
+            data["next_offset"] = end
+            data["next_line"] = index.line_at(end)
+        return _json_response(True, data)
+    except IndexError as e:
+        return _json_response(False, f"Rentang tidak valid untuk file '{filename}': {e}")
     except ValueError as e:
         return _json_response(False, f"Kesalahan keamanan: {e}")
     except Exception as e:
@@ -68,6 +164,89 @@ def list_directory(path="."):
         return _json_response(False, f"Gagal melihat isi direktori '{path}': {e}")
 
 
+def _matches_any(patterns, relative_path, name):
+    return any(
+        fnmatch.fnmatch(relative_path, pattern) or fnmatch.fnmatch(name, pattern)
+        for pattern in patterns
+    )
+
+
+def list_tree(
+    path=".",
+    max_depth=TREE_DEFAULT_MAX_DEPTH,
+    max_entries=TREE_DEFAULT_MAX_ENTRIES,
+    include=None,
+    exclude=None,
+    respect_gitignore=True,
+    skip_default_dirs=True,
+):
+    try:
+        full_path = sanitize_path(path)
+        if not os.path.isdir(full_path):
+            return _json_response(
+                False, f"Error: '{path}' bukan direktori atau tidak ditemukan."
+            )
+        max_depth, max_entries = max(1, int(max_depth)), max(1, int(max_entries))
+        include, exclude = list(include or []), list(exclude or [])
+
+        entries = []
+        truncated = False
+        depth_limited = 0
+        # Penelusuran melebar (BFS) agar batas entri tetap memberi gambaran tingkat atas
+        queue = deque([(full_path, 1, load_gitignore(full_path) if respect_gitignore else [])])
+        while queue and not truncated:
+            directory, depth, rules = queue.popleft()
+            try:
+                with os.scandir(directory) as iterator:
+                    dir_entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError:
+                continue
+
+            for entry in dir_entries:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                relative = os.path.relpath(entry.path, full_path).replace(os.sep, "/")
+                if is_dir and skip_default_dirs and entry.name in TREE_DEFAULT_EXCLUDED_DIRS:
+                    continue
+                if respect_gitignore and is_ignored(rules, entry.path, entry.name, is_dir):
+                    continue
+                if exclude and _matches_any(exclude, relative, entry.name):
+                    continue
+
+                if is_dir:
+                    if depth < max_depth:
+                        child_rules = rules + load_gitignore(entry.path) if respect_gitignore else rules
+                        queue.append((entry.path, depth + 1, child_rules))
+                    else:
+                        depth_limited += 1
+                elif include and not _matches_any(include, relative, entry.name):
+                    continue
+
+                if len(entries) >= max_entries:
+                    truncated = True
+                    break
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    size, mtime = (None if is_dir else stat.st_size), int(stat.st_mtime)
+                except OSError:
+                    size, mtime = None, None
+                entry_type = "l" if entry.is_symlink() else ("d" if is_dir else "f")
+                entries.append([relative + ("/" if is_dir else ""), entry_type, size, mtime])
+
+        data = {
+            "root": path,
+            "columns": ["path", "type", "size", "mtime"],
+            "entries": entries,
+            "truncated": truncated,
+        }
+        if depth_limited:
+            data["dirs_beyond_max_depth"] = depth_limited
+        return _json_response(True, data)
+    except ValueError as e:
+        return _json_response(False, f"Kesalahan keamanan: {e}")
+    except Exception as e:
+        return _json_response(False, f"Gagal menelusuri direktori '{path}': {e}")
+
+
 def delete_file(filename):
     try:
         full_path = sanitize_path(filename)
@@ -150,6 +329,23 @@ def move_item(source_path, destination_path):
         return _json_response(False, f"Gagal memindahkan '{source_path}': {e}")
 
 
+def apply_patch(patch, dry_run=False):
+    try:
+        # Semua file divalidasi dulu; tidak ada yang ditulis jika satu saja gagal
+        plans = plan_patch(patch)
+        if not dry_run:
+            commit_patch(plans)
+        summaries = [summary for *_, summary in plans]
+        message = "Patch valid (dry run), belum diterapkan." if dry_run else "Patch berhasil diterapkan."
+        return _json_response(True, {"message": message, "files": summaries})
+    except PatchError as e:
+        return _json_response(False, f"Patch ditolak, tidak ada file yang diubah: {e}")
+    except ValueError as e:
+        return _json_response(False, f"Kesalahan keamanan: {e}")
+    except Exception as e:
+        return _json_response(False, f"Gagal menerapkan patch: {e}")
+
+
 file_system_tool_definitions = glm.Tool(
     function_declarations=[
         glm.FunctionDeclaration(
@@ -163,10 +359,28 @@ file_system_tool_definitions = glm.Tool(
         ),
         glm.FunctionDeclaration(
             name="read_file",
-            description="Membaca konten file. Mengembalikan JSON dengan 'success':true dan 'data':<konten_file> jika berhasil.",
+            description="Membaca konten file, seluruhnya atau per rentang baris/byte. Tanpa rentang, 'data' berisi isi file apa adanya. Dengan rentang, atau jika file melebihi max_bytes, 'data' berisi 'content', 'total_bytes', 'total_lines', rentang yang dibaca, dan 'next_line'/'next_offset' jika masih ada sisa. Offset byte digeser ke batas karakter UTF-8 terdekat; 'offset' di hasil adalah offset sebenarnya. Gunakan rentang untuk membaca file besar per halaman.",
             parameters=glm.Schema(
                 type=Type.OBJECT,
-                properties={"filename": glm.Schema(type=Type.STRING)},
+                properties={
+                    "filename": glm.Schema(type=Type.STRING),
+                    "start_line": glm.Schema(
+                        type=Type.INTEGER, description="Baris pertama yang dibaca (berbasis 1)."
+                    ),
+                    "end_line": glm.Schema(
+                        type=Type.INTEGER, description="Baris terakhir yang dibaca (inklusif)."
+                    ),
+                    "offset": glm.Schema(
+                        type=Type.INTEGER, description="Offset byte awal; mengabaikan start_line/end_line."
+                    ),
+                    "length": glm.Schema(
+                        type=Type.INTEGER, description="Jumlah byte yang dibaca dari offset."
+                    ),
+                    "max_bytes": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Batas byte yang dikembalikan (default: {READ_FILE_MAX_BYTES}).",
+                    ),
+                },
                 required=["filename"],
             ),
         ),
@@ -182,6 +396,26 @@ file_system_tool_definitions = glm.Tool(
                 required=["filename", "content"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="apply_patch",
+            description=(
+                "Mengubah satu atau beberapa file dengan patch, jauh lebih hemat daripada menulis ulang seluruh file dengan write_file. "
+                "Menerima unified diff ('--- a/path', '+++ b/path', hunk '@@') atau blok search/replace: baris path file, "
+                "'<<<<<<< SEARCH', teks lama persis, '=======', teks baru, '>>>>>>> REPLACE'. "
+                "Patch divalidasi terhadap isi file saat ini dan diterapkan secara atomik (semua file atau tidak sama sekali)."
+            ),
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "patch": glm.Schema(type=Type.STRING, description="Isi patch."),
+                    "dry_run": glm.Schema(
+                        type=Type.BOOLEAN,
+                        description="Jika true, hanya memvalidasi patch tanpa menulis file.",
+                    ),
+                },
+                required=["patch"],
+            ),
+        ),
         glm.FunctionDeclaration(
             name="append_to_file",
             description="Menambahkan konten ke akhir file. Mengembalikan JSON dengan status keberhasilan.",
@@ -201,6 +435,45 @@ file_system_tool_definitions = glm.Tool(
                 type=Type.OBJECT, properties={"path": glm.Schema(type=Type.STRING)}
             ),
         ),
+        glm.FunctionDeclaration(
+            name="list_tree",
+            description=(
+                "Menelusuri pohon direktori secara rekursif dalam satu panggilan. Mengembalikan JSON dengan 'entries' berupa "
+                "baris [path, type (f/d/l), size, mtime]. Menghormati .gitignore dan melewati node_modules, .git, serta "
+                "folder build secara default. Lebih efisien daripada memanggil list_directory berulang kali."
+            ),
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "path": glm.Schema(type=Type.STRING, description="Direktori awal (default: '.')."),
+                    "max_depth": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Kedalaman maksimum (default: {TREE_DEFAULT_MAX_DEPTH}).",
+                    ),
+                    "max_entries": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah entri maksimum (default: {TREE_DEFAULT_MAX_ENTRIES}).",
+                    ),
+                    "include": glm.Schema(
+                        type=Type.ARRAY,
+                        items=glm.Schema(type=Type.STRING),
+                        description="Pola glob file yang disertakan, mis. ['*.py'].",
+                    ),
+                    "exclude": glm.Schema(
+                        type=Type.ARRAY,
+                        items=glm.Schema(type=Type.STRING),
+                        description="Pola glob file/direktori yang dilewati.",
+                    ),
+                    "respect_gitignore": glm.Schema(
+                        type=Type.BOOLEAN, description="Menghormati .gitignore (default: true)."
+                    ),
+                    "skip_default_dirs": glm.Schema(
+                        type=Type.BOOLEAN,
+                        description="Melewati node_modules, .git, dan folder build (default: true).",
+                    ),
+                },
+            ),
+        ),
         glm.FunctionDeclaration(
             name="delete_file",
             description="Menghapus file. Mengembalikan JSON dengan status keberhasilan.",
@@ -244,7 +517,9 @@ file_system_functions = {
     "read_file": read_file,
     "write_file": write_file,
     "append_to_file": append_to_file,
+    "apply_patch": apply_patch,
     "list_directory": list_directory,
+    "list_tree": list_tree,
     "delete_file": delete_file,
     "move_item": move_item,
     "create_zip_archive": create_zip_archive,
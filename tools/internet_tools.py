@@ -1,15 +1,110 @@
 import google.ai.generativelanguage as glm
 from google.ai.generativelanguage import Type
+import codecs
 import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, NavigableString
 from duckduckgo_search import DDGS
 
+from config import (
+    HTTP_POOL_MAXSIZE,
+    HTTP_CACHE_DIRECTORY,
+    HTTP_CACHE_MAX_ENTRIES,
+    FETCH_MAX_BYTES,
+    FETCH_MAX_TEXT_CHARS,
+    FETCH_QUERY_CHUNK_CHARS,
+    FETCH_QUERY_TOP_K,
+    FETCH_MANY_MAX_WORKERS,
+    FETCH_MANY_PER_HOST,
+    FETCH_MANY_DEADLINE_SECONDS,
+    FETCH_MANY_MAX_TEXT_CHARS,
+    WEB_SEARCH_CACHE_FILE,
+    WEB_SEARCH_CACHE_TTL_SECONDS,
+    WEB_SEARCH_CACHE_MAX_ENTRIES,
+)
+from utils.http_cache import PageCache, conditional_headers
+from utils.text_chunks import top_chunks
+from utils.search_cache import SearchCache
+
+try:
+    # Parser C jauh lebih cepat daripada html.parser untuk halaman dokumentasi besar
+    from lxml import etree, html as lxml_html
+    HTML_PARSER = "lxml"
+except ImportError:
+    etree, lxml_html = None, None
+    HTML_PARSER = "html.parser"
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+except ImportError:
+    detect_charset = None
+
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+REQUEST_TIMEOUT_SECONDS = 15
+FETCH_CHUNK_BYTES = 65536
+# Tipe konten yang diunduh; selain ini (gambar, PDF, arsip, ...) ditolak sebelum body diunduh
+TEXT_CONTENT_TYPES = ("text/", "application/xhtml+xml", "application/xml", "application/json")
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+NON_CONTENT_TAGS = ["script", "style", "noscript", "template", "svg", "iframe"]
+# Deklarasi charset di dalam dokumen, dicari hanya di awal body
+META_CHARSET_PATTERN = re.compile(rb"<meta[^>]+charset\s*=", re.IGNORECASE)
+XML_DECLARATION_PATTERN = re.compile(r"^\s*<\?xml[^>]*\?>")
+CHARSET_SNIFF_BYTES = 4096
+CHARSET_DETECT_SAMPLE_BYTES = 65536
+
+page_cache = PageCache(HTTP_CACHE_DIRECTORY, HTTP_CACHE_MAX_ENTRIES)
+
+search_cache = SearchCache(WEB_SEARCH_CACHE_FILE, WEB_SEARCH_CACHE_TTL_SECONDS, WEB_SEARCH_CACHE_MAX_ENTRIES)
+
+_http_session = None
+_http_session_lock = threading.Lock()
+# Klien DDGS tidak thread-safe, jadi setiap thread tool memakai kliennya sendiri
+_ddgs_local = threading.local()
+
+
+def get_http_session():
+    """Session bersama agar koneksi TCP/TLS ke host yang sama dipakai ulang."""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            session.headers.update(REQUEST_HEADERS)
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_MAXSIZE, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def _search_text(query, num_results):
+    client = getattr(_ddgs_local, "client", None)
+    if client is None:
+        client = _ddgs_local.client = DDGS()
+    try:
+        return list(client.text(query, max_results=num_results))
+    except Exception:
+        # Klien dibuat ulang pada pencarian berikutnya jika sesinya rusak
+        _ddgs_local.client = None
+        raise
+
 
 def web_search(query: str, num_results: int = 5):
     try:
-        with DDGS() as ddgs:
-            results = [r for r in ddgs.text(query, max_results=num_results)]
+        num_results = int(num_results)
+        results = search_cache.get(query, num_results)
+        if results is None:
+            results = _search_text(query, num_results)
+            # Hasil kosong tidak di-cache; bisa jadi akibat throttling sementara
+            if results:
+                search_cache.put(query, num_results, results)
 
         if not results:
             return json.dumps(
@@ -29,36 +124,271 @@ def web_search(query: str, num_results: int = 5):
         )
 
 
-def fetch_webpage_content(url: str):
+def _header_charset(content_type):
+    for param in (content_type or "").split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            charset = value.strip().strip('"\'')
+            try:
+                return codecs.lookup(charset).name
+            except LookupError:
+                return None
+    return None
+
+
+def _is_utf8(content):
+    try:
+        content.decode("utf-8")
+        return True
+    except UnicodeDecodeError as e:
+        # Body yang dipotong FETCH_MAX_BYTES bisa berakhir di tengah karakter multibyte
+        return e.reason == "unexpected end of data" and e.start >= len(content) - 3
+
+
+def decode_body(content, content_type):
+    """Mengubah body menjadi str. Urutan: charset di header Content-Type, lalu
+    <meta charset> di dokumen HTML (dibaca parser), lalu UTF-8 jika valid, lalu
+    deteksi otomatis. Mengembalikan bytes apa adanya hanya jika dokumen HTML
+    mendeklarasikan charset-nya sendiri."""
+    charset = _header_charset(content_type)
+    if charset is None:
+        is_html = _media_type(content_type) in HTML_CONTENT_TYPES or not content_type
+        if is_html and META_CHARSET_PATTERN.search(content[:CHARSET_SNIFF_BYTES]):
+            return content
+        if _is_utf8(content):
+            charset = "utf-8"
+        elif detect_charset is not None:
+            best = detect_charset(content[:CHARSET_DETECT_SAMPLE_BYTES]).best()
+            charset = best.encoding if best is not None else "cp1252"
+        else:
+            charset = "cp1252"
+    return content.decode(charset, errors="replace")
+
+
+def _text_with_lxml(html_content):
+    if isinstance(html_content, str):
+        # lxml menolak str yang masih membawa deklarasi encoding XML
+        html_content = XML_DECLARATION_PATTERN.sub("", html_content, count=1)
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        document = lxml_html.document_fromstring(html_content)
+    except etree.ParserError:
+        # Dokumen kosong
+        return ""
+    etree.strip_elements(document, *NON_CONTENT_TAGS, with_tail=False)
+    # Jika halaman menandai konten utamanya, navigasi/header/footer dilewati
+    for tag in ("main", "article"):
+        main_content = document.find(f".//{tag}")
+        if main_content is not None:
+            return main_content.text_content()
+    return document.text_content()
+
+
+def _text_with_soup(html_content):
+    soup = BeautifulSoup(html_content, "html.parser")
+    main_content = soup.find("main") or soup.find("article") or soup
+    # String di dalam script/style dilewati saat dibaca; decompose() per tag
+    # bernilai O(jumlah saudara) sehingga kuadratik pada halaman besar.
+    return "".join(
+        string
+        for string in main_content.find_all(string=True)
+        if type(string) is NavigableString
+        and not any(parent.name in NON_CONTENT_TAGS for parent in string.parents)
+    )
+
+
+def extract_text_from_html(html_content):
+    text = _text_with_lxml(html_content) if lxml_html is not None else _text_with_soup(html_content)
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+def _media_type(content_type):
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def unsupported_content_type(content_type):
+    """Pesan error jika Content-Type bukan teks/HTML, selain itu None."""
+    media_type = _media_type(content_type)
+    if not media_type or media_type.startswith(TEXT_CONTENT_TYPES):
+        return None
+    return f"Konten bertipe '{media_type}' bukan teks/HTML, jadi tidak diunduh."
+
+
+def _extract_text(content, content_type):
+    body = decode_body(content, content_type)
+    if _media_type(content_type) in HTML_CONTENT_TYPES or not content_type:
+        return extract_text_from_html(body)
+    return body
+
+
+def page_result(url, content, content_type, download_truncated, etag=None, last_modified=None, view=None):
+    """Mengekstrak teks dari body yang diunduh, menyimpannya ke cache, dan
+    menyusun data respons beserta statistik ekstraksinya. `view` berisi
+    argumen page_view (query, top_k, offset)."""
+    started = time.perf_counter()
+    text = _extract_text(content, content_type)
+    extraction_ms = round((time.perf_counter() - started) * 1000, 1)
+    # Body yang terpotong tidak di-cache agar revalidasi tidak menyajikan teks parsial
+    if not download_truncated:
+        page_cache.store(url, text, etag, last_modified)
+    data = page_view(text, **(view or {}))
+    data.update(
+        {
+            "cached": False,
+            "parser": HTML_PARSER,
+            "extraction_ms": extraction_ms,
+            "bytes_downloaded": len(content),
+            "bytes_saved": max(0, len(content) - _returned_text_bytes(data)),
         }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+    )
+    if download_truncated:
+        data["download_truncated"] = True
+        data["note"] = f"Halaman melebihi {FETCH_MAX_BYTES} byte; hanya bagian awalnya yang diunduh."
+    return data
+
+
+def cached_page_result(entry, view=None):
+    data = page_view(entry["text"], **(view or {}))
+    data.update({"cached": True, "extraction_ms": 0.0, "bytes_downloaded": 0})
+    return data
+
+
+def page_view(text, query=None, top_k=FETCH_QUERY_TOP_K, offset=0, max_chars=FETCH_MAX_TEXT_CHARS):
+    """Bagian teks halaman yang dikembalikan ke model: potongan paling relevan
+    jika ada query, selain itu maksimal max_chars karakter mulai dari offset."""
+    if query:
+        chunks = top_chunks(text, query, max(1, int(top_k)), FETCH_QUERY_CHUNK_CHARS)
+        data = {"query": query, "chunks": chunks, "total_chars": len(text)}
+        if not chunks:
+            data["note"] = "Tidak ada bagian halaman yang cocok dengan query; baca tanpa query atau dengan offset."
+        return data
+    offset = min(max(0, int(offset)), len(text))
+    end = offset + max_chars
+    data = {"text": text[offset:end]}
+    if offset or end < len(text):
+        data.update({"offset": offset, "total_chars": len(text)})
+    if end < len(text):
+        data.update({"text_truncated": True, "next_offset": end})
+    return data
+
 
-        soup = BeautifulSoup(response.content, "html.parser")
+def _returned_text_bytes(data):
+    if "chunks" in data:
+        return sum(len(chunk["text"].encode("utf-8")) for chunk in data["chunks"])
+    return len(data["text"].encode("utf-8"))
 
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.decompose()
 
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = "\n".join(chunk for chunk in chunks if chunk)
+def fetch_page(url, view=None, deadline=None):
+    """Mengambil satu halaman lewat session bersama; mengembalikan payload
+    {"success", "data"}. `deadline` (time.monotonic) membatasi total waktunya."""
+    def remaining():
+        if deadline is None:
+            return REQUEST_TIMEOUT_SECONDS
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise requests.Timeout("batas waktu keseluruhan terlampaui")
+        return min(REQUEST_TIMEOUT_SECONDS, left)
 
-        return json.dumps({"success": True, "data": text})
+    try:
+        cached = page_cache.load(url)
+        with get_http_session().get(
+            url, headers=conditional_headers(cached), timeout=remaining(), stream=True
+        ) as response:
+            if response.status_code == 304 and cached:
+                # Halaman tidak berubah: pakai teks yang sudah diekstrak sebelumnya
+                page_cache.touch(url)
+                return {"success": True, "data": cached_page_result(cached, view)}
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            error = unsupported_content_type(content_type)
+            if error:
+                return {"success": False, "data": error}
+
+            # Diunduh bertahap sampai batas FETCH_MAX_BYTES; sisanya tidak pernah diterima
+            content = bytearray()
+            truncated = False
+            for chunk in response.iter_content(FETCH_CHUNK_BYTES):
+                content += chunk
+                if len(content) > FETCH_MAX_BYTES:
+                    truncated = True
+                    break
+                remaining()
+            validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+        data = page_result(url, bytes(content[:FETCH_MAX_BYTES]), content_type, truncated, *validators, view=view)
+        return {"success": True, "data": data}
+    except requests.Timeout as e:
+        return {"success": False, "timeout": True, "data": f"Waktu habis saat mengambil URL '{url}': {e}"}
     except requests.RequestException as e:
-        return json.dumps(
-            {"success": False, "data": f"Gagal mengambil konten dari URL '{url}': {e}"}
-        )
+        return {"success": False, "data": f"Gagal mengambil konten dari URL '{url}': {e}"}
     except Exception as e:
-        return json.dumps(
-            {
-                "success": False,
-                "data": f"Terjadi kesalahan saat memproses URL '{url}': {e}",
-            }
-        )
+        return {
+            "success": False,
+            "data": f"Terjadi kesalahan saat memproses URL '{url}': {e}",
+        }
+
+
+def fetch_webpage_content(url: str, query: str = None, top_k: int = FETCH_QUERY_TOP_K, offset: int = 0):
+    return json.dumps(fetch_page(url, {"query": query, "top_k": top_k, "offset": offset}))
+
+
+def fetch_many(urls: list, query: str = None, top_k: int = FETCH_QUERY_TOP_K, timeout: int = FETCH_MANY_DEADLINE_SECONDS):
+    """Mengambil beberapa URL sekaligus. Koneksi per host dibatasi semaphore,
+    dan URL yang belum selesai saat batas waktu keseluruhan habis dilaporkan
+    sebagai timeout alih-alih ditunggu."""
+    started = time.monotonic()
+    deadline = started + float(timeout)
+    urls = list(dict.fromkeys(str(url) for url in urls))
+    view = {"query": query, "top_k": top_k, "max_chars": FETCH_MANY_MAX_TEXT_CHARS}
+    host_limits = {urlsplit(url).netloc.lower(): threading.Semaphore(FETCH_MANY_PER_HOST) for url in urls}
+
+    def fetch_one(url):
+        limit = host_limits[urlsplit(url).netloc.lower()]
+        if not limit.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            return {"success": False, "data": "Batas waktu habis sebelum koneksi ke host tersedia.", "timeout": True}
+        try:
+            fetch_started = time.monotonic()
+            result = fetch_page(url, view, deadline)
+            result["elapsed_ms"] = round((time.monotonic() - fetch_started) * 1000, 1)
+            return result
+        finally:
+            limit.release()
+
+    results = {}
+    if urls:
+        executor = ThreadPoolExecutor(max_workers=min(len(urls), FETCH_MANY_MAX_WORKERS), thread_name_prefix="han-fetch")
+        futures = {executor.submit(fetch_one, url): url for url in urls}
+        done, pending = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        for future in pending:
+            future.cancel()
+        # Thread yang masih berjalan akan berhenti sendiri karena deadline yang sama
+        executor.shutdown(wait=False)
+        for future, url in futures.items():
+            results[url] = future.result() if future in done else {"success": False, "timeout": True, "data": None}
+
+    pages = []
+    for url in urls:
+        result = results[url]
+        page = {"url": url}
+        if result["success"]:
+            page["status"] = "ok"
+            page.update(result["data"])
+        else:
+            page["status"] = "timeout" if result.get("timeout") else "error"
+            page["error"] = result["data"] or f"Tidak selesai dalam batas waktu {timeout} detik."
+        if "elapsed_ms" in result:
+            page["elapsed_ms"] = result["elapsed_ms"]
+        pages.append(page)
+
+    summary = {
+        "total": len(pages),
+        "ok": sum(1 for page in pages if page["status"] == "ok"),
+        "failed": sum(1 for page in pages if page["status"] == "error"),
+        "timed_out": sum(1 for page in pages if page["status"] == "timeout"),
+        "duration_seconds": round(time.monotonic() - started, 3),
+    }
+    return json.dumps({"success": summary["ok"] > 0, "data": {"summary": summary, "pages": pages}})
 
 
 internet_tool_definitions = glm.Tool(
@@ -80,16 +410,65 @@ internet_tool_definitions = glm.Tool(
                 required=["query"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="fetch_many",
+            description=(
+                "Mengambil beberapa URL sekaligus secara paralel (mis. 3-5 hasil web_search) dalam satu panggilan. "
+                "Setiap halaman punya 'status' (ok/error/timeout); halaman yang berhasil berisi 'text' (atau 'chunks' "
+                "jika 'query' diberikan) dengan format yang sama seperti fetch_webpage_content."
+            ),
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "urls": glm.Schema(
+                        type=Type.ARRAY,
+                        items=glm.Schema(type=Type.STRING),
+                        description="Daftar URL lengkap yang akan dibaca.",
+                    ),
+                    "query": glm.Schema(
+                        type=Type.STRING,
+                        description="Opsional. Pertanyaan/kata kunci untuk memilih potongan yang relevan dari setiap halaman.",
+                    ),
+                    "top_k": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah potongan per halaman jika 'query' diberikan (default: {FETCH_QUERY_TOP_K}).",
+                    ),
+                    "timeout": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Batas waktu keseluruhan dalam detik (default: {FETCH_MANY_DEADLINE_SECONDS}).",
+                    ),
+                },
+                required=["urls"],
+            ),
+        ),
         glm.FunctionDeclaration(
             name="fetch_webpage_content",
-            description="Mengambil konten teks dari sebuah URL. Berguna untuk 'membaca' hasil pencarian.",
+            description=(
+                "Mengambil konten teks dari sebuah URL. Berguna untuk 'membaca' hasil pencarian. Mengembalikan 'text' "
+                "beserta statistik unduhan/ekstraksi; konten non-teks (gambar, PDF, arsip) ditolak dan halaman "
+                "yang sangat besar dipotong (lanjutkan dengan 'next_offset'). Jika hanya butuh jawaban atas satu "
+                "pertanyaan, berikan 'query' agar hanya potongan paling relevan ('chunks', masing-masing dengan "
+                "'offset') yang dikembalikan."
+            ),
             parameters=glm.Schema(
                 type=Type.OBJECT,
                 properties={
                     "url": glm.Schema(
                         type=Type.STRING,
                         description="URL lengkap halaman web yang akan dibaca.",
-                    )
+                    ),
+                    "query": glm.Schema(
+                        type=Type.STRING,
+                        description="Opsional. Pertanyaan/kata kunci untuk memilih potongan halaman yang relevan.",
+                    ),
+                    "top_k": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah potongan yang dikembalikan jika 'query' diberikan (default: {FETCH_QUERY_TOP_K}).",
+                    ),
+                    "offset": glm.Schema(
+                        type=Type.INTEGER,
+                        description="Opsional. Offset karakter awal teks (dari 'next_offset' atau 'offset' potongan) untuk membaca bagian lain halaman.",
+                    ),
                 },
                 required=["url"],
             ),
@@ -100,4 +479,5 @@ internet_tool_definitions = glm.Tool(
 internet_functions = {
     "web_search": web_search,
     "fetch_webpage_content": fetch_webpage_content,
+    "fetch_many": fetch_many,
 }
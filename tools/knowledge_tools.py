@@ -0,0 +1,62 @@
+import google.ai.generativelanguage as glm
+from google.ai.generativelanguage import Type
+import json
+
+from utils.prompt_index import get_prompt_index
+
+
+def list_knowledge_modules():
+    try:
+        index = get_prompt_index()
+        index.refresh()
+        modules = [
+            {
+                "name": name,
+                "description": index.modules[name].description,
+                "keywords": index.modules[name].keywords,
+            }
+            for name in index.optional_modules()
+        ]
+        return json.dumps({"success": True, "data": modules})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal membaca daftar modul pengetahuan: {e}"})
+
+
+def load_knowledge_module(name: str):
+    try:
+        content = get_prompt_index().get(name)
+        if content is None:
+            return json.dumps({"success": False, "data": f"Modul pengetahuan '{name}' tidak ditemukan."})
+        return json.dumps({"success": True, "data": content})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal memuat modul pengetahuan: {e}"})
+
+
+knowledge_tool_definitions = glm.Tool(
+    function_declarations=[
+        glm.FunctionDeclaration(
+            name="list_knowledge_modules",
+            description="Menampilkan daftar modul pengetahuan (panduan) yang tersedia beserta deskripsinya.",
+            parameters=glm.Schema(type=Type.OBJECT, properties={}),
+        ),
+        glm.FunctionDeclaration(
+            name="load_knowledge_module",
+            description="Memuat isi lengkap sebuah modul pengetahuan yang belum dimuat otomatis ke instruksi sistem.",
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "name": glm.Schema(
+                        type=Type.STRING,
+                        description="Nama modul, mis. 'kernelsu_webui_backend_guide.txt'.",
+                    )
+                },
+                required=["name"],
+            ),
+        ),
+    ]
+)
+
+knowledge_functions = {
+    "list_knowledge_modules": list_knowledge_modules,
+    "load_knowledge_module": load_knowledge_module,
+}
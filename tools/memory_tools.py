@@ -0,0 +1,102 @@
+import google.ai.generativelanguage as glm
+from google.ai.generativelanguage import Type
+import json
+import os
+
+from config import MEMORY_FILE_NAME
+from agent_core.history_journal import HistoryJournal
+
+RECALL_SNIPPET_CHARS = 300
+
+
+def _message_text(record):
+    texts = []
+    for part in record.get("parts", []):
+        if "text" in part:
+            texts.append(part["text"])
+        elif "function_call" in part:
+            call = part["function_call"]
+            texts.append(f"{call.get('name')}({json.dumps(call.get('args', {}), ensure_ascii=False)})")
+        elif "function_response" in part:
+            response = part["function_response"]
+            texts.append(f"{response.get('name')} -> {json.dumps(response.get('response', {}), ensure_ascii=False)}")
+    return "\n".join(texts)
+
+
+def _snippet(text, term):
+    position = max(0, text.lower().find(term))
+    start = max(0, position - RECALL_SNIPPET_CHARS // 3)
+    snippet = text[start:start + RECALL_SNIPPET_CHARS]
+    if start > 0:
+        snippet = "..." + snippet
+    if start + RECALL_SNIPPET_CHARS < len(text):
+        snippet += "..."
+    return snippet
+
+
+def recall_memory(query: str, max_results: int = 5, journal_path: str = MEMORY_FILE_NAME):
+    try:
+        if not os.path.exists(journal_path):
+            return json.dumps(
+                {"success": False, "data": "Belum ada riwayat percakapan yang tersimpan."}
+            )
+
+        terms = [term for term in query.lower().split() if term]
+        if not terms:
+            return json.dumps({"success": False, "data": "Query tidak boleh kosong."})
+
+        state = HistoryJournal(journal_path).replay()
+        matches = []
+        # Pesan terbaru lebih dulu, karena biasanya paling relevan
+        for record in reversed(state.messages):
+            text = _message_text(record)
+            lowered = text.lower()
+            if all(term in lowered for term in terms):
+                matches.append(
+                    {
+                        "seq": record.get("seq"),
+                        "role": record.get("role"),
+                        "snippet": _snippet(text, terms[0]),
+                    }
+                )
+
+        return json.dumps(
+            {
+                "success": True,
+                "data": {
+                    "total_matches": len(matches),
+                    "matches": matches[: int(max_results)],
+                },
+            }
+        )
+    except Exception as e:
+        return json.dumps(
+            {"success": False, "data": f"Gagal mencari di riwayat percakapan: {e}"}
+        )
+
+
+memory_tool_definitions = glm.Tool(
+    function_declarations=[
+        glm.FunctionDeclaration(
+            name="recall_memory",
+            description="Mencari pesan lama di riwayat percakapan yang tersimpan di disk (termasuk yang tidak lagi dimuat ke konteks). Mengembalikan cuplikan pesan yang cocok dengan semua kata kunci.",
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "query": glm.Schema(
+                        type=Type.STRING, description="Kata kunci pencarian."
+                    ),
+                    "max_results": glm.Schema(
+                        type=Type.NUMBER,
+                        description="Jumlah maksimum hasil (default: 5).",
+                    ),
+                },
+                required=["query"],
+            ),
+        ),
+    ]
+)
+
+memory_functions = {
+    "recall_memory": recall_memory,
+}
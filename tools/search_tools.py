@@ -0,0 +1,148 @@
+import google.ai.generativelanguage as glm
+from google.ai.generativelanguage import Type
+import fnmatch
+import json
+import os
+import re
+import time
+
+from config import SEARCH_DEFAULT_MAX_RESULTS
+from utils.path_utils import sanitize_path
+from utils.trigram_index import get_workspace_index, regex_required_literals, scan_large_file, search_file
+
+SEARCH_MAX_LINE_CHARS = 300
+SEARCH_MAX_CONTEXT_LINES = 10
+
+
+def _json_response(success, data):
+    return json.dumps({"success": success, "data": data})
+
+
+def search_workspace(
+    query,
+    regex=False,
+    case_sensitive=True,
+    path=".",
+    include=None,
+    context_lines=0,
+    max_results=SEARCH_DEFAULT_MAX_RESULTS,
+):
+    try:
+        started = time.perf_counter()
+        if not query:
+            return _json_response(False, "Query tidak boleh kosong.")
+        scope = sanitize_path(path)
+        include = list(include or [])
+        context_lines = min(max(0, int(context_lines)), SEARCH_MAX_CONTEXT_LINES)
+        max_results = max(1, int(max_results))
+
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            pattern = re.compile(query if regex else re.escape(query), flags | re.MULTILINE)
+        except re.error as e:
+            return _json_response(False, f"Regex tidak valid: {e}")
+
+        index = get_workspace_index()
+        # Hanya file yang berubah sejak pencarian terakhir yang dibaca ulang
+        reindexed = index.refresh()
+        literals = regex_required_literals(query) if regex else [query]
+        candidates = [
+            candidate for candidate in index.candidates(literals)
+            if os.path.commonpath([scope, candidate]) == scope
+        ]
+        # File di atas batas indeks tidak punya trigram, jadi dipindai langsung agar tidak terlewat
+        large_files = [
+            candidate for candidate in index.oversized_files()
+            if os.path.commonpath([scope, candidate]) == scope
+        ]
+
+        results, total_matches, truncated = [], 0, False
+        large_files_scanned = []
+        for candidate, scan in [(path, search_file) for path in candidates] + [
+            (path, scan_large_file) for path in large_files
+        ]:
+            relative = os.path.relpath(candidate, index.root).replace(os.sep, "/")
+            if include and not any(
+                fnmatch.fnmatch(relative, glob) or fnmatch.fnmatch(os.path.basename(relative), glob)
+                for glob in include
+            ):
+                continue
+            if scan is scan_large_file:
+                large_files_scanned.append(relative)
+            try:
+                matches = scan(
+                    candidate, pattern, context_lines, SEARCH_MAX_LINE_CHARS, max_results - total_matches
+                )
+            except OSError:
+                continue
+            if matches:
+                results.append({"path": relative, "matches": matches})
+                total_matches += len(matches)
+            if total_matches >= max_results:
+                truncated = True
+                break
+
+        data = {
+            "results": results,
+            "total_matches": total_matches,
+            "truncated": truncated,
+            "files_indexed": len(index.files),
+            "files_reindexed": reindexed,
+            "candidate_files": len(candidates),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if large_files_scanned:
+            data["large_files_scanned"] = large_files_scanned
+        return _json_response(True, data)
+    except ValueError as e:
+        return _json_response(False, f"Kesalahan keamanan: {e}")
+    except Exception as e:
+        return _json_response(False, f"Gagal mencari di workspace: {e}")
+
+
+search_tool_definitions = glm.Tool(
+    function_declarations=[
+        glm.FunctionDeclaration(
+            name="search_workspace",
+            description=(
+                "Mencari teks atau regex di semua file workspace memakai indeks trigram (jauh lebih cepat daripada grep atau "
+                "membaca file satu per satu). Mengembalikan path, nomor baris, isi baris, dan baris konteks opsional. "
+                "File di atas batas indeks dipindai baris per baris (dilaporkan di large_files_scanned); "
+                "regex yang melintasi beberapa baris tidak cocok di file tersebut."
+            ),
+            parameters=glm.Schema(
+                type=Type.OBJECT,
+                properties={
+                    "query": glm.Schema(type=Type.STRING, description="Teks atau pola regex yang dicari."),
+                    "regex": glm.Schema(
+                        type=Type.BOOLEAN, description="Perlakukan query sebagai regex Python (default: false)."
+                    ),
+                    "case_sensitive": glm.Schema(
+                        type=Type.BOOLEAN, description="Membedakan huruf besar/kecil (default: true)."
+                    ),
+                    "path": glm.Schema(
+                        type=Type.STRING, description="Batasi pencarian ke subdirektori ini (default: '.')."
+                    ),
+                    "include": glm.Schema(
+                        type=Type.ARRAY,
+                        items=glm.Schema(type=Type.STRING),
+                        description="Pola glob file yang dicari, mis. ['*.py'].",
+                    ),
+                    "context_lines": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah baris konteks sebelum/sesudah kecocokan (maks {SEARCH_MAX_CONTEXT_LINES}).",
+                    ),
+                    "max_results": glm.Schema(
+                        type=Type.INTEGER,
+                        description=f"Jumlah maksimum baris cocok (default: {SEARCH_DEFAULT_MAX_RESULTS}).",
+                    ),
+                },
+                required=["query"],
+            ),
+        ),
+    ]
+)
+
+search_functions = {
+    "search_workspace": search_workspace,
+}
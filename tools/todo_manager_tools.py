@@ -1,96 +1,146 @@
 from typing import List
+import json
+import os
 import google.ai.generativelanguage as glm
 
-def read_todo_list(file_path: str = "/MyProject/Han-Agent/han_workspace/todo.md") -> str:
-    """Reads the content of the todo.md file.
+from config import DIREKTORI_BATASAN_AI, TODO_FILE_NAME, TODO_STORE_FILE_NAME
+from utils.todo_store import TodoStore, TODO_STATUSES, TODO_STATUS_DONE, render_markdown
+
+TODO_MARKDOWN_FILE = os.path.join(DIREKTORI_BATASAN_AI, TODO_FILE_NAME)
+
+_todo_store = TodoStore(
+    os.path.join(DIREKTORI_BATASAN_AI, TODO_STORE_FILE_NAME),
+    legacy_markdown_path=TODO_MARKDOWN_FILE,
+)
+
+
+def read_todo_list(status: str = "all", format: str = "json") -> str:
+    """Membaca daftar todo.
 
     Args:
-        file_path: The absolute path to the todo.md file.
+        status: "all", "pending", atau "done".
+        format: "json" untuk item terstruktur, "markdown" untuk checklist.
 
     Returns:
-        The content of the todo.md file.
+        JSON berisi item (id, text, status) dan jumlah item per status.
     """
+    if status != "all" and status not in TODO_STATUSES:
+        return json.dumps({"success": False, "data": f"Status tidak valid: '{status}'. Gunakan all, pending, atau done."})
     try:
-        with open(file_path, "r") as f:
-            return f.read()
-    except FileNotFoundError:
-        return "todo.md not found."
+        items = _todo_store.list(None if status == "all" else status)
+        if format == "markdown":
+            return json.dumps({"success": True, "data": render_markdown(items)})
+        return json.dumps({"success": True, "data": {"items": items, "counts": _todo_store.counts()}})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal membaca daftar todo: {e}"})
+
 
-def add_todo_item(item: str, file_path: str = "/MyProject/Han-Agent/han_workspace/todo.md"):
-    """Adds a new item to the todo.md file.
+def add_todo_items(items: List[str]) -> str:
+    """Menambahkan beberapa item ke daftar todo dalam satu operasi.
 
     Args:
-        item: The todo item to add.
-        file_path: The absolute path to the todo.md file.
+        items: Item todo yang ditambahkan, sesuai urutan.
+
+    Returns:
+        JSON berisi ID stabil untuk item-item baru.
     """
-    with open(file_path, "a") as f:
-        f.write(f"- [ ] {item}\n")
-    return f"Added: {item}"
+    try:
+        ids = _todo_store.add_many(items)
+        return json.dumps({"success": True, "data": {"added_ids": ids}})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal menambahkan item todo: {e}"})
 
-def mark_todo_item_done(item_index: int, file_path: str = "/MyProject/Han-Agent/han_workspace/todo.md"):
-    """Marks a todo item as done in the todo.md file.
+
+def mark_todo_items_done(item_ids: List[int]) -> str:
+    """Menandai item todo sebagai selesai.
 
     Args:
-        item_index: The 1-based index of the todo item to mark as done.
-        file_path: The absolute path to the todo.md file.
+        item_ids: ID item, seperti yang dikembalikan add_todo_items atau read_todo_list.
+
+    Returns:
+        JSON berisi ID yang diperbarui, yang sudah selesai sebelumnya, dan yang tidak ditemukan.
     """
-    with open(file_path, "r") as f:
-        lines = f.readlines()
-
-    if 0 < item_index <= len(lines):
-        line = lines[item_index - 1]
-        if line.strip().startswith("- [ ]"):
-            lines[item_index - 1] = line.replace("- [ ]", "- [x]", 1)
-            with open(file_path, "w") as f:
-                f.writelines(lines)
-            return f"Marked item {item_index} as done."
-        else:
-            return f"Item {item_index} is not an uncompleted todo item."
-    else:
-        return f"Invalid item index: {item_index}"
+    try:
+        updated, unchanged, missing = _todo_store.set_status(item_ids, TODO_STATUS_DONE)
+        data = {"done_ids": updated}
+        if unchanged:
+            data["already_done_ids"] = unchanged
+        if missing:
+            data["missing_ids"] = missing
+        return json.dumps({"success": not missing, "data": data})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal memperbarui item todo: {e}"})
+
+
+def export_todo_markdown() -> str:
+    """Menulis seluruh daftar todo sebagai checklist Markdown ke todo.md di workspace.
+
+    Returns:
+        JSON berisi path file yang ditulis, relatif terhadap workspace.
+    """
+    try:
+        with open(TODO_MARKDOWN_FILE, "w", encoding="utf-8") as f:
+            f.write(render_markdown(_todo_store.list()))
+        return json.dumps({"success": True, "data": {"path": TODO_FILE_NAME}})
+    except Exception as e:
+        return json.dumps({"success": False, "data": f"Gagal menulis {TODO_FILE_NAME}: {e}"})
+
 
 todo_manager_tool_definitions = glm.Tool(
     function_declarations=[
         glm.FunctionDeclaration(
             name="read_todo_list",
-            description="Reads the content of the todo.md file.",
+            description="Membaca daftar todo sebagai item terstruktur dengan ID stabil, bisa difilter berdasarkan status.",
             parameters=glm.Schema(
                 type=glm.Type.OBJECT,
                 properties={
-                    "file_path": glm.Schema(type=glm.Type.STRING, description="The absolute path to the todo.md file.")
+                    "status": glm.Schema(type=glm.Type.STRING, description="Filter: 'all' (default), 'pending', atau 'done'."),
+                    "format": glm.Schema(type=glm.Type.STRING, description="'json' (default) atau 'markdown' untuk checklist."),
                 },
                 required=[],
             ),
         ),
         glm.FunctionDeclaration(
-            name="add_todo_item",
-            description="Adds a new item to the todo.md file.",
+            name="add_todo_items",
+            description="Menambahkan satu atau beberapa item ke daftar todo dalam satu panggilan. Mengembalikan ID stabil setiap item baru.",
             parameters=glm.Schema(
                 type=glm.Type.OBJECT,
                 properties={
-                    "item": glm.Schema(type=glm.Type.STRING, description="The todo item to add."),
-                    "file_path": glm.Schema(type=glm.Type.STRING, description="The absolute path to the todo.md file.")
+                    "items": glm.Schema(
+                        type=glm.Type.ARRAY,
+                        items=glm.Schema(type=glm.Type.STRING),
+                        description="Item todo yang ditambahkan, sesuai urutan.",
+                    ),
                 },
-                required=["item"],
+                required=["items"],
             ),
         ),
         glm.FunctionDeclaration(
-            name="mark_todo_item_done",
-            description="Marks a todo item as done in the todo.md file.",
+            name="mark_todo_items_done",
+            description="Menandai satu atau beberapa item todo sebagai selesai berdasarkan ID dalam satu panggilan.",
             parameters=glm.Schema(
                 type=glm.Type.OBJECT,
                 properties={
-                    "item_index": glm.Schema(type=glm.Type.INTEGER, description="The 1-based index of the todo item to mark as done."),
-                    "file_path": glm.Schema(type=glm.Type.STRING, description="The absolute path to the todo.md file.")
+                    "item_ids": glm.Schema(
+                        type=glm.Type.ARRAY,
+                        items=glm.Schema(type=glm.Type.INTEGER),
+                        description="ID item yang ditandai selesai.",
+                    ),
                 },
-                required=["item_index"],
+                required=["item_ids"],
             ),
         ),
+        glm.FunctionDeclaration(
+            name="export_todo_markdown",
+            description="Menulis daftar todo sebagai checklist Markdown ke todo.md di workspace. Hanya perlu jika file todo.md memang dibutuhkan.",
+            parameters=glm.Schema(type=glm.Type.OBJECT, properties={}),
+        ),
     ]
 )
 
 todo_manager_functions = {
     "read_todo_list": read_todo_list,
-    "add_todo_item": add_todo_item,
-    "mark_todo_item_done": mark_todo_item_done,
-}
\ No newline at end of file
+    "add_todo_items": add_todo_items,
+    "mark_todo_items_done": mark_todo_items_done,
+    "export_todo_markdown": export_todo_markdown,
+}
@@ -0,0 +1,58 @@
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Indeks BM25 sederhana di memori untuk meranking dokumen berdasarkan query."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        # documents: daftar dokumen yang masing-masing berupa daftar token
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokens) for tokens in documents]
+        self.doc_lengths = [len(tokens) for tokens in documents]
+        self.avg_doc_length = (
+            sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0
+        )
+
+        doc_freq = Counter()
+        for freqs in self.term_freqs:
+            doc_freq.update(freqs.keys())
+        total_docs = len(documents)
+        self.idf = {
+            term: math.log(1 + (total_docs - count + 0.5) / (count + 0.5))
+            for term, count in doc_freq.items()
+        }
+
+    def score(self, query_tokens, index):
+        freqs = self.term_freqs[index]
+        length_norm = 1 - self.b + self.b * (
+            self.doc_lengths[index] / self.avg_doc_length if self.avg_doc_length else 0
+        )
+        total = 0.0
+        for term in set(query_tokens):
+            tf = freqs.get(term)
+            if not tf:
+                continue
+            total += self.idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return total
+
+    def rank(self, query_tokens, top_k=None, min_score=0.0):
+        """Mengembalikan [(indeks_dokumen, skor)] terurut dari skor tertinggi."""
+        scored = [
+            (index, self.score(query_tokens, index))
+            for index in range(len(self.term_freqs))
+        ]
+        ranked = sorted(
+            (item for item in scored if item[1] > min_score),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked[:top_k] if top_k is not None else ranked
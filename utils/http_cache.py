@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+
+class PageCache:
+    """Cache halaman web di disk, satu file JSON per URL. Yang disimpan adalah
+    teks hasil ekstraksi beserta ETag/Last-Modified, sehingga respons 304 bisa
+    langsung dilayani tanpa mengunduh dan mem-parsing HTML lagi."""
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, url):
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def store(self, url, text, etag=None, last_modified=None):
+        """Menyimpan entri; tanpa validator (ETag/Last-Modified) tidak ada yang bisa direvalidasi."""
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+            "text": text,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(url))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self._prune()
+
+    def touch(self, url):
+        # mtime dipakai sebagai urutan LRU saat pemangkasan
+        try:
+            os.utime(self._path(url))
+        except OSError:
+            pass
+
+    def _prune(self):
+        try:
+            with os.scandir(self.directory) as iterator:
+                entries = [entry for entry in iterator if entry.name.endswith(".json")]
+        except OSError:
+            return
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def conditional_headers(entry):
+    """Header revalidasi untuk entri cache (kosong jika tidak ada entri)."""
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
@@ -0,0 +1,86 @@
+import os
+import re
+
+GITIGNORE_FILE_NAME = ".gitignore"
+
+
+def _glob_to_regex(pattern):
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            regex += "(?:.*/)?"
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+            continue
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[":
+            end = pattern.find("]", index + 1)
+            if end == -1:
+                regex += re.escape(char)
+            else:
+                regex += "[" + pattern[index + 1:end].replace("\\", "\\\\") + "]"
+                index = end
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            regex += re.escape(pattern[index])
+        else:
+            regex += re.escape(char)
+        index += 1
+    return regex
+
+
+class IgnoreRule:
+    def __init__(self, pattern, base_dir):
+        self.negated = pattern.startswith("!")
+        if self.negated:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Pola tanpa '/' berlaku untuk nama di kedalaman mana pun, selain itu relatif ke base_dir
+        self.anchored = "/" in pattern
+        self.base_dir = base_dir
+        self.regex = re.compile(_glob_to_regex(pattern.lstrip("/")) + r"\Z")
+
+    def matches(self, full_path, name, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if not self.anchored:
+            return bool(self.regex.match(name))
+        relative = os.path.relpath(full_path, self.base_dir)
+        if relative.startswith(".."):
+            return False
+        return bool(self.regex.match(relative.replace(os.sep, "/")))
+
+
+def load_gitignore(directory):
+    """Membaca aturan .gitignore di `directory`; kosong jika file tidak ada."""
+    rules = []
+    try:
+        with open(os.path.join(directory, GITIGNORE_FILE_NAME), "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                line = line.rstrip("\n").rstrip("\r")
+                if line.endswith(" ") and not line.endswith("\\ "):
+                    line = line.rstrip(" ")
+                if not line or line.startswith("#"):
+                    continue
+                rules.append(IgnoreRule(line, directory))
+    except OSError:
+        pass
+    return rules
+
+
+def is_ignored(rules, full_path, name, is_dir):
+    # Aturan terakhir yang cocok menentukan hasil, sama seperti git
+    ignored = False
+    for rule in rules:
+        if rule.matches(full_path, name, is_dir):
+            ignored = not rule.negated
+    return ignored
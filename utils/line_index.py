@@ -0,0 +1,72 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from config import LINE_INDEX_CACHE_SIZE
+
+
+class LineIndex:
+    """Offset byte awal setiap baris sebuah file, dibangun sekali lewat mmap."""
+
+    def __init__(self, mtime_ns, size, line_starts):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.line_starts = line_starts
+
+    @property
+    def line_count(self):
+        return len(self.line_starts)
+
+    def line_start(self, line_number):
+        # line_number berbasis 1; baris setelah baris terakhir berakhir di ukuran file
+        if line_number > len(self.line_starts):
+            return self.size
+        return self.line_starts[line_number - 1]
+
+    def line_at(self, offset):
+        return max(1, bisect_right(self.line_starts, offset))
+
+
+def _build_line_index(mm, size):
+    line_starts = array("Q", [0] if size else [])
+    position = mm.find(b"\n")
+    while position != -1:
+        if position + 1 < size:
+            line_starts.append(position + 1)
+        position = mm.find(b"\n", position + 1)
+    return line_starts
+
+
+_line_index_cache = OrderedDict()
+_line_index_lock = threading.Lock()
+
+
+def get_line_index(path, mm=None, stat=None):
+    """Mengembalikan LineIndex untuk `path`, memakai cache selama mtime/ukuran sama.
+    `mm` dan `stat` boleh diberikan jika pemanggil sudah membuka file tersebut."""
+    if stat is None:
+        stat = os.stat(path)
+    with _line_index_lock:
+        cached = _line_index_cache.get(path)
+        if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            _line_index_cache.move_to_end(path)
+            return cached
+
+    if stat.st_size == 0:
+        index = LineIndex(stat.st_mtime_ns, 0, array("Q"))
+    elif mm is not None:
+        index = LineIndex(stat.st_mtime_ns, stat.st_size, _build_line_index(mm, stat.st_size))
+    else:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as own_mm:
+                index = LineIndex(stat.st_mtime_ns, stat.st_size, _build_line_index(own_mm, stat.st_size))
+
+    with _line_index_lock:
+        _line_index_cache[path] = index
+        _line_index_cache.move_to_end(path)
+        while len(_line_index_cache) > LINE_INDEX_CACHE_SIZE:
+            _line_index_cache.popitem(last=False)
+    return index
@@ -0,0 +1,110 @@
+import itertools
+import os
+import threading
+import time
+
+from config import (
+    DIREKTORI_BATASAN_AI,
+    COMMAND_LOG_DIRECTORY,
+    COMMAND_OUTPUT_HEAD_BYTES,
+    COMMAND_OUTPUT_TAIL_BYTES,
+)
+
+READ_CHUNK_BYTES = 65536
+
+_log_ids = itertools.count(1)
+
+
+def new_log_label(prefix="cmd"):
+    return f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_log_ids)}"
+
+
+class OutputCapture:
+    """Menampung output proses dengan memori terbatas: sekian byte awal (head)
+    dan akhir (tail) disimpan di memori. Begitu output melebihi anggaran, seluruh
+    output ditulis ke file log di workspace agar bisa dibaca per halaman."""
+
+    def __init__(self, label, head_bytes=COMMAND_OUTPUT_HEAD_BYTES, tail_bytes=COMMAND_OUTPUT_TAIL_BYTES):
+        self.label = label
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total_bytes = 0
+        self.log_file = None
+        self.closed = False
+        self._log = None
+        # feed() berjalan di thread pembaca yang bisa masih hidup setelah close()
+        self._lock = threading.Lock()
+
+    @property
+    def truncated(self):
+        return self.total_bytes > len(self.head) + len(self.tail)
+
+    def _spill(self):
+        log_dir = os.path.join(DIREKTORI_BATASAN_AI, COMMAND_LOG_DIRECTORY)
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_file = os.path.join(COMMAND_LOG_DIRECTORY, f"{self.label}.log")
+        self._log = open(os.path.join(DIREKTORI_BATASAN_AI, self.log_file), "wb")
+        # Sampai titik ini belum ada byte yang dibuang, jadi head + tail = seluruh output
+        self._log.write(self.head)
+        self._log.write(self.tail)
+
+    def feed(self, data):
+        with self._lock:
+            # Setelah close(), sisa output dari pipe yang masih ditahan (mis. oleh
+            # proses cucu) dibuang agar log yang sudah ditulis tidak tertimpa.
+            if not data or self.closed:
+                return
+            self._feed(data)
+
+    def _feed(self, data):
+        self.total_bytes += len(data)
+        if self._log is not None:
+            self._log.write(data)
+
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+
+        self.tail += data
+        excess = len(self.tail) - self.tail_bytes
+        if excess > 0:
+            if self._log is None:
+                self._spill()
+            del self.tail[:excess]
+
+    def text(self):
+        with self._lock:
+            return self._text()
+
+    def _text(self):
+        if not self.truncated:
+            return (self.head + self.tail).decode("utf-8", errors="replace")
+        omitted = self.total_bytes - len(self.head) - len(self.tail)
+        return (
+            self.head.decode("utf-8", errors="replace")
+            + f"\n...[{omitted} byte dilewati; output lengkap di {self.log_file}]...\n"
+            + self.tail.decode("utf-8", errors="replace")
+        )
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+def drain_pipe(pipe, capture):
+    """Membaca pipe biner sampai EOF ke dalam `capture` (dijalankan di thread)."""
+    try:
+        for chunk in iter(lambda: pipe.read1(READ_CHUNK_BYTES), b""):
+            capture.feed(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        pipe.close()
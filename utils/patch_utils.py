@@ -0,0 +1,299 @@
+import os
+import re
+import tempfile
+
+from utils.path_utils import sanitize_path
+
+SEARCH_MARKER = "<<<<<<< SEARCH"
+BLOCK_PATTERN = re.compile(
+    r"^(?P<path>[^\n]*)\n<<<<<<< SEARCH[ \t]*\n(?P<search>.*?)^=======[ \t]*\n(?P<replace>.*?)^>>>>>>> REPLACE[ \t]*$",
+    re.MULTILINE | re.DOTALL,
+)
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+DEV_NULL = "/dev/null"
+
+
+class PatchError(Exception):
+    pass
+
+
+class FilePatch:
+    def __init__(self, path):
+        self.path = path
+        # Unified diff: daftar hunk [(baris_awal_lama, baris_lama, baris_baru, jumlah_tambah, jumlah_hapus)]
+        self.hunks = []
+        # Blok search/replace: daftar (teks_cari, teks_ganti)
+        self.replacements = []
+        self.is_new = False
+        self.is_deleted = False
+
+
+def _clean_diff_path(raw):
+    path = raw.split("\t")[0].strip()
+    if path == DEV_NULL:
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def _is_file_header(lines, index):
+    return lines[index].startswith("--- ") and index + 1 < len(lines) and lines[index + 1].startswith("+++ ")
+
+
+def _parse_unified_diff(text):
+    patches = []
+    lines = text.splitlines()
+    index = 0
+    current = None
+    while index < len(lines):
+        line = lines[index]
+        if _is_file_header(lines, index):
+            old_path = _clean_diff_path(line[4:])
+            new_path = _clean_diff_path(lines[index + 1][4:])
+            current = FilePatch(new_path or old_path)
+            current.is_new = old_path is None
+            current.is_deleted = new_path is None
+            patches.append(current)
+            index += 2
+            continue
+
+        header = HUNK_HEADER_PATTERN.match(line)
+        if header and current is not None:
+            old_lines, new_lines = [], []
+            added = removed = 0
+            old_remaining = 1 if header.group(2) is None else int(header.group(2))
+            new_remaining = 1 if header.group(4) is None else int(header.group(4))
+            index += 1
+            # Selama hitungan di header belum habis, baris '--- '/'+++ ' adalah isi hunk
+            # (mis. menghapus '-- x'), bukan header file. Hitungan yang terlalu kecil
+            # (sering pada diff buatan model) ditoleransi: hunk lalu dibaca sampai
+            # header berikutnya.
+            while index < len(lines):
+                body = lines[index]
+                counted = old_remaining > 0 or new_remaining > 0
+                if body.startswith("@@") or body.startswith("diff --git") or (
+                    not counted and _is_file_header(lines, index)
+                ):
+                    break
+                if body.startswith("+"):
+                    new_lines.append(body[1:])
+                    added += 1
+                    new_remaining -= 1
+                elif body.startswith("-"):
+                    old_lines.append(body[1:])
+                    removed += 1
+                    old_remaining -= 1
+                elif body.startswith("\\"):
+                    pass
+                else:
+                    context = body[1:] if body.startswith(" ") else body
+                    old_lines.append(context)
+                    new_lines.append(context)
+                    old_remaining -= 1
+                    new_remaining -= 1
+                index += 1
+            # Baris kosong di akhir hunk biasanya hanya pemisah, bukan konteks
+            while old_lines and new_lines and old_lines[-1] == "" and new_lines[-1] == "":
+                old_lines.pop()
+                new_lines.pop()
+            current.hunks.append((int(header.group(1)), old_lines, new_lines, added, removed))
+            continue
+        index += 1
+
+    if not patches:
+        raise PatchError("Patch tidak berisi header file unified diff ('--- ' / '+++ ') atau blok SEARCH/REPLACE.")
+    return patches
+
+
+def _parse_search_replace(text):
+    patches = {}
+    for match in BLOCK_PATTERN.finditer(text):
+        path = match.group("path").strip().strip("`").strip()
+        if not path:
+            raise PatchError("Blok SEARCH/REPLACE harus diawali baris berisi path file.")
+        patch = patches.setdefault(path, FilePatch(path))
+        patch.replacements.append((match.group("search"), match.group("replace")))
+    if not patches:
+        raise PatchError("Blok SEARCH/REPLACE tidak dapat dibaca. Format: path, '<<<<<<< SEARCH', teks lama, '=======', teks baru, '>>>>>>> REPLACE'.")
+    return list(patches.values())
+
+
+def parse_patch(text):
+    if SEARCH_MARKER in text:
+        return _parse_search_replace(text)
+    return _parse_unified_diff(text)
+
+
+def patch_target_paths(text):
+    """Path (relatif workspace) yang disentuh patch; kosong jika patch tidak valid."""
+    try:
+        return [patch.path for patch in parse_patch(text)]
+    except PatchError:
+        return []
+
+
+def _find_block(lines, block, hint, normalize):
+    if not block:
+        return min(max(hint, 0), len(lines))
+    target = [normalize(line) for line in block]
+    candidates = [
+        start for start in range(len(lines) - len(block) + 1)
+        if normalize(lines[start]) == target[0]
+        and all(normalize(lines[start + i]) == target[i] for i in range(1, len(block)))
+    ]
+    if not candidates:
+        return None
+    # Jika konteks muncul lebih dari sekali, pilih yang paling dekat dengan nomor baris hunk
+    return min(candidates, key=lambda start: abs(start - hint))
+
+
+def _apply_hunks(patch, content):
+    newline = "\r\n" if "\r\n" in content else "\n"
+    has_final_newline = content.endswith(("\n", "\r"))
+    lines = content.splitlines()
+    added = removed = 0
+    shift = 0
+    for number, (old_start, old_lines, new_lines, hunk_added, hunk_removed) in enumerate(patch.hunks, start=1):
+        hint = old_start - 1 + shift
+        position = _find_block(lines, old_lines, hint, lambda line: line)
+        if position is None:
+            # Toleransi spasi di akhir baris yang sering hilang saat diff disalin
+            position = _find_block(lines, old_lines, hint, lambda line: line.rstrip())
+        if position is None:
+            raise PatchError(f"Hunk #{number} untuk '{patch.path}' tidak cocok dengan isi file saat ini.")
+        lines[position:position + len(old_lines)] = new_lines
+        shift += len(new_lines) - len(old_lines)
+        added += hunk_added
+        removed += hunk_removed
+
+    new_content = newline.join(lines)
+    if lines and (has_final_newline or patch.is_new):
+        new_content += newline
+    return new_content, added, removed
+
+
+def _strip_final_newline(text):
+    if text.endswith("\r\n"):
+        return text[:-2]
+    return text[:-1] if text.endswith("\n") else text
+
+
+def _apply_replacements(patch, content):
+    added = removed = 0
+    for number, (search, replace) in enumerate(patch.replacements, start=1):
+        if not search:
+            if content:
+                raise PatchError(f"Blok #{number} untuk '{patch.path}': SEARCH kosong hanya boleh untuk file baru.")
+            content = replace
+        else:
+            if "\r\n" in content and "\r\n" not in search:
+                search = search.replace("\n", "\r\n")
+                replace = replace.replace("\n", "\r\n")
+            occurrences = content.count(search)
+            if occurrences == 0:
+                # Baris terakhir file tanpa newline penutup: blok SEARCH selalu diakhiri
+                # newline, jadi dicocokkan tanpa newline itu di akhir file
+                search_at_eof = _strip_final_newline(search)
+                if search_at_eof == search or not search_at_eof or not content.endswith(search_at_eof):
+                    raise PatchError(f"Blok #{number} untuk '{patch.path}': teks SEARCH tidak ditemukan.")
+                search, replace = search_at_eof, _strip_final_newline(replace)
+                content = content[:len(content) - len(search)] + replace
+                added += replace.count("\n") + 1 if replace else 0
+                removed += search.count("\n") + 1
+                continue
+            if occurrences > 1:
+                raise PatchError(
+                    f"Blok #{number} untuk '{patch.path}': teks SEARCH muncul {occurrences} kali; tambahkan konteks agar unik."
+                )
+            content = content.replace(search, replace, 1)
+        added += replace.count("\n")
+        removed += search.count("\n")
+    return content, added, removed
+
+
+def _read_text(full_path):
+    with open(full_path, "r", encoding="utf-8", errors="surrogateescape", newline="") as f:
+        return f.read()
+
+
+def plan_patch(text):
+    """Memvalidasi patch terhadap isi file saat ini tanpa menulis apa pun.
+    Mengembalikan daftar (path, full_path, konten_lama, konten_baru, ringkasan)."""
+    plans = []
+    seen = set()
+    for patch in parse_patch(text):
+        full_path = sanitize_path(patch.path)
+        if full_path in seen:
+            raise PatchError(f"File '{patch.path}' muncul lebih dari sekali dalam patch.")
+        seen.add(full_path)
+
+        exists = os.path.isfile(full_path)
+        if os.path.exists(full_path) and not exists:
+            raise PatchError(f"'{patch.path}' bukan file.")
+        if patch.is_new and exists:
+            raise PatchError(f"File '{patch.path}' sudah ada, tidak dapat dibuat sebagai file baru.")
+        if not exists and not patch.is_new and not (
+            patch.replacements and all(not search for search, _ in patch.replacements)
+        ):
+            raise PatchError(f"File '{patch.path}' tidak ditemukan.")
+
+        old_content = _read_text(full_path) if exists else None
+        if patch.is_deleted:
+            # Hunk penghapusan tetap dicocokkan agar file yang sudah berubah tidak ikut terhapus
+            _apply_hunks(patch, old_content)
+            new_content, added, removed, action = None, 0, len(old_content.splitlines()), "deleted"
+        elif patch.hunks:
+            new_content, added, removed = _apply_hunks(patch, old_content or "")
+            action = "modified" if exists else "created"
+        else:
+            new_content, added, removed = _apply_replacements(patch, old_content or "")
+            action = "modified" if exists else "created"
+
+        summary = {
+            "path": patch.path,
+            "action": action,
+            "changes": len(patch.hunks) or len(patch.replacements),
+            "lines_added": added,
+            "lines_removed": removed,
+        }
+        plans.append((patch.path, full_path, old_content, new_content, summary))
+    return plans
+
+
+def _write_atomic(full_path, content):
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".patch-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", errors="surrogateescape", newline="") as f:
+            f.write(content)
+        if os.path.exists(full_path):
+            os.chmod(tmp_path, os.stat(full_path).st_mode & 0o7777)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def commit_patch(plans):
+    """Menulis hasil plan_patch; jika satu file gagal, file yang sudah ditulis dikembalikan."""
+    done = []
+    try:
+        for _, full_path, old_content, new_content, _ in plans:
+            if new_content is None:
+                os.remove(full_path)
+            else:
+                _write_atomic(full_path, new_content)
+            done.append((full_path, old_content))
+    except Exception:
+        for full_path, old_content in reversed(done):
+            try:
+                if old_content is None:
+                    os.remove(full_path)
+                else:
+                    _write_atomic(full_path, old_content)
+            except OSError:
+                pass
+        raise
@@ -0,0 +1,102 @@
+import os
+import threading
+
+from config import (
+    DIREKTORI_BATASAN_AI,
+    COMMAND_LOG_DIRECTORY,
+    PROCESS_OUTPUT_BUFFER_BYTES,
+    PROCESS_LOG_MAX_BYTES,
+    PROCESS_LOG_BACKUPS,
+)
+
+
+class ProcessOutput:
+    """Ring buffer output proses latar belakang dengan offset absolut, plus
+    file log berotasi. Pembaca meminta data sejak offset tertentu; byte yang
+    sudah keluar dari buffer hanya tersedia di file log."""
+
+    def __init__(self, label, buffer_bytes=PROCESS_OUTPUT_BUFFER_BYTES):
+        self.buffer_bytes = buffer_bytes
+        self.buffer = bytearray()
+        # Offset absolut byte pertama di buffer dan total byte yang pernah diterima
+        self.buffer_start = 0
+        self.total_bytes = 0
+        self.closed = False
+        self.log_file = os.path.join(COMMAND_LOG_DIRECTORY, f"{label}.log")
+        self._log_path = os.path.join(DIREKTORI_BATASAN_AI, self.log_file)
+        self._log = None
+        self._log_size = 0
+        # Offset absolut awal tiap segmen log yang masih ada, dari yang terlama
+        self._segment_starts = []
+        self._lock = threading.Lock()
+
+    def _rotate_log(self):
+        self._log.close()
+        for index in range(PROCESS_LOG_BACKUPS, 0, -1):
+            source = self._log_path if index == 1 else f"{self._log_path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self._log_path}.{index}")
+        self._log = open(self._log_path, "wb")
+        self._log_size = 0
+        # Segmen tertua tertimpa saat jumlah cadangan sudah penuh
+        self._segment_starts = self._segment_starts[-PROCESS_LOG_BACKUPS:] + [self.total_bytes]
+
+    def _write_log(self, data):
+        if self._log is None:
+            os.makedirs(os.path.dirname(self._log_path), exist_ok=True)
+            self._log = open(self._log_path, "wb")
+            self._segment_starts = [self.total_bytes]
+        if self._log_size + len(data) > PROCESS_LOG_MAX_BYTES and self._log_size:
+            self._rotate_log()
+        self._log.write(data)
+        self._log.flush()
+        self._log_size += len(data)
+
+    def feed(self, data):
+        with self._lock:
+            try:
+                self._write_log(data)
+            except OSError:
+                pass
+            self.buffer += data
+            self.total_bytes += len(data)
+            excess = len(self.buffer) - self.buffer_bytes
+            if excess > 0:
+                del self.buffer[:excess]
+                self.buffer_start += excess
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def log_segments(self):
+        """File log yang masih ada (relatif workspace), dari yang terlama, beserta
+        offset absolut byte pertamanya. Output sebelum offset pertama sudah terbuang."""
+        with self._lock:
+            count = len(self._segment_starts)
+            paths = [f"{self.log_file}.{index}" for index in range(count - 1, 0, -1)] + [self.log_file]
+            return [{"path": path, "offset": start} for path, start in zip(paths, self._segment_starts)]
+
+    def read(self, since_offset=0, max_bytes=None):
+        with self._lock:
+            since_offset = min(max(0, int(since_offset)), self.total_bytes)
+            start = max(since_offset, self.buffer_start)
+            end = self.total_bytes if max_bytes is None else min(self.total_bytes, start + max(1, int(max_bytes)))
+            chunk = bytes(self.buffer[start - self.buffer_start:end - self.buffer_start])
+            return {
+                "output": chunk.decode("utf-8", errors="replace"),
+                "offset": start,
+                "next_offset": end,
+                "total_bytes": self.total_bytes,
+                # Byte yang diminta tetapi sudah keluar dari buffer memori
+                "skipped_bytes": start - since_offset,
+            }
+
+    def tail(self, max_bytes):
+        with self._lock:
+            since_offset = max(self.buffer_start, self.total_bytes - max_bytes)
+        return self.read(since_offset)
+
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+
+from config import PROMPT_DIRECTORY, PROMPT_MODULE_MAX_SELECTED, PROMPT_MODULE_MIN_SCORE
+from logging_handler import log_error
+from utils.bm25 import BM25Index, tokenize
+
+# Modul berawalan '_' adalah instruksi inti yang selalu dimuat
+CORE_MODULE_PREFIX = "_"
+MANIFEST_FILE_NAME = "manifest.json"
+# Kata kunci dari manifest diberi bobot lebih dibanding kata di isi modul
+KEYWORD_WEIGHT = 3
+
+
+class PromptModule:
+    def __init__(self, name, content, mtime_ns, description="", keywords=None):
+        self.name = name
+        self.content = content
+        self.mtime_ns = mtime_ns
+        self.description = description
+        self.keywords = keywords or []
+
+    @property
+    def is_core(self):
+        return self.name.startswith(CORE_MODULE_PREFIX)
+
+    def keyword_tokens(self):
+        return [token for keyword in self.keywords for token in tokenize(keyword)]
+
+    def tokens(self):
+        return tokenize(self.content) + self.keyword_tokens() * KEYWORD_WEIGHT
+
+    def matches_keywords(self, query_tokens):
+        # Modul tanpa kata kunci di manifest hanya mengandalkan skor BM25
+        keyword_tokens = self.keyword_tokens()
+        return not keyword_tokens or any(token in keyword_tokens for token in query_tokens)
+
+
+class PromptIndex:
+    """Indeks BM25 atas semua modul prompt di PROMPT_DIRECTORY. Isi modul
+    di-cache dan hanya dibaca ulang dari disk jika mtime-nya berubah."""
+
+    def __init__(self, directory=PROMPT_DIRECTORY):
+        self.directory = directory
+        self.modules = {}
+        self._manifest_mtime_ns = None
+        self._manifest = {}
+        self._bm25 = None
+        self._names = []
+        self._lock = threading.Lock()
+
+    def _load_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE_NAME)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self._manifest, self._manifest_mtime_ns = {}, None
+            return False
+        if mtime_ns == self._manifest_mtime_ns:
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            log_error(f"Gagal membaca manifest modul prompt: {e}")
+            self._manifest = {}
+        self._manifest_mtime_ns = mtime_ns
+        return True
+
+    def refresh(self):
+        with self._lock:
+            changed = self._load_manifest()
+            try:
+                filenames = sorted(f for f in os.listdir(self.directory) if f.endswith(".txt"))
+            except FileNotFoundError:
+                filenames = []
+
+            for name in list(self.modules):
+                if name not in filenames:
+                    del self.modules[name]
+                    changed = True
+
+            for name in filenames:
+                path = os.path.join(self.directory, name)
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                    cached = self.modules.get(name)
+                    if cached is not None and cached.mtime_ns == mtime_ns and not changed:
+                        continue
+                    if cached is not None and cached.mtime_ns == mtime_ns:
+                        content = cached.content
+                    else:
+                        with open(path, "r", encoding="utf-8") as f:
+                            content = f.read()
+                    meta = self._manifest.get(name, {})
+                    self.modules[name] = PromptModule(
+                        name, content, mtime_ns, meta.get("description", ""), meta.get("keywords", [])
+                    )
+                    changed = True
+                except OSError as e:
+                    log_error(f"Gagal membaca modul prompt {name}: {e}")
+
+            if changed or self._bm25 is None:
+                self._names = list(self.modules)
+                self._bm25 = BM25Index([self.modules[name].tokens() for name in self._names])
+
+    def core_modules(self):
+        return [name for name in self.modules if self.modules[name].is_core]
+
+    def optional_modules(self):
+        return [name for name in self.modules if not self.modules[name].is_core]
+
+    def select(self, query, max_modules=PROMPT_MODULE_MAX_SELECTED, min_score=PROMPT_MODULE_MIN_SCORE):
+        """Mengembalikan nama modul opsional yang relevan dengan query, terurut menurut skor."""
+        self.refresh()
+        query_tokens = tokenize(query)
+        selected = []
+        for index, _ in self._bm25.rank(query_tokens, min_score=min_score):
+            module = self.modules[self._names[index]]
+            # Kata umum (mis. "buat", "script") bisa memberi skor tinggi pada korpus kecil,
+            # jadi modul dengan kata kunci hanya dipilih jika salah satunya disebut.
+            if not module.is_core and module.matches_keywords(query_tokens):
+                selected.append(module.name)
+        return selected[:max_modules]
+
+    def resolve(self, name):
+        self.refresh()
+        if name in self.modules:
+            return name
+        if f"{name}.txt" in self.modules:
+            return f"{name}.txt"
+        return None
+
+    def get(self, name):
+        resolved = self.resolve(name)
+        return self.modules[resolved].content if resolved else None
+
+    def build_instruction(self, optional_names):
+        self.refresh()
+        names = self.core_modules() + [name for name in optional_names if name in self.modules]
+        return "\n\n".join(self.modules[name].content for name in names)
+
+
+_prompt_index = None
+_prompt_index_lock = threading.Lock()
+
+
+def get_prompt_index():
+    global _prompt_index
+    with _prompt_index_lock:
+        if _prompt_index is None:
+            _prompt_index = PromptIndex()
+        return _prompt_index
@@ -0,0 +1,143 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Modul resource tidak tersedia di Windows; akuntansi CPU/RSS dilewati
+    resource = None
+
+LEDGER_TOP_COMMANDS = 5
+
+
+def _exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return status
+
+
+def _rss_mb(ru_maxrss):
+    # ru_maxrss dalam kilobyte di Linux, tetapi dalam byte di macOS. Nilainya juga
+    # mencakup memori proses induk saat fork, jadi perintah kecil tidak pernah nol.
+    rss_bytes = ru_maxrss if sys.platform == "darwin" else ru_maxrss * 1024
+    return round(rss_bytes / (1024 * 1024), 1)
+
+
+def wait_for_exit(process, timeout=None):
+    """Menunggu `process` (subprocess.Popen) selesai lewat os.wait4 sehingga
+    pemakaian CPU dan RSS puncaknya ikut terbaca. Mengembalikan struct rusage
+    (None jika tidak tersedia) atau melempar subprocess.TimeoutExpired."""
+    if not hasattr(os, "wait4"):
+        process.wait(timeout)
+        return None
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = 0.001
+    try:
+        while True:
+            pid, status, usage = os.wait4(process.pid, 0 if deadline is None else os.WNOHANG)
+            if pid:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.05)
+    except ChildProcessError:
+        # Proses sudah dipanen di tempat lain; status keluar masih bisa diambil dari Popen
+        process.wait()
+        return None
+
+    process.returncode = _exit_code(status)
+    return usage
+
+
+def stop_child(process, force=False):
+    """Mengirim SIGTERM (atau SIGKILL jika `force`) ke `process`. Berbeda dengan
+    Popen.terminate()/kill(), fungsi ini tidak memanggil poll(), sehingga proses
+    hanya dipanen oleh wait_for_exit dan rusage-nya tidak hilang."""
+    if not hasattr(os, "wait4"):
+        if force:
+            process.kill()
+        else:
+            process.terminate()
+        return
+    if process.returncode is not None:
+        return
+    try:
+        os.kill(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+
+def children_cpu_times():
+    """Total waktu CPU user/sys semua proses anak yang sudah dipanen."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime, usage.ru_stime
+
+
+class ResourceLedger:
+    """Mencatat pemakaian sumber daya setiap perintah selama sesi agar build/tes
+    yang lambat atau boros memori mudah ditemukan."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {command: {"runs", "wall_seconds", "user_cpu_seconds", "sys_cpu_seconds", "peak_rss_mb"}}
+        self.commands = {}
+
+    def record(self, command, wall_seconds, usage=None, cpu_times=None):
+        """Mencatat satu eksekusi; mengembalikan ringkasan untuk respons tool."""
+        entry = {"wall_seconds": round(wall_seconds, 3)}
+        if usage is not None:
+            entry["user_cpu_seconds"] = round(usage.ru_utime, 3)
+            entry["sys_cpu_seconds"] = round(usage.ru_stime, 3)
+            entry["peak_rss_mb"] = _rss_mb(usage.ru_maxrss)
+        elif cpu_times is not None:
+            # Selisih RUSAGE_CHILDREN bisa ikut menghitung proses anak lain yang selesai bersamaan
+            entry["user_cpu_seconds"] = round(cpu_times[0], 3)
+            entry["sys_cpu_seconds"] = round(cpu_times[1], 3)
+            entry["approximate"] = True
+
+        with self._lock:
+            totals = self.commands.setdefault(
+                command,
+                {"runs": 0, "wall_seconds": 0.0, "user_cpu_seconds": 0.0, "sys_cpu_seconds": 0.0, "peak_rss_mb": 0.0},
+            )
+            totals["runs"] += 1
+            for key in ("wall_seconds", "user_cpu_seconds", "sys_cpu_seconds"):
+                totals[key] = round(totals[key] + entry.get(key, 0.0), 3)
+            totals["peak_rss_mb"] = max(totals["peak_rss_mb"], entry.get("peak_rss_mb", 0.0))
+        return entry
+
+    def summary(self, top=LEDGER_TOP_COMMANDS):
+        with self._lock:
+            commands = {command: dict(totals) for command, totals in self.commands.items()}
+
+        def top_by(key):
+            ranked = sorted(commands.items(), key=lambda item: item[1][key], reverse=True)
+            return [{"command": command, **totals} for command, totals in ranked[:top] if totals[key] > 0]
+
+        return {
+            "commands_run": sum(totals["runs"] for totals in commands.values()),
+            "total_wall_seconds": round(sum(t["wall_seconds"] for t in commands.values()), 3),
+            "total_cpu_seconds": round(
+                sum(t["user_cpu_seconds"] + t["sys_cpu_seconds"] for t in commands.values()), 3
+            ),
+            "slowest": top_by("wall_seconds"),
+            "most_memory": top_by("peak_rss_mb"),
+        }
+
+
+_session_ledger = ResourceLedger()
+
+
+def get_session_ledger():
+    return _session_ledger
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+from utils.sqlite_utils import WalDatabase
+
+# Batas parameter per query; SQLite lama membatasi 999 variabel per statement
+SQL_VARIABLE_CHUNK = 500
+# Karakter Unicode terbesar, dipakai sebagai batas atas rentang prefix
+_MAX_CHAR = "\U0010ffff"
+
+
+class ScratchpadStore:
+    """Penyimpanan kunci-nilai scratchpad di SQLite mode WAL. Setiap penulisan
+    hanya meng-upsert baris yang berubah, dan pembaca tidak memblokir penulis."""
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.legacy_json_path = legacy_json_path
+        self.database = WalDatabase(db_path, initializer=self._initialize)
+
+    def _initialize(self, connection, is_new):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS scratchpad ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        if is_new:
+            self._import_legacy_json(connection)
+
+    def _connect(self):
+        return self.database.connection()
+
+    def _import_legacy_json(self, connection):
+        # Scratchpad format lama (satu file JSON) diimpor sekali saat database dibuat
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return
+        try:
+            with open(self.legacy_json_path, "r") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return
+        if isinstance(data, dict):
+            self._upsert(connection, data.items())
+
+    def _upsert(self, connection, items):
+        now = time.time()
+        rows = [(str(key), str(value), now) for key, value in items]
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT OR REPLACE INTO scratchpad (key, value, updated_at) VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """Menulis banyak pasangan (key, value) dalam satu transaksi."""
+        return self._upsert(self._connect(), items)
+
+    def get(self, key):
+        row = self._connect().execute("SELECT value FROM scratchpad WHERE key = ?", (str(key),)).fetchone()
+        return None if row is None else row[0]
+
+    def get_many(self, keys):
+        """Mengembalikan {key: value} untuk kunci yang ada."""
+        keys = [str(key) for key in keys]
+        found = {}
+        connection = self._connect()
+        for start in range(0, len(keys), SQL_VARIABLE_CHUNK):
+            chunk = keys[start:start + SQL_VARIABLE_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = connection.execute(
+                f"SELECT key, value FROM scratchpad WHERE key IN ({placeholders})", chunk
+            )
+            found.update(rows)
+        return found
+
+    def list_keys(self, prefix="", limit=None):
+        """Kunci berawalan `prefix` (urut), memakai rentang pada primary key
+        alih-alih LIKE agar tetap memakai indeks. Mengembalikan (keys, total)."""
+        connection = self._connect()
+        where, params = "", ()
+        if prefix:
+            where, params = "WHERE key >= ? AND key < ?", (prefix, prefix + _MAX_CHAR)
+        total = connection.execute(f"SELECT COUNT(*) FROM scratchpad {where}", params).fetchone()[0]
+        query = f"SELECT key FROM scratchpad {where} ORDER BY key"
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (int(limit),)
+        return [row[0] for row in connection.execute(query, params)], total
+
+    def close(self):
+        self.database.close()
@@ -0,0 +1,63 @@
+import json
+import time
+
+from utils.sqlite_utils import WalDatabase
+
+
+def normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+
+class SearchCache:
+    """Cache hasil web_search di SQLite, dikunci dengan query ternormalisasi dan
+    num_results. Entri kedaluwarsa setelah `ttl_seconds`; jika jumlah entri
+    melebihi `max_entries`, entri yang paling lama tidak dipakai dibuang."""
+
+    def __init__(self, db_path, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.database = WalDatabase(db_path, initializer=self._initialize)
+
+    def _initialize(self, connection, is_new):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            "query TEXT NOT NULL, num_results INTEGER NOT NULL, results TEXT NOT NULL, "
+            "created_at REAL NOT NULL, used_at REAL NOT NULL, PRIMARY KEY (query, num_results)"
+            ") WITHOUT ROWID"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS searches_used_at ON searches (used_at)")
+
+    def get(self, query, num_results):
+        connection = self.database.connection()
+        key = (normalize_query(query), int(num_results))
+        row = connection.execute(
+            "SELECT results, created_at FROM searches WHERE query = ? AND num_results = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > self.ttl_seconds:
+            connection.execute("DELETE FROM searches WHERE query = ? AND num_results = ?", key)
+            return None
+        connection.execute(
+            "UPDATE searches SET used_at = ? WHERE query = ? AND num_results = ?", (now,) + key
+        )
+        return json.loads(row[0])
+
+    def put(self, query, num_results, results):
+        connection = self.database.connection()
+        now = time.time()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT OR REPLACE INTO searches (query, num_results, results, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), int(num_results), json.dumps(results, ensure_ascii=False), now, now),
+            )
+            connection.execute("DELETE FROM searches WHERE created_at < ?", (now - self.ttl_seconds,))
+            # Buang semua entri yang lebih lama dipakai daripada entri ke-max_entries
+            connection.execute(
+                "DELETE FROM searches WHERE used_at <= ("
+                "SELECT used_at FROM searches ORDER BY used_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            )
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+
+
+def _file_identity(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class WalDatabase:
+    """Koneksi SQLite mode WAL per thread ke satu file database. `initializer`
+    dipanggil dengan (connection, is_new) untuk setiap koneksi baru, jadi harus
+    idempoten. Koneksi yang di-cache dibuka ulang bila file database atau -wal
+    terhapus/diganti, sehingga file dibuat ulang lengkap dengan skemanya."""
+
+    def __init__(self, db_path, initializer=None):
+        self.db_path = db_path
+        self.initializer = initializer
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+
+    def _files_unchanged(self):
+        db_identity, wal_identity = self._local.identity
+        current_db = _file_identity(self.db_path)
+        if current_db is None or current_db != db_identity:
+            return False
+        current_wal = _file_identity(self.db_path + "-wal")
+        if wal_identity is not None and current_wal != wal_identity:
+            return False
+        self._local.identity = (current_db, current_wal)
+        return True
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            if self._files_unchanged():
+                return connection
+            # File database (atau -wal-nya) dihapus/diganti sejak koneksi dibuka; tulisan
+            # lewat koneksi lama akan masuk ke inode yang sudah di-unlink dan hilang.
+            connection.close()
+            self._local.connection = None
+        with self._init_lock:
+            is_new = not os.path.exists(self.db_path)
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            # Koneksi per thread: tool sinkron dijalankan di thread pool
+            connection = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if self.initializer is not None:
+                self.initializer(connection, is_new)
+            self._local.identity = (_file_identity(self.db_path), _file_identity(self.db_path + "-wal"))
+        self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,34 @@
+from utils.bm25 import BM25Index, tokenize
+
+
+def split_chunks(text, max_chars):
+    """Memecah teks per baris menjadi potongan <= max_chars. Mengembalikan
+    [(offset, teks_potongan)] dengan offset karakter di teks asli."""
+    chunks = []
+    start = 0
+    end = 0
+    position = 0
+    for line in text.splitlines(keepends=True):
+        line_end = position + len(line)
+        if line_end - start > max_chars and end > start:
+            chunks.append((start, text[start:end].rstrip("\n")))
+            start = end
+        # Baris yang sendirian sudah melebihi batas dipotong, sebisa mungkin di spasi
+        while line_end - start > max_chars:
+            cut = text.rfind(" ", start + max_chars // 2, start + max_chars) + 1 or start + max_chars
+            chunks.append((start, text[start:cut]))
+            start = cut
+        end = position = line_end
+    if end > start and text[start:end].strip():
+        chunks.append((start, text[start:end].rstrip("\n")))
+    return chunks
+
+
+def top_chunks(text, query, top_k, max_chars):
+    """Potongan teks paling relevan terhadap query menurut BM25, urut dari skor tertinggi."""
+    chunks = split_chunks(text, max_chars)
+    index = BM25Index([tokenize(chunk) for _, chunk in chunks])
+    return [
+        {"offset": chunks[position][0], "score": round(score, 3), "text": chunks[position][1]}
+        for position, score in index.rank(tokenize(query), top_k=top_k)
+    ]
@@ -0,0 +1,111 @@
+import os
+import re
+import time
+
+from utils.sqlite_utils import WalDatabase
+
+TODO_STATUS_PENDING = "pending"
+TODO_STATUS_DONE = "done"
+TODO_STATUSES = (TODO_STATUS_PENDING, TODO_STATUS_DONE)
+
+# Baris checklist Markdown: "- [ ] teks" / "- [x] teks (#3)" (tanda "-" dan ID opsional)
+_CHECKLIST_LINE = re.compile(r"^\s*(?:[-*+]\s+)?\[([ xX])\]\s+(.*?\S)(?:\s+\(#\d+\))?\s*$")
+
+
+class TodoStore:
+    """Daftar todo terstruktur di SQLite. Setiap item punya ID stabil
+    (AUTOINCREMENT, tidak pernah dipakai ulang), dan mengubah status hanya
+    memperbarui baris item itu. Markdown hanya dirender saat diminta."""
+
+    def __init__(self, db_path, legacy_markdown_path=None):
+        self.legacy_markdown_path = legacy_markdown_path
+        self.database = WalDatabase(db_path, initializer=self._initialize)
+
+    def _initialize(self, connection, is_new):
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS todos ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, text TEXT NOT NULL, status TEXT NOT NULL, "
+            "created_at REAL NOT NULL, completed_at REAL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS todos_status ON todos (status, id)")
+        if is_new:
+            self._import_legacy_markdown(connection)
+
+    def _import_legacy_markdown(self, connection):
+        # todo.md format lama diimpor sekali saat database dibuat
+        if not self.legacy_markdown_path or not os.path.exists(self.legacy_markdown_path):
+            return
+        try:
+            with open(self.legacy_markdown_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        items = []
+        for line in lines:
+            match = _CHECKLIST_LINE.match(line)
+            if match:
+                done = match.group(1) != " "
+                items.append((match.group(2), TODO_STATUS_DONE if done else TODO_STATUS_PENDING))
+        self._insert(connection, items)
+
+    def _insert(self, connection, items):
+        now = time.time()
+        ids = []
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for text, status in items:
+                cursor = connection.execute(
+                    "INSERT INTO todos (text, status, created_at, completed_at) VALUES (?, ?, ?, ?)",
+                    (text, status, now, now if status == TODO_STATUS_DONE else None),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def add_many(self, texts):
+        """Menambahkan item dalam satu transaksi; mengembalikan ID-nya."""
+        items = [(str(text).strip(), TODO_STATUS_PENDING) for text in texts if str(text).strip()]
+        return self._insert(self.database.connection(), items)
+
+    def set_status(self, item_ids, status):
+        """Mengubah status item. Mengembalikan (updated, unchanged, missing)."""
+        item_ids = [int(item_id) for item_id in item_ids]
+        connection = self.database.connection()
+        completed_at = time.time() if status == TODO_STATUS_DONE else None
+        updated, unchanged, missing = [], [], []
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for item_id in item_ids:
+                row = connection.execute("SELECT status FROM todos WHERE id = ?", (item_id,)).fetchone()
+                if row is None:
+                    missing.append(item_id)
+                elif row[0] == status:
+                    unchanged.append(item_id)
+                else:
+                    connection.execute(
+                        "UPDATE todos SET status = ?, completed_at = ? WHERE id = ?",
+                        (status, completed_at, item_id),
+                    )
+                    updated.append(item_id)
+        return updated, unchanged, missing
+
+    def list(self, status=None):
+        query, params = "SELECT id, text, status FROM todos", ()
+        if status is not None:
+            query, params = query + " WHERE status = ?", (status,)
+        rows = self.database.connection().execute(query + " ORDER BY id", params)
+        return [{"id": item_id, "text": text, "status": item_status} for item_id, text, item_status in rows]
+
+    def counts(self):
+        rows = self.database.connection().execute("SELECT status, COUNT(*) FROM todos GROUP BY status")
+        counts = {status: 0 for status in TODO_STATUSES}
+        counts.update(rows)
+        return counts
+
+
+def render_markdown(items):
+    """Checklist Markdown; ID ditulis di akhir baris agar tetap bisa dirujuk."""
+    lines = []
+    for item in items:
+        mark = "x" if item["status"] == TODO_STATUS_DONE else " "
+        lines.append(f"- [{mark}] {item['text']} (#{item['id']})")
+    return "\n".join(lines) + ("\n" if lines else "")
@@ -0,0 +1,271 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import deque
+
+from config import (
+    DIREKTORI_BATASAN_AI,
+    SEARCH_MAX_FILE_BYTES,
+    TREE_DEFAULT_EXCLUDED_DIRS,
+)
+from utils.ignore_utils import load_gitignore, is_ignored
+
+BINARY_SNIFF_BYTES = 8192
+REGEX_METACHARS = set(".^$*+?{}[]()|\\")
+# Escape regex yang mewakili kelas karakter, bukan karakter literal
+REGEX_CLASS_ESCAPES = set("dDwWsSbBAZ")
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def regex_required_literals(pattern):
+    """Potongan literal yang pasti muncul di setiap kecocokan `pattern`.
+    Konservatif: bila ragu, potongan dilepas sehingga tidak ada file yang terlewat."""
+    if "|" in pattern:
+        return []
+    literals, current = [], ""
+    index, depth = 0, 0
+
+    def flush():
+        if len(current) >= 3:
+            literals.append(current)
+        return ""
+
+    while index < len(pattern):
+        char = pattern[index]
+        literal = None
+        if char == "\\" and index + 1 < len(pattern):
+            escaped = pattern[index + 1]
+            if escaped not in REGEX_CLASS_ESCAPES and not escaped.isalnum():
+                literal = escaped
+            index += 2
+        elif char == "[":
+            end = pattern.find("]", index + 2)
+            index = len(pattern) if end == -1 else end + 1
+        elif char == "{":
+            # Kuantor {m,n}: angka dan koma di dalamnya bukan literal
+            end = pattern.find("}", index + 1)
+            index = index + 1 if end == -1 else end + 1
+        elif char == "(":
+            depth += 1
+            index += 1
+        elif char == ")":
+            depth -= 1
+            index += 1
+        elif char in REGEX_METACHARS:
+            index += 1
+        else:
+            literal = char
+            index += 1
+
+        # Isi grup dan karakter dengan kuantor opsional tidak dijamin muncul
+        optional = index < len(pattern) and pattern[index] in "?*{"
+        if literal is None or depth > 0 or optional:
+            current = flush()
+            continue
+        current += literal
+        if index < len(pattern) and pattern[index] == "+":
+            # 'a+' menjamin satu 'a', tetapi karakter setelahnya tidak lagi bersebelahan
+            current = flush()
+    flush()
+    return literals
+
+
+class IndexedFile:
+    def __init__(self, file_id, mtime_ns, size, trigrams, oversized=False):
+        self.file_id = file_id
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.trigrams = trigrams
+        # File teks di atas max_file_bytes: tidak diindeks, dipindai baris per baris saat dicari
+        self.oversized = oversized
+
+
+class TrigramIndex:
+    """Indeks trigram (huruf kecil) di memori untuk file teks di bawah `root`.
+    Setiap refresh hanya membaca ulang file yang mtime/ukurannya berubah."""
+
+    def __init__(self, root=DIREKTORI_BATASAN_AI, max_file_bytes=SEARCH_MAX_FILE_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_file_bytes = max_file_bytes
+        self.files = {}
+        self.paths = {}
+        self.postings = {}
+        self._next_id = 0
+        self._last_refresh_started = None
+        self._lock = threading.Lock()
+
+    def _iter_files(self):
+        stack = [(self.root, load_gitignore(self.root))]
+        while stack:
+            directory, rules = stack.pop()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir and entry.name in TREE_DEFAULT_EXCLUDED_DIRS:
+                        continue
+                    if is_ignored(rules, entry.path, entry.name, is_dir):
+                        continue
+                    if is_dir:
+                        stack.append((entry.path, rules + load_gitignore(entry.path)))
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+    def _remove(self, path):
+        indexed = self.files.pop(path, None)
+        if indexed is None:
+            return
+        del self.paths[indexed.file_id]
+        for trigram in indexed.trigrams:
+            ids = self.postings.get(trigram)
+            if ids is not None:
+                ids.discard(indexed.file_id)
+                if not ids:
+                    del self.postings[trigram]
+
+    def _add(self, path, stat):
+        trigrams = frozenset()
+        oversized = stat.st_size > self.max_file_bytes
+        with open(path, "rb") as f:
+            raw = f.read(BINARY_SNIFF_BYTES if oversized else -1)
+        # File biner tetap dicatat (tanpa trigram) agar tidak dibaca ulang
+        if b"\0" in raw[:BINARY_SNIFF_BYTES]:
+            oversized = False
+        elif not oversized:
+            trigrams = frozenset(_trigrams(raw.decode("utf-8", errors="ignore").lower()))
+        file_id = self._next_id
+        self._next_id += 1
+        self.files[path] = IndexedFile(file_id, stat.st_mtime_ns, stat.st_size, trigrams, oversized)
+        self.paths[file_id] = path
+        for trigram in trigrams:
+            self.postings.setdefault(trigram, set()).add(file_id)
+
+    def refresh(self):
+        """Menyinkronkan indeks dengan disk; mengembalikan jumlah file yang diindeks ulang."""
+        requested = time.monotonic()
+        with self._lock:
+            # Refresh lain yang dimulai setelah permintaan ini (mis. pencarian paralel
+            # yang menunggu lock) sudah melihat disk yang sama, jadi pohon tidak ditelusuri lagi
+            if self._last_refresh_started is not None and self._last_refresh_started >= requested:
+                return 0
+            self._last_refresh_started = time.monotonic()
+            seen, updated = set(), 0
+            for path, stat in self._iter_files():
+                seen.add(path)
+                indexed = self.files.get(path)
+                if indexed is not None and indexed.mtime_ns == stat.st_mtime_ns and indexed.size == stat.st_size:
+                    continue
+                self._remove(path)
+                try:
+                    self._add(path, stat)
+                    updated += 1
+                except OSError:
+                    continue
+            for path in [path for path in self.files if path not in seen]:
+                self._remove(path)
+            return updated
+
+    def candidates(self, literals):
+        """Path file yang memuat semua trigram dari `literals` (tanpa literal: semua file teks)."""
+        with self._lock:
+            required = set()
+            for literal in literals:
+                required |= _trigrams(literal.lower())
+            if not required:
+                return [path for path, indexed in self.files.items() if indexed.trigrams]
+            ids = None
+            for trigram in sorted(required, key=lambda t: len(self.postings.get(t, ()))):
+                ids = set(self.postings.get(trigram, ())) if ids is None else ids & self.postings.get(trigram, set())
+                if not ids:
+                    return []
+            return sorted(self.paths[file_id] for file_id in ids)
+
+    def oversized_files(self):
+        """Path file teks yang terlalu besar untuk diindeks; harus dipindai langsung."""
+        with self._lock:
+            return sorted(path for path, indexed in self.files.items() if indexed.oversized)
+
+
+def _line_starts(text):
+    starts = [0]
+    position = text.find("\n")
+    while position != -1:
+        starts.append(position + 1)
+        position = text.find("\n", position + 1)
+    return starts
+
+
+def search_file(path, pattern, context_lines, max_line_chars, limit):
+    """Mencari `pattern` (regex terkompilasi) di satu file; mengembalikan daftar kecocokan."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    matches = []
+    starts = None
+    last_line = 0
+    for match in pattern.finditer(text):
+        if starts is None:
+            starts = _line_starts(text)
+            lines = text.split("\n")
+        line_index = bisect_right(starts, match.start()) - 1
+        # Satu baris cukup dilaporkan sekali walau ada beberapa kecocokan di dalamnya
+        if line_index + 1 == last_line:
+            continue
+        last_line = line_index + 1
+        entry = {"line": line_index + 1, "text": lines[line_index][:max_line_chars]}
+        if context_lines:
+            entry["before"] = [line[:max_line_chars] for line in lines[max(0, line_index - context_lines):line_index]]
+            entry["after"] = [line[:max_line_chars] for line in lines[line_index + 1:line_index + 1 + context_lines]]
+        matches.append(entry)
+        if len(matches) >= limit:
+            break
+    return matches
+
+
+def scan_large_file(path, pattern, context_lines, max_line_chars, limit):
+    """Seperti search_file, tetapi membaca file baris per baris agar memori tetap
+    kecil. Pola yang melintasi beberapa baris tidak akan cocok."""
+    matches = []
+    before = deque(maxlen=context_lines)
+    waiting = []
+    with open(path, "r", encoding="utf-8", errors="ignore", newline="\n") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            shown = line[:max_line_chars]
+            for entry in waiting:
+                entry["after"].append(shown)
+            waiting = [entry for entry in waiting if len(entry["after"]) < context_lines]
+            if len(matches) >= limit:
+                if not waiting:
+                    break
+            elif pattern.search(line):
+                entry = {"line": number, "text": shown}
+                if context_lines:
+                    entry["before"] = list(before)
+                    entry["after"] = []
+                    waiting.append(entry)
+                matches.append(entry)
+            if context_lines:
+                before.append(shown)
+    return matches
+
+
+_workspace_index = None
+_workspace_index_lock = threading.Lock()
+
+
+def get_workspace_index():
+    global _workspace_index
+    with _workspace_index_lock:
+        if _workspace_index is None:
+            _workspace_index = TrigramIndex()
+        return _workspace_index